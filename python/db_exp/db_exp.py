@@ -8,14 +8,54 @@ MySQL数据库完整导出工具
 import argparse
 import sys
 import os
+import gzip
+import re
+import hashlib
+import multiprocessing
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import zlib
 import pymysql
-from pymysql.constants import CLIENT
+import pymysql.converters
+import pymysql.cursors
+from pymysql.constants import CLIENT, FIELD_TYPE
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator, Callable, Union
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from itertools import islice
 import json
 from tqdm import tqdm
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块，不统计峰值内存
+    resource = None
+
+# 与tab_exp共用的组件位于同级的dump_common目录
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(TOOLS_DIR, 'dump_common'))
+
+from dump_common import (SqlSink, ListSink, FileSink, CompressedFileSink, open_file_sink,
+                         ValueFormatter, open_row_writer, SecondaryIndexes)
+
 
 class DatabaseConnector:
     """数据库连接管理器"""
@@ -51,6 +91,10 @@ class DatabaseConnector:
             self.connection.close()
             self.connection = None
     
+    def clone(self) -> 'DatabaseConnector':
+        """创建使用相同连接参数的新连接器"""
+        return DatabaseConnector(self.host, self.port, self.user, self.password, self.database)
+    
     def test_connection(self) -> bool:
         """测试数据库连接"""
         if not self.connect():
@@ -68,9 +112,70 @@ class DatabaseConnector:
             self.close()
 
 
+# 读取表数据时不做类型转换的字段类型：DECIMAL、浮点数和日期时间保留服务端发送的文本
+RAW_TEXT_FIELD_TYPES = (FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL, FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE,
+                        FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP,
+                        FIELD_TYPE.TIME)
+RAW_TEXT_DECODERS = {**pymysql.converters.decoders,
+                     **dict.fromkeys(RAW_TEXT_FIELD_TYPES, pymysql.converters.through)}
+
+
+class RawTextCursorMixin:
+    """原样保留服务端文本的游标
+    
+    PyMySQL默认把DECIMAL解析成Decimal、DATETIME解析成datetime等，生成INSERT时又
+    str()回文本。这类游标在execute期间把连接的decoders换成RAW_TEXT_DECODERS，
+    这些列直接得到协议中的ASCII文本，由ValueFormatter按列类型加引号或原样写出。
+    PyMySQL在execute时就为每一列选定转换函数，之后取行不再查表，所以只需在
+    execute期间替换。整数列仍转换成int，分块读取时键值的比较不受影响。
+    """
+    
+    def execute(self, query, args=None):
+        connection = self.connection
+        decoders = connection.decoders
+        connection.decoders = RAW_TEXT_DECODERS
+        try:
+            return super().execute(query, args)
+        finally:
+            connection.decoders = decoders
+
+
+class RawTextCursor(RawTextCursorMixin, pymysql.cursors.Cursor):
+    """一次性读取结果集的原样文本游标"""
+
+
+class RawTextSSCursor(RawTextCursorMixin, pymysql.cursors.SSCursor):
+    """流式读取结果集的原样文本游标"""
+
+
 class DatabaseObjectDiscovery:
     """数据库对象发现器"""
     
+    # 计算结构指纹的查询，任何一项结果变化都说明缓存的对象目录已经过期。
+    # UPDATE_TIME和AUTO_INCREMENT随数据变化，但SHOW CREATE TABLE中包含AUTO_INCREMENT，也需要计入
+    FINGERPRINT_QUERIES = [
+        "SELECT TABLE_NAME, TABLE_TYPE, CREATE_TIME, UPDATE_TIME, AUTO_INCREMENT, TABLE_COLLATION, "
+        "CREATE_OPTIONS, TABLE_COMMENT FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME",
+        "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, EXTRA, "
+        "COLLATION_NAME, COLUMN_COMMENT FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME, ORDINAL_POSITION",
+        "SELECT TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX, COLUMN_NAME, NON_UNIQUE, SUB_PART, INDEX_TYPE "
+        "FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX",
+        "SELECT TABLE_NAME, CONSTRAINT_NAME, REFERENCED_TABLE_NAME, UPDATE_RULE, DELETE_RULE "
+        "FROM information_schema.REFERENTIAL_CONSTRAINTS "
+        "WHERE CONSTRAINT_SCHEMA = %s ORDER BY TABLE_NAME, CONSTRAINT_NAME",
+        "SELECT TABLE_NAME, VIEW_DEFINITION, CHECK_OPTION, SECURITY_TYPE FROM information_schema.VIEWS "
+        "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME",
+        "SELECT ROUTINE_TYPE, ROUTINE_NAME, LAST_ALTERED FROM information_schema.ROUTINES "
+        "WHERE ROUTINE_SCHEMA = %s ORDER BY ROUTINE_TYPE, ROUTINE_NAME",
+        "SELECT TRIGGER_NAME, CREATED FROM information_schema.TRIGGERS "
+        "WHERE TRIGGER_SCHEMA = %s ORDER BY TRIGGER_NAME",
+        "SELECT EVENT_NAME, LAST_ALTERED FROM information_schema.EVENTS "
+        "WHERE EVENT_SCHEMA = %s ORDER BY EVENT_NAME",
+    ]
+    
     def __init__(self, connection: pymysql.Connection, database: str):
         self.connection = connection
         self.database = database
@@ -135,12 +240,13 @@ class DatabaseObjectDiscovery:
             return []
     
     def get_triggers(self) -> List[str]:
-        """获取所有触发器"""
+        """获取所有触发器，按执行顺序排列(同一表同一时机的触发器按创建先后决定执行顺序)"""
         try:
             with self.connection.cursor() as cursor:
                 cursor.execute(
                     "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS "
-                    "WHERE TRIGGER_SCHEMA = %s ORDER BY TRIGGER_NAME",
+                    "WHERE TRIGGER_SCHEMA = %s "
+                    "ORDER BY EVENT_OBJECT_TABLE, ACTION_TIMING, EVENT_MANIPULATION, ACTION_ORDER",
                     (self.database,)
                 )
                 return [row[0] for row in cursor.fetchall()]
@@ -172,22 +278,1034 @@ class DatabaseObjectDiscovery:
             'triggers': self.get_triggers(),
             'events': self.get_events()
         }
+    
+    def load_columns(self) -> Dict[str, List[Tuple[str, str]]]:
+        """一次查询读取所有表的列名和数据类型，失败时返回空字典(由调用方逐表查询)"""
+        columns: Dict[str, List[Tuple[str, str]]] = {}
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME, ORDINAL_POSITION",
+                    (self.database,)
+                )
+                for table_name, column_name, data_type in cursor.fetchall():
+                    columns.setdefault(table_name, []).append((column_name, data_type))
+        except pymysql.Error as e:
+            logging.warning(f"批量获取列信息失败，改为逐表查询: {e}")
+        return columns
+    
+    @staticmethod
+    def format_data_type(dtd_identifier: str, charset: Optional[str]) -> str:
+        """参数和返回值的类型，字符串类型带上字符集"""
+        if charset and charset != 'binary':
+            return f"{dtd_identifier} CHARSET {charset}"
+        return dtd_identifier
+    
+    @staticmethod
+    def quote_string(value: str) -> str:
+        return "'" + pymysql.converters.escape_string(value) + "'"
+    
+    def build_routine_sql(self, routine: Dict[str, Any], params: List[Dict[str, Any]]) -> Optional[str]:
+        """由ROUTINES和PARAMETERS拼出与SHOW CREATE PROCEDURE/FUNCTION等价的语句(不含DEFINER)"""
+        if routine['ROUTINE_DEFINITION'] is None:
+            return None
+        
+        param_list = []
+        for param in params:
+            text = f"`{param['PARAMETER_NAME']}` " + self.format_data_type(
+                param['DTD_IDENTIFIER'], param['CHARACTER_SET_NAME'])
+            if param['PARAMETER_MODE']:
+                text = f"{param['PARAMETER_MODE']} {text}"
+            param_list.append(text)
+        
+        head = f"CREATE {routine['ROUTINE_TYPE']} `{routine['ROUTINE_NAME']}`({', '.join(param_list)})"
+        if routine['ROUTINE_TYPE'] == 'FUNCTION':
+            head += " RETURNS " + self.format_data_type(routine['DTD_IDENTIFIER'], routine['CHARACTER_SET_NAME'])
+        
+        characteristics = []
+        if routine['IS_DETERMINISTIC'] == 'YES':
+            characteristics.append("DETERMINISTIC")
+        if routine['SQL_DATA_ACCESS'] and routine['SQL_DATA_ACCESS'] != 'CONTAINS SQL':
+            characteristics.append(routine['SQL_DATA_ACCESS'])
+        if routine['SECURITY_TYPE'] == 'INVOKER':
+            characteristics.append("SQL SECURITY INVOKER")
+        if routine['ROUTINE_COMMENT']:
+            characteristics.append("COMMENT " + self.quote_string(routine['ROUTINE_COMMENT']))
+        
+        return '\n'.join([head] + [f"    {item}" for item in characteristics] + [routine['ROUTINE_DEFINITION']])
+    
+    def load_routines(self) -> Optional[Dict[str, Dict[str, Optional[str]]]]:
+        """两次查询读取所有存储过程和函数的定义
+        
+        返回 {'procedures': {名称: CREATE语句}, 'functions': {...}}，没有权限查看定义的
+        对象CREATE语句为None，查询失败时返回None。
+        """
+        try:
+            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(
+                    "SELECT SPECIFIC_NAME, ROUTINE_TYPE, PARAMETER_MODE, PARAMETER_NAME, "
+                    "DTD_IDENTIFIER, CHARACTER_SET_NAME FROM information_schema.PARAMETERS "
+                    "WHERE SPECIFIC_SCHEMA = %s AND ORDINAL_POSITION > 0 "
+                    "ORDER BY SPECIFIC_NAME, ROUTINE_TYPE, ORDINAL_POSITION",
+                    (self.database,)
+                )
+                params: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+                for row in cursor.fetchall():
+                    params.setdefault((row['ROUTINE_TYPE'], row['SPECIFIC_NAME']), []).append(row)
+                
+                cursor.execute(
+                    "SELECT ROUTINE_NAME, ROUTINE_TYPE, DTD_IDENTIFIER, CHARACTER_SET_NAME, "
+                    "ROUTINE_DEFINITION, IS_DETERMINISTIC, SQL_DATA_ACCESS, SECURITY_TYPE, "
+                    "ROUTINE_COMMENT FROM information_schema.ROUTINES "
+                    "WHERE ROUTINE_SCHEMA = %s ORDER BY ROUTINE_NAME",
+                    (self.database,)
+                )
+                routines: Dict[str, Dict[str, Optional[str]]] = {'procedures': {}, 'functions': {}}
+                for row in cursor.fetchall():
+                    kind = 'procedures' if row['ROUTINE_TYPE'] == 'PROCEDURE' else 'functions'
+                    routines[kind][row['ROUTINE_NAME']] = self.build_routine_sql(
+                        row, params.get((row['ROUTINE_TYPE'], row['ROUTINE_NAME']), []))
+                return routines
+        except pymysql.Error as e:
+            logging.warning(f"批量获取存储过程和函数失败，改为逐个查询: {e}")
+            return None
+    
+    def load_triggers(self) -> Optional[Dict[str, Optional[str]]]:
+        """一次查询读取所有触发器的定义，返回 {名称: CREATE语句}，查询失败时返回None
+        
+        按执行顺序排列；同一表同一时机、同一操作有多个触发器时，后面的触发器用
+        FOLLOWS指定跟在前一个之后执行，导入后的执行顺序与源库相同。
+        """
+        try:
+            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(
+                    "SELECT TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, EVENT_OBJECT_TABLE, "
+                    "ACTION_ORDER, ACTION_STATEMENT FROM information_schema.TRIGGERS "
+                    "WHERE TRIGGER_SCHEMA = %s "
+                    "ORDER BY EVENT_OBJECT_TABLE, ACTION_TIMING, EVENT_MANIPULATION, ACTION_ORDER",
+                    (self.database,)
+                )
+                triggers: Dict[str, Optional[str]] = {}
+                previous = None
+                for row in cursor.fetchall():
+                    group = (row['EVENT_OBJECT_TABLE'], row['ACTION_TIMING'], row['EVENT_MANIPULATION'])
+                    order = ''
+                    if previous is not None and previous[0] == group and (row['ACTION_ORDER'] or 0) > 1:
+                        order = f"FOLLOWS `{previous[1]}` "
+                    previous = (group, row['TRIGGER_NAME'])
+                    triggers[row['TRIGGER_NAME']] = (
+                        f"CREATE TRIGGER `{row['TRIGGER_NAME']}` {row['ACTION_TIMING']} "
+                        f"{row['EVENT_MANIPULATION']} ON `{row['EVENT_OBJECT_TABLE']}` "
+                        f"FOR EACH ROW {order}{row['ACTION_STATEMENT']}"
+                    ) if row['ACTION_STATEMENT'] is not None else None
+                return triggers
+        except pymysql.Error as e:
+            logging.warning(f"批量获取触发器失败，改为逐个查询: {e}")
+            return None
+    
+    def build_event_sql(self, event: Dict[str, Any]) -> Optional[str]:
+        """由EVENTS拼出与SHOW CREATE EVENT等价的语句(不含DEFINER)"""
+        if event['EVENT_DEFINITION'] is None:
+            return None
+        
+        if event['EVENT_TYPE'] == 'ONE TIME':
+            schedule = f"AT '{event['EXECUTE_AT']}'"
+        else:
+            interval = event['INTERVAL_VALUE']
+            if not str(interval).isdigit():
+                interval = self.quote_string(str(interval))
+            schedule = f"EVERY {interval} {event['INTERVAL_FIELD']}"
+            if event['STARTS']:
+                schedule += f" STARTS '{event['STARTS']}'"
+            if event['ENDS']:
+                schedule += f" ENDS '{event['ENDS']}'"
+        
+        status = {'ENABLED': 'ENABLE', 'DISABLED': 'DISABLE'}.get(event['STATUS'], 'DISABLE ON SLAVE')
+        sql = (f"CREATE EVENT `{event['EVENT_NAME']}` ON SCHEDULE {schedule} "
+               f"ON COMPLETION {event['ON_COMPLETION']} {status}")
+        if event['EVENT_COMMENT']:
+            sql += " COMMENT " + self.quote_string(event['EVENT_COMMENT'])
+        return sql + f" DO {event['EVENT_DEFINITION']}"
+    
+    def load_events(self) -> Optional[Dict[str, Dict[str, Optional[str]]]]:
+        """一次查询读取所有事件的定义和时区
+        
+        返回 {'events': {名称: CREATE语句}, 'event_time_zones': {名称: 时区}}，查询失败时返回None。
+        事件的调度时间按事件自己的时区解释，CREATE EVENT之前需要先切换到这个时区。
+        """
+        try:
+            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(
+                    "SELECT EVENT_NAME, EVENT_DEFINITION, EVENT_TYPE, EXECUTE_AT, INTERVAL_VALUE, "
+                    "INTERVAL_FIELD, STARTS, ENDS, STATUS, ON_COMPLETION, EVENT_COMMENT, TIME_ZONE "
+                    "FROM information_schema.EVENTS "
+                    "WHERE EVENT_SCHEMA = %s ORDER BY EVENT_NAME",
+                    (self.database,)
+                )
+                rows = cursor.fetchall()
+                return {
+                    'events': {row['EVENT_NAME']: self.build_event_sql(row) for row in rows},
+                    'event_time_zones': {row['EVENT_NAME']: row['TIME_ZONE'] for row in rows}
+                }
+        except pymysql.Error as e:
+            logging.warning(f"批量获取事件失败，改为逐个查询: {e}")
+            return None
+    
+    def get_fingerprint(self) -> Optional[str]:
+        """计算数据库对象结构的指纹，查询失败时返回None
+        
+        基于表的CREATE_TIME/UPDATE_TIME、列、索引、外键、视图定义以及存储过程、函数、
+        事件的LAST_ALTERED和触发器的CREATED，全部是集合查询，不需要逐个对象查询。
+        """
+        digest = hashlib.sha256()
+        try:
+            with self.connection.cursor() as cursor:
+                self.use_live_statistics(cursor)
+                for sql in self.FINGERPRINT_QUERIES:
+                    cursor.execute(sql, (self.database,))
+                    for row in cursor.fetchall():
+                        digest.update(repr(row).encode('utf-8'))
+                    digest.update(b'\n')
+        except pymysql.Error as e:
+            logging.warning(f"计算结构指纹失败: {e}")
+            return None
+        return digest.hexdigest()
+    
+    @staticmethod
+    def use_live_statistics(cursor):
+        """MySQL 8.0默认缓存表统计信息(含UPDATE_TIME、TABLE_ROWS)，改为读取实时值"""
+        try:
+            cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+        except pymysql.Error:
+            # MySQL 5.7没有该变量，统计信息本来就是实时的
+            pass
+    
+    def get_table_states(self, checksum: bool = False) -> Dict[str, Dict[str, Any]]:
+        """读取各表的数据状态：CREATE_TIME、UPDATE_TIME、行数估计，checksum为True时
+        再用一条CHECKSUM TABLE语句计算所有表的校验和(需要全表扫描)"""
+        states: Dict[str, Dict[str, Any]] = {}
+        try:
+            with self.connection.cursor() as cursor:
+                self.use_live_statistics(cursor)
+                cursor.execute(
+                    "SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME, TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE' ORDER BY TABLE_NAME",
+                    (self.database,)
+                )
+                for table_name, create_time, update_time, table_rows in cursor.fetchall():
+                    states[table_name] = {
+                        'create_time': str(create_time) if create_time else None,
+                        'update_time': str(update_time) if update_time else None,
+                        'rows': table_rows,
+                        'checksum': None
+                    }
+                
+                if checksum and states:
+                    cursor.execute("CHECKSUM TABLE " + ', '.join(f"`{name}`" for name in states))
+                    prefix_length = len(self.database) + 1
+                    for qualified_name, value in cursor.fetchall():
+                        table_name = qualified_name[prefix_length:]
+                        if table_name in states:
+                            states[table_name]['checksum'] = value
+        except pymysql.Error as e:
+            logging.warning(f"读取表状态失败: {e}")
+        return states
+    
+    def show_create(self, keyword: str, name: str) -> Optional[str]:
+        """SHOW CREATE TABLE/VIEW，视图去掉DEFINER；失败时返回None，由导出器重新查询并报告错误"""
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"SHOW CREATE {keyword} `{name}`")
+                result = cursor.fetchone()
+        except pymysql.Error as e:
+            logging.debug(f"SHOW CREATE {keyword} `{name}` 失败: {e}")
+            return None
+        if not result:
+            return None
+        if keyword == 'VIEW':
+            return re.sub(r'DEFINER=`[^`]+`@`[^`]+`\s+', '', result[1])
+        return result[1]
+    
+    def load_catalog(self, fingerprint: Optional[str] = None) -> 'SchemaCatalog':
+        """读取所有对象的列表、各表的列和CREATE语句，构建对象目录快照
+        
+        存储过程、函数、触发器、事件的定义和各表的列用少量集合查询读取；表和视图的
+        CREATE语句在information_schema中没有等价信息(索引、ALGORITHM等)，仍逐个
+        SHOW CREATE。批量查询失败的部分退回逐个查询。
+        """
+        objects = {'tables': self.get_tables(), 'views': self.get_views()}
+        definitions: Dict[str, Dict[str, Optional[str]]] = {
+            'tables': {name: self.show_create('TABLE', name) for name in objects['tables']},
+            'views': {name: self.show_create('VIEW', name) for name in objects['views']},
+        }
+        
+        routines = self.load_routines()
+        if routines is not None:
+            definitions.update(routines)
+            objects['procedures'] = list(routines['procedures'])
+            objects['functions'] = list(routines['functions'])
+        else:
+            objects['procedures'] = self.get_procedures()
+            objects['functions'] = self.get_functions()
+        
+        triggers = self.load_triggers()
+        if triggers is not None:
+            definitions['triggers'] = triggers
+            objects['triggers'] = list(triggers)
+        else:
+            objects['triggers'] = self.get_triggers()
+        
+        events = self.load_events()
+        if events is not None:
+            definitions.update(events)
+            objects['events'] = list(events['events'])
+        else:
+            objects['events'] = self.get_events()
+        
+        return SchemaCatalog(self.database, objects, self.load_columns(), definitions, fingerprint)
+
+
+class SchemaCatalog:
+    """数据库对象目录的不可变快照
+    
+    每次导出只构建一次，结构导出、数据导出、进度统计和元数据都从这里读取，
+    不再重复查询information_schema。可序列化为JSON文件，fingerprint记录构建时
+    的结构指纹，下次导出时指纹不变即可直接复用，跳过对象发现。
+    """
+    
+    __slots__ = ('database', 'fingerprint', 'objects', 'columns', 'definitions')
+    
+    def __init__(self, database: str, objects: Dict[str, List[str]],
+                 columns: Dict[str, List[Tuple[str, str]]],
+                 definitions: Dict[str, Dict[str, Optional[str]]],
+                 fingerprint: Optional[str] = None):
+        set_attr = super().__setattr__
+        set_attr('database', database)
+        set_attr('fingerprint', fingerprint)
+        set_attr('objects', MappingProxyType({kind: tuple(names) for kind, names in objects.items()}))
+        set_attr('columns', MappingProxyType({
+            table_name: tuple((name, data_type) for name, data_type in table_columns)
+            for table_name, table_columns in columns.items()
+        }))
+        set_attr('definitions', MappingProxyType({
+            kind: MappingProxyType(dict(items)) for kind, items in definitions.items()
+        }))
+    
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} 是只读的")
+    
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} 是只读的")
+    
+    def get_columns(self, table_name: str) -> Optional[Tuple[Tuple[str, str], ...]]:
+        """表的(列名, 数据类型)列表，目录中没有时返回None"""
+        return self.columns.get(table_name)
+    
+    def get_definition(self, kind: str, name: str) -> Optional[str]:
+        """对象的CREATE语句(不含DEFINER)，目录中没有时返回None"""
+        return self.definitions.get(kind, {}).get(name)
+    
+    def get_all_objects(self) -> Dict[str, List[str]]:
+        """与DatabaseObjectDiscovery.get_all_objects格式相同的对象列表"""
+        return {kind: list(names) for kind, names in self.objects.items()}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'database': self.database,
+            'fingerprint': self.fingerprint,
+            'objects': self.get_all_objects(),
+            'columns': {table_name: [list(column) for column in table_columns]
+                        for table_name, table_columns in self.columns.items()},
+            'definitions': {kind: dict(items) for kind, items in self.definitions.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SchemaCatalog':
+        return cls(data['database'], data['objects'], data['columns'],
+                   data['definitions'], data.get('fingerprint'))
+    
+    def save(self, filename: str) -> bool:
+        """保存到JSON文件"""
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+            return True
+        except (IOError, TypeError) as e:
+            logging.warning(f"保存对象目录缓存失败: {e}")
+            return False
+    
+    @classmethod
+    def load(cls, filename: str) -> Optional['SchemaCatalog']:
+        """从JSON文件读取，文件不存在或格式不对时返回None"""
+        if not os.path.exists(filename):
+            return None
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                return cls.from_dict(json.load(f))
+        except (IOError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"读取对象目录缓存失败: {e}")
+            return None
+
+
+class ConnectionPool:
+    """固定大小的连接池，池中所有连接处于同一个一致性快照中"""
+    
+    def __init__(self, template: DatabaseConnector, size: int):
+        self.template = template
+        self.size = size
+        self.connectors: List[DatabaseConnector] = []
+        self.idle: queue.Queue = queue.Queue()
+    
+    def open(self) -> bool:
+        """打开所有连接并开启一致性快照事务
+        
+        先用FLUSH TABLES WITH READ LOCK冻结写入，再在每个连接上执行
+        START TRANSACTION WITH CONSISTENT SNAPSHOT，保证各连接看到同一时刻的数据。
+        没有RELOAD权限时退化为各连接独立开启快照。
+        """
+        lock_db = self.template.clone()
+        if not lock_db.connect():
+            return False
+        
+        locked = False
+        try:
+            try:
+                with lock_db.connection.cursor() as cursor:
+                    cursor.execute("FLUSH TABLES WITH READ LOCK")
+                locked = True
+            except pymysql.Error as e:
+                logging.warning(f"无法获取全局读锁，各连接的快照时间点可能不一致: {e}")
+            
+            for _ in range(self.size):
+                db = self.template.clone()
+                if not db.connect():
+                    return False
+                self.connectors.append(db)
+                with db.connection.cursor() as cursor:
+                    cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                    cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+                self.idle.put(db)
+            return True
+        except pymysql.Error as e:
+            logging.error(f"开启一致性快照失败: {e}")
+            return False
+        finally:
+            if locked:
+                with lock_db.connection.cursor() as cursor:
+                    cursor.execute("UNLOCK TABLES")
+            lock_db.close()
+    
+    def acquire(self) -> DatabaseConnector:
+        """取出一个空闲连接，没有空闲连接时阻塞等待"""
+        return self.idle.get()
+    
+    def release(self, db: DatabaseConnector):
+        """归还连接"""
+        self.idle.put(db)
+    
+    def close(self):
+        """结束快照事务并关闭所有连接"""
+        for db in self.connectors:
+            try:
+                db.connection.rollback()
+            except pymysql.Error:
+                pass
+            db.close()
+        self.connectors = []
+
+
+class TableChunker:
+    """基于主键/唯一键的分块扫描器
+    
+    使用键集分页(WHERE key > last ORDER BY key LIMIT n)按键顺序分块读取表，
+    每次查询只涉及一个块，不会长时间持有覆盖整表的查询。
+    """
+    
+    def __init__(self, table_name: str, key_columns: List[str], chunk_size: int):
+        self.table_name = table_name
+        self.key_columns = key_columns
+        self.chunk_size = chunk_size
+    
+    @classmethod
+    def load(cls, db: DatabaseConnector, table_name: str, chunk_size: int) -> Optional['TableChunker']:
+        """从information_schema读取可用于分块的键，优先主键，其次全部列非空的唯一键
+        
+        没有可用的键时返回None，调用方应退回整表扫描。
+        """
+        with db.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT s.INDEX_NAME, s.COLUMN_NAME, s.SUB_PART, c.IS_NULLABLE "
+                "FROM information_schema.STATISTICS s "
+                "JOIN information_schema.COLUMNS c ON c.TABLE_SCHEMA = s.TABLE_SCHEMA "
+                "AND c.TABLE_NAME = s.TABLE_NAME AND c.COLUMN_NAME = s.COLUMN_NAME "
+                "WHERE s.TABLE_SCHEMA = %s AND s.TABLE_NAME = %s AND s.NON_UNIQUE = 0 "
+                "ORDER BY s.INDEX_NAME = 'PRIMARY' DESC, s.INDEX_NAME, s.SEQ_IN_INDEX",
+                (db.database, table_name)
+            )
+            indexes: Dict[str, List[str]] = {}
+            usable: Dict[str, bool] = {}
+            for index_name, column_name, sub_part, is_nullable in cursor.fetchall():
+                indexes.setdefault(index_name, []).append(column_name)
+                usable[index_name] = usable.get(index_name, True) and sub_part is None and is_nullable == 'NO'
+        
+        for index_name, columns in indexes.items():
+            if usable[index_name]:
+                return cls(table_name, columns, chunk_size)
+        return None
+    
+    def _key_expr(self) -> str:
+        columns = ', '.join(f"`{col}`" for col in self.key_columns)
+        return f"({columns})" if len(self.key_columns) > 1 else columns
+    
+    def _placeholders(self) -> str:
+        marks = ', '.join(['%s'] * len(self.key_columns))
+        return f"({marks})" if len(self.key_columns) > 1 else marks
+    
+    def _order_by(self) -> str:
+        return ', '.join(f"`{col}`" for col in self.key_columns)
+    
+    def _where(self, lower: Optional[Tuple], upper: Optional[Tuple]) -> Tuple[str, List[Any]]:
+        conditions = []
+        args: List[Any] = []
+        if lower is not None:
+            conditions.append(f"{self._key_expr()} > {self._placeholders()}")
+            args.extend(lower)
+        if upper is not None:
+            conditions.append(f"{self._key_expr()} <= {self._placeholders()}")
+            args.extend(upper)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, args
+    
+    def select_range(self, lower: Optional[Tuple], upper: Optional[Tuple],
+                     columns: str = '*', limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+        """生成读取键区间(lower, upper]的查询，lower/upper为None表示不设边界"""
+        where, args = self._where(lower, upper)
+        sql = f"SELECT {columns} FROM `{self.table_name}`{where} ORDER BY {self._order_by()}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return sql, args
+    
+    def split(self, db: DatabaseConnector, lower: Optional[Tuple] = None) -> List[Tuple[Optional[Tuple], Optional[Tuple]]]:
+        """只扫描键索引，把表中键大于lower的部分切分成每块约chunk_size行的键区间列表
+        
+        最后一个区间不设上界，因此无论切分时数据如何变化，所有区间合起来总能覆盖整张表。
+        """
+        ranges = []
+        with db.connection.cursor() as cursor:
+            while True:
+                where, args = self._where(lower, None)
+                cursor.execute(
+                    f"SELECT {self._order_by()} FROM `{self.table_name}`{where} "
+                    f"ORDER BY {self._order_by()} LIMIT 1 OFFSET {int(self.chunk_size) - 1}",
+                    args
+                )
+                boundary = cursor.fetchone()
+                if boundary is None:
+                    break
+                boundary = tuple(boundary)
+                ranges.append((lower, boundary))
+                lower = boundary
+        ranges.append((lower, None))
+        return ranges
+    
+    def key_of(self, row: Tuple, columns: List[str]) -> Tuple:
+        """取出一行数据中的键值"""
+        return tuple(row[columns.index(col)] for col in self.key_columns)
+
+
+class DumpReader:
+    """按解压后的偏移读取导出文件，gzip/zstd压缩的文件按文件头自动识别并透明解压
+    
+    压缩流只能顺序读取：向前seek时读过并丢弃中间的数据，向后seek时重新打开文件。
+    """
+    
+    GZIP_MAGIC = b'\x1f\x8b'
+    ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            magic = f.read(4)
+        if magic.startswith(self.GZIP_MAGIC):
+            self.compression = 'gzip'
+        elif magic == self.ZSTD_MAGIC:
+            if zstandard is None:
+                raise IOError(f"{filename} 是zstd压缩文件，需要安装zstandard: pip install zstandard")
+            self.compression = 'zstd'
+        else:
+            self.compression = None
+        self.file = None
+        self.position = 0
+        self.reopen()
+    
+    def reopen(self):
+        self.close()
+        if self.compression == 'gzip':
+            self.file = gzip.open(self.filename, 'rb')
+        elif self.compression == 'zstd':
+            self.file = zstandard.open(self.filename, 'rb')
+        else:
+            self.file = open(self.filename, 'rb')
+        self.position = 0
+    
+    def seek(self, offset: int):
+        if self.compression is None:
+            self.file.seek(offset)
+            self.position = offset
+            return
+        if offset < self.position:
+            self.reopen()
+        while self.position < offset:
+            data = self.file.read(min(offset - self.position, FileSink.COPY_CHUNK_SIZE))
+            if not data:
+                raise IOError(f"文件 {self.filename} 长度不足，无法定位到偏移 {offset}")
+            self.position += len(data)
+    
+    def read(self, size: int) -> bytes:
+        data = self.file.read(size)
+        self.position += len(data)
+        return data
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class DumpDirectory:
+    """目录格式的导出
+    
+    每个对象一个结构文件，每个表的数据按键区间块写成一个或多个数据文件，另有
+    manifest.json记录对象、依赖关系、行数以及每个文件的字节数和CRC32。各文件
+    可以独立写出和导入，也可以只取出其中一个表：
+        
+        orders-schema.sql           表结构
+        orders.00000.sql            表数据(每个键区间块一个文件，也可以是.tsv/.csv/.jsonl/.parquet)
+        v_orders-schema-view.sql    视图(存储过程、函数、触发器、事件同理)
+        users.sql                   用户权限
+        manifest.json
+    """
+    
+    MANIFEST = 'manifest.json'
+    FORMAT = 'db_exp-dir'
+    VERSION = 1
+    SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+    SCHEMA_SUFFIXES = {'tables': '', 'views': '-view', 'procedures': '-procedure',
+                       'functions': '-function', 'triggers': '-trigger', 'events': '-event'}
+    DATA_FORMATS = ('sql', 'tsv', 'csv', 'jsonl', 'parquet')
+    
+    def __init__(self, path: str, compression: Optional[str] = None, data_format: str = 'sql'):
+        self.path = path
+        self.compression = compression
+        self.data_format = data_format
+        self.suffix = '.sql' + self.SUFFIXES.get(compression, '')
+        if data_format == 'parquet':
+            # Parquet在文件内部按列压缩
+            self.data_suffix = '.parquet'
+        else:
+            self.data_suffix = '.' + data_format + self.SUFFIXES.get(compression, '')
+    
+    @staticmethod
+    def encode_name(name: str) -> str:
+        """把对象名转换成安全的文件名，字母(含中文)、数字、_ 和 $ 以外的字符写成 @XXXX"""
+        return ''.join(ch if ch.isalnum() or ch in '_$' else f"@{ord(ch):04x}" for ch in name)
+    
+    def schema_file(self, kind: str, name: str) -> str:
+        return f"{self.encode_name(name)}-schema{self.SCHEMA_SUFFIXES[kind]}{self.suffix}"
+    
+    def data_file(self, table_name: str, index: int) -> str:
+        return f"{self.encode_name(table_name)}.{index:05d}{self.data_suffix}"
+    
+    def open_file(self, filename: str) -> FileSink:
+        """打开目录中的一个输出文件，压缩在写该文件的线程之外的一个压缩线程中进行"""
+        return open_file_sink(os.path.join(self.path, filename), self.compression or 'none', threads=1)
+    
+    def open_row_writer(self, filename: str, columns: List[Dict[str, Any]]) -> Any:
+        """打开目录中的一个TSV/CSV/JSON Lines/Parquet数据文件"""
+        return open_row_writer(self.data_format, os.path.join(self.path, filename), columns,
+                               self.compression, threads=1)
+    
+    def remove_file(self, filename: str):
+        os.remove(os.path.join(self.path, filename))
+    
+    def save_manifest(self, manifest: Dict[str, Any]):
+        """先写临时文件再改名，清单存在即表示导出完整"""
+        filename = os.path.join(self.path, self.MANIFEST)
+        with open(filename + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(filename + '.tmp', filename)
+
+
+class ExportCheckpoint:
+    """导出断点清单
+    
+    以JSON Lines格式逐条追加记录已完成的导出单元(对象定义或表数据块)在输出文件中的
+    字节区间和CRC32校验值。导出中断后可据此校验已写出的内容，截掉不完整的尾部，
+    并跳过已完成的单元继续导出。
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.options: Dict[str, Any] = {}
+        self.entries: List[Dict[str, Any]] = []
+        self.done: Dict[str, Dict[str, Any]] = {}
+        self.file = None
+    
+    @staticmethod
+    def encode_key(values: Optional[Tuple]) -> Optional[List[Any]]:
+        """将键值转换为可JSON序列化的形式，二进制值用十六进制保存"""
+        if values is None:
+            return None
+        encoded = []
+        for value in values:
+            if value is None or isinstance(value, (bool, int, float, str)):
+                encoded.append(value)
+            elif isinstance(value, (bytes, bytearray)):
+                encoded.append({'hex': bytes(value).hex()})
+            else:
+                encoded.append(str(value))
+        return encoded
+    
+    @staticmethod
+    def decode_key(values: Optional[List[Any]]) -> Optional[Tuple]:
+        """还原encode_key保存的键值，日期、DECIMAL等以字符串形式交给MySQL比较"""
+        if values is None:
+            return None
+        return tuple(bytes.fromhex(value['hex']) if isinstance(value, dict) else value
+                     for value in values)
+    
+    def start(self, options: Dict[str, Any]):
+        """开始新的导出，清空旧的断点清单"""
+        self.options = options
+        self.entries = []
+        self.done = {}
+        self._rewrite()
+    
+    def load(self) -> bool:
+        """读取断点清单，忽略中断时可能写了一半的最后一行"""
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except IOError as e:
+            logging.error(f"读取断点文件失败: {e}")
+            return False
+        
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+        if not records or 'options' not in records[0]:
+            logging.error(f"断点文件格式错误: {self.filename}")
+            return False
+        
+        self.options = records[0]['options']
+        self.entries = records[1:]
+        self.done = {entry['key']: entry for entry in self.entries}
+        return True
+    
+    def verify(self, output_filename: str) -> int:
+        """按记录的字节区间逐个校验输出文件，丢弃第一个不连续或校验失败的单元及其之后的记录
+        
+        返回可以继续追加写入的文件偏移量。
+        """
+        valid = []
+        offset = 0
+        try:
+            with open(output_filename, 'rb') as f:
+                for entry in self.entries:
+                    if entry['start'] != offset or not self.check_range(f, entry):
+                        break
+                    valid.append(entry)
+                    offset = entry['end']
+        except IOError as e:
+            logging.warning(f"读取已导出的文件失败，从头开始导出: {e}")
+        
+        if len(valid) < len(self.entries):
+            logging.warning(f"断点清单中有 {len(self.entries) - len(valid)} 个单元未通过校验，将重新导出")
+        self.entries = valid
+        self.done = {entry['key']: entry for entry in valid}
+        self._rewrite()
+        return offset
+    
+    @staticmethod
+    def check_range(f, entry: Dict[str, Any]) -> bool:
+        """从f的当前位置读取entry记录的字节区间，检查长度和CRC32是否一致"""
+        crc = 0
+        remaining = entry['end'] - entry['start']
+        while remaining > 0:
+            data = f.read(min(remaining, 1024 * 1024))
+            if not data:
+                return False
+            crc = zlib.crc32(data, crc)
+            remaining -= len(data)
+        return crc == entry['crc32']
+    
+    def _rewrite(self):
+        self.close()
+        self.file = open(self.filename, 'w', encoding='utf-8')
+        self.file.write(json.dumps({'options': self.options}, ensure_ascii=False) + '\n')
+        for entry in self.entries:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.file.flush()
+    
+    def record(self, key: str, start: int, end: int, crc32: int, **extra):
+        """记录一个已完成并已刷新到输出文件的单元"""
+        entry = {'key': key, 'start': start, 'end': end, 'crc32': crc32}
+        entry.update(extra)
+        self.entries.append(entry)
+        self.done[key] = entry
+        self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.file.flush()
+    
+    def is_done(self, key: str) -> bool:
+        return key in self.done
+    
+    def table_chunks(self, table_name: str) -> List[Dict[str, Any]]:
+        """按顺序返回一个表已完成的数据块记录"""
+        return [entry for entry in self.entries
+                if entry.get('table') == table_name and 'chunk' in entry]
+    
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+    
+    def finish(self):
+        """导出成功完成后删除断点文件，记录仍保留在内存中供元数据使用"""
+        self.close()
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+
+class ExportMetrics:
+    """分表、分阶段的导出耗时统计
+    
+    每个表的数据导出按阶段累计耗时：query(执行SELECT、等待服务端返回结果)、fetch(从游标
+    取行)、format(生成INSERT文本，启用格式化进程池时为等待子进程结果的时间)、write(写出
+    语句，包括压缩排队和写磁盘)；另外记录整个导出的对象发现耗时和进程的峰值内存。
+    并行导出时各连接的耗时分别累计，各表阶段耗时之和可能超过总耗时。根据各阶段的占比
+    可以判断导出慢在数据库、CPU还是磁盘。
+    """
+    
+    PHASES = ('query', 'fetch', 'format', 'write')
+    
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.discovery = 0.0
+        self.tables: Dict[str, Dict[str, float]] = {}
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def new_timings(cls) -> Dict[str, float]:
+        """一个表(或数据块)的各阶段计时，由导出过程累加后交给add_table"""
+        return dict.fromkeys(cls.PHASES, 0.0)
+    
+    def add_table(self, table_name: str, timings: Dict[str, float], rows: int, size: int):
+        """累加一个表(或表的一个数据块)的阶段耗时、行数和字节数，可在多个线程中调用"""
+        with self.lock:
+            entry = self.tables.setdefault(table_name, dict(self.new_timings(), rows=0, bytes=0))
+            for phase in self.PHASES:
+                entry[phase] += timings[phase]
+            entry['rows'] += rows
+            entry['bytes'] += size
+    
+    def finish(self):
+        self.finished = time.monotonic()
+    
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+    
+    @staticmethod
+    def peak_rss(who: int = 0) -> Optional[int]:
+        """进程(who为RUSAGE_CHILDREN时为已结束的子进程)的峰值常驻内存字节数，不支持的平台返回None"""
+        if resource is None:
+            return None
+        peak = resource.getrusage(who or resource.RUSAGE_SELF).ru_maxrss
+        # Linux以KB为单位，macOS以字节为单位
+        return peak if sys.platform == 'darwin' else peak * 1024
+    
+    @staticmethod
+    def rate(amount: float, seconds: float) -> Optional[float]:
+        return round(amount / seconds, 1) if seconds > 0 else None
+    
+    def totals(self) -> Dict[str, Any]:
+        """所有表合计的阶段耗时、行数和字节数"""
+        totals: Dict[str, Any] = dict(self.new_timings(), rows=0, bytes=0)
+        for entry in self.tables.values():
+            for key in totals:
+                totals[key] += entry[key]
+        return totals
+    
+    def report(self) -> Dict[str, Any]:
+        """生成可写入元数据JSON的统计报告"""
+        elapsed = self.elapsed
+        totals = self.totals()
+        tables = {}
+        for table_name, entry in self.tables.items():
+            busy = sum(entry[phase] for phase in self.PHASES)
+            tables[table_name] = {
+                **{f"{phase}_seconds": round(entry[phase], 3) for phase in self.PHASES},
+                'rows': entry['rows'],
+                'bytes': entry['bytes'],
+                'rows_per_second': self.rate(entry['rows'], busy),
+                'bytes_per_second': self.rate(entry['bytes'], busy)
+            }
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'discovery_seconds': round(self.discovery, 3),
+            'phases': {f"{phase}_seconds": round(totals[phase], 3) for phase in self.PHASES},
+            'rows': totals['rows'],
+            'bytes': totals['bytes'],
+            'rows_per_second': self.rate(totals['rows'], elapsed),
+            'bytes_per_second': self.rate(totals['bytes'], elapsed),
+            'peak_rss_bytes': self.peak_rss(),
+            'peak_rss_children_bytes': self.peak_rss(resource.RUSAGE_CHILDREN) if resource is not None else None,
+            'tables': tables
+        }
+    
+    @staticmethod
+    def escape_label(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    
+    def write_prometheus(self, filename: str, database: str):
+        """写出Prometheus textfile collector格式的指标文件
+        
+        先写临时文件再改名，node_exporter不会读到写了一半的文件。
+        """
+        report = self.report()
+        db_label = f'database="{self.escape_label(database)}"'
+        lines = [
+            "# HELP db_exp_duration_seconds Wall clock time of the export.",
+            "# TYPE db_exp_duration_seconds gauge",
+            f"db_exp_duration_seconds{{{db_label}}} {report['elapsed_seconds']}",
+            "# HELP db_exp_discovery_seconds Time spent discovering database objects.",
+            "# TYPE db_exp_discovery_seconds gauge",
+            f"db_exp_discovery_seconds{{{db_label}}} {report['discovery_seconds']}",
+            "# HELP db_exp_phase_seconds Time spent per table and export phase.",
+            "# TYPE db_exp_phase_seconds gauge",
+        ]
+        for table_name, entry in report['tables'].items():
+            labels = f'{db_label},table="{self.escape_label(table_name)}"'
+            for phase in self.PHASES:
+                lines.append(f'db_exp_phase_seconds{{{labels},phase="{phase}"}} {entry[phase + "_seconds"]}')
+        for metric, key, help_text in (('db_exp_rows', 'rows', "Rows exported per table."),
+                                       ('db_exp_bytes', 'bytes', "Uncompressed bytes written per table.")):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for table_name, entry in report['tables'].items():
+                lines.append(f'{metric}{{{db_label},table="{self.escape_label(table_name)}"}} {entry[key]}')
+        if report['peak_rss_bytes'] is not None:
+            lines.append("# HELP db_exp_peak_rss_bytes Peak resident set size of the export process.")
+            lines.append("# TYPE db_exp_peak_rss_bytes gauge")
+            lines.append(f"db_exp_peak_rss_bytes{{{db_label}}} {report['peak_rss_bytes']}")
+        lines.append("# HELP db_exp_last_run_timestamp_seconds Unix time when the export finished.")
+        lines.append("# TYPE db_exp_last_run_timestamp_seconds gauge")
+        lines.append(f"db_exp_last_run_timestamp_seconds{{{db_label}}} {time.time():.0f}")
+        
+        temp_name = f"{filename}.{os.getpid()}.tmp"
+        with open(temp_name, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_name, filename)
 
 
 class DatabaseExporter:
     """数据库导出器"""
     
+    # 含BLOB/TEXT列的表每次从游标取的行数，以及一批行中大字段的总字节数上限
+    LOB_FETCH_ROWS = 16
+    LOB_BATCH_BYTES = 8 * 1024 * 1024
+    
     def __init__(self, source_db: DatabaseConnector, include_data: bool = True,
-                 include_users: bool = False, show_progress: bool = True):
+                 include_users: bool = False, show_progress: bool = True,
+                 stream_rows: bool = False, batch_size: int = 1000,
+                 jobs: int = 1, temp_dir: Optional[str] = None, chunk_size: int = 0,
+                 schema_cache: Optional[str] = None, checksum: bool = False,
+                 since: Optional[Dict[str, Any]] = None, defer_indexes: bool = False,
+                 binary_encoding: str = 'hex', passthrough: bool = False, format_workers: int = 0):
         self.source_db = source_db
         self.include_data = include_data
         self.include_users = include_users
         self.show_progress = show_progress
-        self.sql_statements: List[str] = []
+        self.stream_rows = stream_rows
+        self.batch_size = batch_size
+        self.jobs = jobs
+        self.temp_dir = temp_dir
+        self.chunk_size = chunk_size
+        self.schema_cache = schema_cache
+        self.checksum = checksum or since is not None
+        self.since = since
+        # 不导出数据时没有导入阶段，索引照常留在建表语句中
+        self.defer_indexes = defer_indexes and include_data
+        self.binary_encoding = binary_encoding
+        self.passthrough = passthrough
+        self.format_workers = format_workers
+        self.format_pool: Optional[ProcessPoolExecutor] = None
+        self.table_states: Dict[str, Dict[str, Any]] = {}
+        self.reused: Dict[str, List[Dict[str, Any]]] = {}
+        self.previous_reader: Optional[DumpReader] = None
+        self.sql_statements: List[Union[str, bytes]] = []
+        self.sink: Optional[SqlSink] = None
+        self.checkpoint: Optional[ExportCheckpoint] = None
+        self.unit_start = 0
         self.discovery: Optional[DatabaseObjectDiscovery] = None
+        self.catalog: Optional[SchemaCatalog] = None
+        self.metrics = ExportMetrics()
+    
+    def emit(self, statement: Union[str, bytes]):
+        """输出一条语句：有sink时直接写出，否则收集到内存"""
+        if self.sink is not None:
+            self.sink.write(statement)
+        else:
+            self.sql_statements.append(statement)
+    
+    def flush(self):
+        """将已生成的语句刷新到输出端"""
+        if self.sink is not None:
+            self.sink.flush()
+    
+    def load_schema(self) -> SchemaCatalog:
+        """构建本次导出使用的对象目录快照
         
+        指定schema_cache时先计算结构指纹，与缓存文件中记录的一致则直接使用缓存，
+        否则重新发现并写回缓存。耗时计入metrics的对象发现耗时。
+        """
+        started = time.monotonic()
+        try:
+            fingerprint = self.discovery.get_fingerprint() if self.schema_cache else None
+            if fingerprint:
+                cached = SchemaCatalog.load(self.schema_cache)
+                if (cached is not None and cached.database == self.source_db.database
+                        and cached.fingerprint == fingerprint):
+                    logging.info(f"数据库结构未变化，使用对象目录缓存: {self.schema_cache}")
+                    return cached
+            
+            catalog = self.discovery.load_catalog(fingerprint)
+            if fingerprint and catalog.save(self.schema_cache):
+                logging.info(f"对象目录缓存已保存: {self.schema_cache}")
+            return catalog
+        finally:
+            self.metrics.discovery += time.monotonic() - started
+    
     def export_table_structure(self, table_name: str) -> Optional[str]:
         """导出表结构"""
+        if self.catalog is not None:
+            create_statement = self.catalog.get_definition('tables', table_name)
+            if create_statement is not None:
+                return create_statement
+        
         try:
             with self.source_db.connection.cursor() as cursor:
                 cursor.execute(f"SHOW CREATE TABLE `{table_name}`")
@@ -199,65 +1317,477 @@ class DatabaseExporter:
             logging.error(f"导出表结构失败 ({table_name}): {e}")
             return None
     
-    def export_table_data(self, table_name: str) -> List[str]:
-        """导出表数据"""
-        statements = []
+    def export_table_definition(self, table_name: str) -> Optional[str]:
+        """导出文件中使用的建表语句，延后创建索引时去掉二级索引"""
+        create_statement = self.export_table_structure(table_name)
+        if create_statement and self.defer_indexes:
+            create_statement, _ = SecondaryIndexes.split(create_statement)
+        return create_statement
+    
+    def get_columns(self, table_name: str, db: Optional[DatabaseConnector] = None) -> List[Tuple[str, str]]:
+        """获取表的列名和数据类型，优先使用批量读取的目录"""
+        if self.catalog is not None:
+            columns = self.catalog.get_columns(table_name)
+            if columns is not None:
+                return columns
+        
+        db = db or self.source_db
+        with db.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s "
+                "ORDER BY ORDINAL_POSITION",
+                (db.database, table_name)
+            )
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+    
+    def get_column_details(self, table_name: str, db: DatabaseConnector) -> List[Dict[str, Any]]:
+        """获取表的列信息，包括Parquet输出需要的精度、小数位和是否无符号"""
+        with db.connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            cursor.execute(
+                "SELECT COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, NUMERIC_PRECISION, NUMERIC_SCALE "
+                "FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s "
+                "ORDER BY ORDINAL_POSITION",
+                (db.database, table_name)
+            )
+            return list(cursor.fetchall())
+    
+    def iter_table_rows(self, table_name: str, db: DatabaseConnector,
+                        chunk: Optional[Tuple['TableChunker', Optional[Tuple], Optional[Tuple]]] = None,
+                        limit: Optional[int] = None, fetch_size: Optional[int] = None,
+                        raw: bool = False, timings: Optional[Dict[str, float]] = None) -> Iterator[Tuple]:
+        """读取表中的行，chunk为(chunker, lower, upper)时只读取该键区间，limit限制读取的行数，
+        fetch_size为每次从游标取的行数(默认batch_size)，raw为True时数值和日期时间保留服务端文本，
+        timings不为None时把执行查询和取行的耗时累加到其中的query和fetch"""
+        if raw:
+            cursor_class = RawTextSSCursor if self.stream_rows else RawTextCursor
+        else:
+            cursor_class = pymysql.cursors.SSCursor if self.stream_rows else pymysql.cursors.Cursor
+        
+        if chunk is not None:
+            chunker, lower, upper = chunk
+            sql, args = chunker.select_range(lower, upper, limit=limit)
+        else:
+            sql, args = f"SELECT * FROM `{table_name}`", None
+        
+        if timings is None:
+            timings = ExportMetrics.new_timings()
+        with db.connection.cursor(cursor_class) as cursor:
+            started = time.monotonic()
+            cursor.execute(sql, args)
+            timings['query'] += time.monotonic() - started
+            while True:
+                started = time.monotonic()
+                rows = cursor.fetchmany(fetch_size or self.batch_size)
+                timings['fetch'] += time.monotonic() - started
+                if not rows:
+                    break
+                yield from rows
+    
+    def iter_row_batches(self, rows: Iterator[Tuple], formatter: ValueFormatter) -> Iterator[List[Tuple]]:
+        """把行分成batch_size行一批；含大字段的表同时按LOB_BATCH_BYTES限制每批的大小"""
+        if not formatter.lob_columns:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    return
+                yield batch
+        
+        batch, size = [], 0
+        for row in rows:
+            batch.append(row)
+            size += formatter.lob_size(row)
+            if len(batch) >= self.batch_size or size >= self.LOB_BATCH_BYTES:
+                yield batch
+                batch, size = [], 0
+        if batch:
+            yield batch
+    
+    def iter_table_data(self, table_name: str, db: Optional[DatabaseConnector] = None,
+                        chunk: Optional[Tuple['TableChunker', Optional[Tuple], Optional[Tuple]]] = None,
+                        limit: Optional[int] = None, stats: Optional[Dict[str, Any]] = None) -> Iterator[Union[str, bytes]]:
+        """逐批生成表数据的INSERT语句
+        
+        流式模式下使用无缓冲的服务端游标(SSCursor)，每次只取一批行，
+        内存占用只与batch_size有关；否则沿用fetchall()一次性读取。
+        两种模式生成的语句完全相同。db为并行导出时使用的池中连接。
+        stats用于返回已导出的行数(rows)、最后一行的键(last_key)和错误信息(error)。
+        
+        含BLOB/TEXT列的表每次只取LOB_FETCH_ROWS行，每批行按大字段的总字节数截断；
+        带有大字段值的行单独生成一条INSERT，直接编码成bytearray返回。
+        passthrough为True时用RawTextCursor读取，DECIMAL、浮点数和日期时间以服务端文本写出。
+        
+        各阶段耗时计入metrics：生成器挂起在yield处的时间(调用方写出语句)计为write，
+        其余时间扣除查询和取行后计为format。
+        """
+        db = db or self.source_db
+        if stats is None:
+            stats = {}
+        stats.update(rows=0, last_key=None, error=None)
+        timings = ExportMetrics.new_timings()
+        size = 0
+        started = time.monotonic()
         try:
-            with self.source_db.connection.cursor() as cursor:
-                # 获取表的列信息
-                cursor.execute(
-                    "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
-                    "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s "
-                    "ORDER BY ORDINAL_POSITION",
-                    (self.source_db.database, table_name)
-                )
-                columns = [row[0] for row in cursor.fetchall()]
-                
-                if not columns:
-                    return statements
-                
-                column_list = ', '.join([f"`{col}`" for col in columns])
-                
-                # 获取数据
-                cursor.execute(f"SELECT * FROM `{table_name}`")
-                rows = cursor.fetchall()
-                
-                # 批量生成INSERT语句
-                batch_size = 1000
-                for i in range(0, len(rows), batch_size):
-                    batch = rows[i:i+batch_size]
-                    values_list = []
-                    
-                    for row in batch:
-                        values = []
-                        for value in row:
-                            if value is None:
-                                values.append('NULL')
-                            elif isinstance(value, str):
-                                escaped = value.replace('\\', '\\\\').replace("'", "\\'")
-                                escaped = escaped.replace('\n', '\\n').replace('\r', '\\r')
-                                values.append(f"'{escaped}'")
-                            elif isinstance(value, (datetime,)):
-                                values.append(f"'{value}'")
-                            elif isinstance(value, bytes):
-                                hex_str = value.hex()
-                                values.append(f"0x{hex_str}" if hex_str else "''")
-                            else:
-                                values.append(str(value))
-                        values_list.append(f"({', '.join(values)})")
-                    
-                    if values_list:
-                        insert_sql = f"INSERT INTO `{table_name}` ({column_list}) VALUES\n"
-                        insert_sql += ',\n'.join(values_list) + ';'
-                        statements.append(insert_sql)
+            column_info = self.get_columns(table_name, db)
+            if not column_info:
+                return
+            
+            columns = [name for name, _ in column_info]
+            data_types = [data_type for _, data_type in column_info]
+            formatter = ValueFormatter(data_types, self.binary_encoding)
+            column_list = ', '.join([f"`{col}`" for col in columns])
+            insert_head = f"INSERT INTO `{table_name}` ({column_list}) VALUES\n"
+            
+            fetch_size = self.LOB_FETCH_ROWS if formatter.lob_columns else None
+            rows = self.iter_table_rows(table_name, db, chunk, limit, fetch_size, self.passthrough, timings)
+            batches = self.iter_row_batches(rows, formatter)
+            for batch, statements in self.iter_formatted_batches(insert_head, formatter, data_types, batches):
+                for statement in statements:
+                    # 加1为写出时附加的换行
+                    if isinstance(statement, str):
+                        size += (len(statement) if statement.isascii() else len(statement.encode('utf-8', 'surrogateescape'))) + 1
+                    else:
+                        size += len(statement) + 1
+                    suspended = time.monotonic()
+                    yield statement
+                    timings['write'] += time.monotonic() - suspended
                 
+                stats['rows'] += len(batch)
+                if chunk is not None:
+                    stats['last_key'] = chunk[0].key_of(batch[-1], columns)
+        
         except pymysql.Error as e:
             logging.error(f"导出表数据失败 ({table_name}): {e}")
+            stats['error'] = str(e)
+        finally:
+            elapsed = time.monotonic() - started
+            timings['format'] = max(0.0, elapsed - timings['query'] - timings['fetch'] - timings['write'])
+            self.metrics.add_table(table_name, timings, stats['rows'], size)
+    
+    def iter_formatted_batches(self, insert_head: str, formatter: ValueFormatter, data_types: List[str],
+                               batches: Iterator[List[Tuple]]) -> Iterator[Tuple[List[Tuple], Iterable[Union[str, bytes]]]]:
+        """为每批行生成INSERT语句，返回(这批行, 语句)
+        
+        启用格式化进程池时，各批行提交给进程池并行格式化，每批得到一个已编码的字节块
+        (多条语句以换行分隔)，按提交顺序取回，写出的内容与在本进程中格式化完全相同。
+        最多有format_workers * 2批在排队，读取数据库与格式化同时进行，内存占用有上限。
+        """
+        if self.format_pool is None:
+            for batch in batches:
+                yield batch, formatter.iter_insert_statements(insert_head, batch)
+            return
         
+        pending: deque = deque()
+        for batch in batches:
+            pending.append((batch, self.format_pool.submit(encode_insert_block, insert_head, data_types,
+                                                           self.binary_encoding, batch)))
+            if len(pending) > self.format_workers * 2:
+                batch, future = pending.popleft()
+                yield batch, [future.result()]
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, [future.result()]
+    
+    def start_format_pool(self):
+        """format_workers大于0时启动格式化INSERT语句的进程池
+        
+        用spawn方式创建子进程：此时可能已有压缩线程和导出线程在运行，fork会把它们
+        持有的锁一起复制到子进程中。
+        """
+        if self.format_workers and self.format_pool is None:
+            self.format_pool = ProcessPoolExecutor(max_workers=self.format_workers,
+                                                   mp_context=multiprocessing.get_context('spawn'))
+    
+    def stop_format_pool(self):
+        """关闭格式化进程池，取消尚未开始的任务"""
+        if self.format_pool is not None:
+            self.format_pool.shutdown(cancel_futures=True)
+            self.format_pool = None
+    
+    def export_table_data(self, table_name: str) -> List[Union[str, bytes]]:
+        """导出表数据"""
+        stats: Dict[str, Any] = {}
+        statements = list(self.iter_table_data(table_name, stats=stats))
+        self.check_data_error(table_name, stats)
         return statements
     
+    def load_chunker(self, table_name: str) -> Optional['TableChunker']:
+        """未启用分块或表没有可用的主键/唯一键时返回None，即整表作为一个块导出"""
+        if not self.chunk_size:
+            return None
+        try:
+            chunker = TableChunker.load(self.source_db, table_name, self.chunk_size)
+            if chunker is None:
+                logging.debug(f"表 {table_name} 没有可用于分块的主键/唯一键，整表导出")
+            return chunker
+        except pymysql.Error as e:
+            logging.warning(f"表分块失败 ({table_name})，整表导出: {e}")
+            return None
+    
+    def check_data_error(self, table_name: str, stats: Dict[str, Any]):
+        """数据块读取出错时直接中止导出
+        
+        出错前生成的语句已经写出，继续导出会在文件中留下只有一部分数据的表，而且
+        导出仍然显示成功；启用断点续传时出错的块也不能记为完成。
+        """
+        if not stats.get('error'):
+            return
+        if self.checkpoint is not None:
+            raise RuntimeError(f"导出表数据中断 ({table_name})，可使用 --resume 从断点继续")
+        raise RuntimeError(f"导出表数据失败 ({table_name}): {stats['error']}")
+    
+    def export_table_data_serial(self, table_name: str):
+        """串行导出一个表的数据段，每个键区间块作为一个断点单元"""
+        if self.is_done(f"data:{table_name}") or self.copy_previous_data(table_name):
+            return
+        
+        done = self.checkpoint.table_chunks(table_name) if self.checkpoint else []
+        has_data = any(entry['rows'] for entry in done)
+        complete = bool(done) and done[-1]['complete']
+        lower = ExportCheckpoint.decode_key(done[-1]['upper']) if done else None
+        chunker = None if complete else self.load_chunker(table_name)
+        index = len(done)
+        
+        while not complete:
+            chunk = (chunker, lower, None) if chunker else None
+            stats: Dict[str, Any] = {}
+            self.begin_unit()
+            for insert_sql in self.iter_table_data(table_name, None, chunk,
+                                                   self.chunk_size if chunker else None, stats):
+                if not has_data:
+                    self.emit(f"-- 数据: {table_name}")
+                    has_data = True
+                self.emit(insert_sql)
+            self.check_data_error(table_name, stats)
+            
+            complete = chunker is None or stats['rows'] < self.chunk_size
+            self.end_unit(f"data:{table_name}:{index}", table=table_name, chunk=index,
+                          rows=stats['rows'], upper=ExportCheckpoint.encode_key(stats['last_key']),
+                          complete=complete)
+            lower = stats['last_key']
+            index += 1
+        
+        self.begin_unit()
+        if has_data:
+            self.emit("")
+        self.end_unit(f"data:{table_name}")
+    
+    def plan_table_chunks(self, table_name: str, lower: Optional[Tuple] = None) -> List[Optional[Tuple['TableChunker', Optional[Tuple], Optional[Tuple]]]]:
+        """将表中键大于lower的部分切分为可独立导出的键区间，不分块时整表作为一个任务"""
+        chunker = self.load_chunker(table_name)
+        if chunker is None:
+            return [None]
+        try:
+            return [(chunker, start, end) for start, end in chunker.split(self.source_db, lower)]
+        except pymysql.Error as e:
+            logging.warning(f"表分块失败 ({table_name})，按单个区间导出: {e}")
+            return [(chunker, lower, None)]
+    
+    def dump_chunk_to_file(self, pool: ConnectionPool, table_name: str,
+                           chunk: Optional[Tuple['TableChunker', Optional[Tuple], Optional[Tuple]]],
+                           filename: str) -> Dict[str, Any]:
+        """从连接池取一个连接，将一个表(或表的一个键区间)的INSERT语句写入单独的临时文件"""
+        stats: Dict[str, Any] = {}
+        db = pool.acquire()
+        try:
+            with FileSink(filename) as sink:
+                for insert_sql in self.iter_table_data(table_name, db, chunk, stats=stats):
+                    sink.write(insert_sql)
+        finally:
+            pool.release(db)
+        return stats
+    
+    def plan_parallel_tasks(self, tables: List[str]) -> Iterator[Tuple[Dict[str, Any], Optional[int], Any]]:
+        """按表顺序生成并行导出的任务，每个表在轮到它提交时才规划分块
+        
+        每个表先生成各个块 (表状态, 块序号, 键区间)，最后生成块序号为None的结束标记；
+        已完成或可以从上次导出文件复制的表只生成结束标记。同一个表的任务共用一个表状态。
+        """
+        for table_index, table in enumerate(tables):
+            if self.is_done(f"data:{table}") or self.can_reuse(table):
+                yield {'table': table, 'index': table_index, 'skip': True}, None, None
+                continue
+            
+            done = self.checkpoint.table_chunks(table) if self.checkpoint else []
+            if done and done[-1]['complete']:
+                chunks = []
+            else:
+                lower = ExportCheckpoint.decode_key(done[-1]['upper']) if done else None
+                chunks = self.plan_table_chunks(table, lower)
+            
+            state = {'table': table, 'index': table_index, 'skip': False,
+                     'has_data': any(entry['rows'] for entry in done)}
+            for chunk_index, chunk in enumerate(chunks, start=len(done)):
+                yield state, chunk_index, chunk
+            yield state, None, None
+    
+    def export_data_parallel(self, tables: List[str], on_table_done: Callable[[], None]):
+        """使用连接池并行导出各表数据
+        
+        每个表(启用分块时为表的每个键区间)写入自己的临时文件，然后按原有的
+        表顺序依次拼接到输出端，保证输出内容与串行导出一致。同时在途的块最多为
+        连接数的两倍，最早提交的块完成后立即拼接，临时文件和分块规划不会堆积。
+        """
+        pool = ConnectionPool(self.source_db, self.jobs)
+        temp_dir = tempfile.mkdtemp(prefix='db_exp_', dir=self.temp_dir)
+        executor = None
+        try:
+            if not pool.open():
+                raise RuntimeError("无法创建并行导出连接池")
+            
+            executor = ThreadPoolExecutor(max_workers=pool.size)
+            target = self.sink if self.sink is not None else ListSink(self.sql_statements)
+            pending: deque = deque()
+            
+            def stitch_next():
+                state, chunk_index, chunk, future, filename = pending.popleft()
+                table = state['table']
+                if chunk_index is None:
+                    if state['skip']:
+                        if not self.is_done(f"data:{table}"):
+                            self.copy_previous_data(table)
+                    else:
+                        self.begin_unit()
+                        if state['has_data']:
+                            target.write("")
+                        self.end_unit(f"data:{table}")
+                    on_table_done()
+                    return
+                
+                stats = future.result()
+                self.check_data_error(table, stats)
+                self.begin_unit()
+                if stats['rows']:
+                    if not state['has_data']:
+                        target.write(f"-- 数据: {table}")
+                        state['has_data'] = True
+                    target.append_file(filename)
+                os.remove(filename)
+                upper = chunk[2] if chunk is not None else None
+                self.end_unit(f"data:{table}:{chunk_index}", table=table, chunk=chunk_index,
+                              rows=stats['rows'], upper=ExportCheckpoint.encode_key(upper),
+                              complete=upper is None)
+            
+            for state, chunk_index, chunk in self.plan_parallel_tasks(tables):
+                future = filename = None
+                if chunk_index is not None:
+                    filename = os.path.join(temp_dir, f"{state['index']:06d}_{chunk_index:06d}.sql")
+                    future = executor.submit(self.dump_chunk_to_file, pool, state['table'], chunk, filename)
+                pending.append((state, chunk_index, chunk, future, filename))
+                while len(pending) >= 2 * pool.size:
+                    stitch_next()
+            while pending:
+                stitch_next()
+        finally:
+            if executor is not None:
+                # 出错时取消尚未开始的块，等待正在导出的块结束后再删除临时目录
+                executor.shutdown(cancel_futures=True)
+            pool.close()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def collect_table_states(self) -> Dict[str, Dict[str, Any]]:
+        """读取各表的数据状态，并加上表结构的摘要，写入元数据供下次增量导出对比"""
+        states = self.discovery.get_table_states(self.checksum)
+        for table_name, state in states.items():
+            create_sql = self.catalog.get_definition('tables', table_name)
+            state['ddl'] = hashlib.sha256(create_sql.encode('utf-8')).hexdigest() if create_sql else None
+        return states
+    
+    @staticmethod
+    def table_unchanged(state: Dict[str, Any], previous: Dict[str, Any]) -> bool:
+        """对比表的当前状态和上次导出时的状态，判断表结构和数据是否都没有变化
+        
+        UPDATE_TIME不同说明有过写入；两边都有校验和时以CHECKSUM TABLE为准；缺少校验和时
+        只能依据UPDATE_TIME(重启后可能为NULL)和行数估计判断。
+        """
+        if not state.get('ddl') or state['ddl'] != previous.get('ddl'):
+            return False
+        if state['update_time'] and previous.get('update_time') and state['update_time'] != previous['update_time']:
+            return False
+        if state['checksum'] is not None and previous.get('checksum') is not None:
+            return state['checksum'] == previous['checksum']
+        return (state['update_time'] is not None and state['update_time'] == previous.get('update_time')
+                and state['rows'] == previous.get('rows'))
+    
+    def previous_data_parts(self, table_name: str) -> List[Dict[str, Any]]:
+        """上次导出文件中一个表数据段的各个单元，不完整或不连续时返回空列表"""
+        parts = [entry for entry in self.since.get('parts', [])
+                 if entry.get('table') == table_name and 'chunk' in entry]
+        parts += [entry for entry in self.since.get('parts', []) if entry['key'] == f"data:{table_name}"]
+        if len(parts) < 2 or not parts[-2].get('complete'):
+            return []
+        for previous, current in zip(parts, parts[1:]):
+            if previous['end'] != current['start']:
+                return []
+        return parts
+    
+    def plan_reuse(self, tables: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """对比上次导出的元数据，找出数据未变化、可以直接从上次导出文件复制的表
+        
+        上次导出文件中对应的字节区间会先逐个校验CRC32，校验失败的表照常导出。影响输出
+        内容的选项与上次不一致时(与 --resume 的检查相同)，所有表照常导出。
+        """
+        previous_output = self.since.get('output')
+        previous_tables = self.since.get('tables', {})
+        reused: Dict[str, List[Dict[str, Any]]] = {}
+        if self.since.get('options') != self.checkpoint_options():
+            logging.warning("导出选项与上次导出的元数据中记录的不一致，所有表照常导出")
+            return reused
+        if not previous_output or not os.path.exists(previous_output):
+            logging.warning(f"找不到上次的导出文件 {previous_output}，所有表照常导出")
+            return reused
+        
+        try:
+            with DumpReader(previous_output) as f:
+                for table in tables:
+                    state = self.table_states.get(table)
+                    previous = previous_tables.get(table)
+                    if not state or not previous or not self.table_unchanged(state, previous):
+                        continue
+                    parts = self.previous_data_parts(table)
+                    if not parts:
+                        continue
+                    f.seek(parts[0]['start'])
+                    if all(ExportCheckpoint.check_range(f, entry) for entry in parts):
+                        reused[table] = parts
+                    else:
+                        logging.warning(f"上次导出文件中表 {table} 的数据校验失败，重新导出")
+        except (IOError, EOFError, zlib.error) as e:
+            logging.warning(f"读取上次的导出文件失败，所有表照常导出: {e}")
+            return {}
+        
+        logging.info(f"增量导出: {len(reused)}/{len(tables)} 个表未变化，从 {previous_output} 复制")
+        return reused
+    
+    def can_reuse(self, table_name: str) -> bool:
+        """表可以从上次导出文件复制，且本次导出尚未写出该表的任何数据块"""
+        return table_name in self.reused and not (self.checkpoint and self.checkpoint.table_chunks(table_name))
+    
+    def copy_previous_data(self, table_name: str) -> bool:
+        """把未变化的表的数据段从上次导出文件原样复制过来，每个单元照原样记入断点清单"""
+        if not self.can_reuse(table_name):
+            return False
+        
+        if self.previous_reader is None:
+            self.previous_reader = DumpReader(self.since['output'])
+        for entry in self.reused[table_name]:
+            if self.is_done(entry['key']):
+                continue
+            self.begin_unit()
+            self.sink.append_range(self.previous_reader, entry['start'], entry['end'])
+            extra = {key: value for key, value in entry.items() if key not in ('key', 'start', 'end', 'crc32')}
+            self.end_unit(entry['key'], **extra)
+        logging.debug(f"表 {table_name} 未变化，已从上次导出文件复制")
+        return True
+    
     def export_view(self, view_name: str) -> Optional[str]:
         """导出视图"""
+        if self.catalog is not None:
+            create_statement = self.catalog.get_definition('views', view_name)
+            if create_statement is not None:
+                return create_statement
+        
         try:
             with self.source_db.connection.cursor() as cursor:
                 cursor.execute(f"SHOW CREATE VIEW `{view_name}`")
@@ -279,6 +1809,11 @@ class DatabaseExporter:
     
     def export_procedure(self, proc_name: str) -> Optional[str]:
         """导出存储过程"""
+        if self.catalog is not None:
+            create_statement = self.catalog.get_definition('procedures', proc_name)
+            if create_statement is not None:
+                return create_statement
+        
         try:
             with self.source_db.connection.cursor() as cursor:
                 cursor.execute(f"SHOW CREATE PROCEDURE `{proc_name}`")
@@ -300,6 +1835,11 @@ class DatabaseExporter:
     
     def export_function(self, func_name: str) -> Optional[str]:
         """导出函数"""
+        if self.catalog is not None:
+            create_statement = self.catalog.get_definition('functions', func_name)
+            if create_statement is not None:
+                return create_statement
+        
         try:
             with self.source_db.connection.cursor() as cursor:
                 cursor.execute(f"SHOW CREATE FUNCTION `{func_name}`")
@@ -321,6 +1861,11 @@ class DatabaseExporter:
     
     def export_trigger(self, trigger_name: str) -> Optional[str]:
         """导出触发器"""
+        if self.catalog is not None:
+            create_statement = self.catalog.get_definition('triggers', trigger_name)
+            if create_statement is not None:
+                return create_statement
+        
         try:
             with self.source_db.connection.cursor() as cursor:
                 cursor.execute(f"SHOW CREATE TRIGGER `{trigger_name}`")
@@ -342,6 +1887,11 @@ class DatabaseExporter:
     
     def export_event(self, event_name: str) -> Optional[str]:
         """导出事件"""
+        if self.catalog is not None:
+            create_statement = self.catalog.get_definition('events', event_name)
+            if create_statement is not None:
+                return create_statement
+        
         try:
             with self.source_db.connection.cursor() as cursor:
                 cursor.execute(f"SHOW CREATE EVENT `{event_name}`")
@@ -361,6 +1911,38 @@ class DatabaseExporter:
             logging.error(f"导出事件失败 ({event_name}): {e}")
             return None
     
+    def event_time_zone(self, event_name: str) -> Optional[str]:
+        """事件的时区(AT/STARTS/ENDS按这个时区解释)，取不到时返回None"""
+        if self.catalog is not None:
+            time_zone = self.catalog.get_definition('event_time_zones', event_name)
+            if time_zone is not None:
+                return time_zone
+        
+        try:
+            with self.source_db.connection.cursor() as cursor:
+                cursor.execute(f"SHOW CREATE EVENT `{event_name}`")
+                result = cursor.fetchone()
+                return result[2] if result and len(result) > 3 else None
+        except pymysql.Error as e:
+            logging.warning(f"读取事件时区失败 ({event_name}): {e}")
+            return None
+    
+    def export_event_statements(self, event_name: str) -> Optional[List[str]]:
+        """事件的CREATE语句，前后加上切换和恢复会话时区的SET语句(与mysqldump相同)
+        
+        不切换时区时，导入后的调度时间会按导入会话的时区重新解释。
+        """
+        create_statement = self.export_event(event_name)
+        if not create_statement:
+            return None
+        time_zone = self.event_time_zone(event_name)
+        if time_zone is None:
+            return [create_statement]
+        quoted = DatabaseObjectDiscovery.quote_string(time_zone)
+        return [f"SET @saved_time_zone = @@time_zone, time_zone = {quoted}",
+                create_statement,
+                "SET time_zone = @saved_time_zone"]
+    
     def export_users_and_privileges(self) -> List[str]:
         """导出用户和权限"""
         statements = []
@@ -385,14 +1967,135 @@ class DatabaseExporter:
                     except pymysql.Error:
                         # 某些用户可能无法查看权限
                         pass
-                        
+        
         except pymysql.Error as e:
             logging.warning(f"导出用户权限失败: {e}")
         
         return statements
     
-    def export_database(self) -> bool:
-        """导出整个数据库"""
+    def is_done(self, key: str) -> bool:
+        """导出单元是否已在断点清单中记录为完成"""
+        return self.checkpoint is not None and self.checkpoint.is_done(key)
+    
+    def begin_unit(self):
+        """开始一个导出单元，记录其在输出文件中的起始位置"""
+        if self.checkpoint is not None:
+            self.sink.flush()
+            self.unit_start = self.sink.bytes_written
+            self.sink.crc32 = 0
+    
+    def end_unit(self, key: str, **extra):
+        """结束一个导出单元：刷新输出，并把字节区间和校验值记入断点清单"""
+        self.flush()
+        if self.checkpoint is not None:
+            self.checkpoint.record(key, self.unit_start, self.sink.bytes_written,
+                                   self.sink.crc32, **extra)
+    
+    def run_unit(self, key: str, write: Callable[[], None]):
+        """执行一个可断点续传的导出单元，断点清单中已完成的单元直接跳过"""
+        if self.is_done(key):
+            return
+        self.begin_unit()
+        write()
+        self.end_unit(key)
+    
+    def write_header(self):
+        """写出文件头"""
+        self.emit(f"-- MySQL数据库完整导出")
+        self.emit(f"-- 数据库: {self.source_db.database}")
+        self.emit(f"-- 导出时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self.emit("")
+        self.emit("SET FOREIGN_KEY_CHECKS=0;")
+        self.emit("SET SQL_MODE='NO_AUTO_VALUE_ON_ZERO';")
+        self.emit("SET AUTOCOMMIT=0;")
+        self.emit("START TRANSACTION;")
+        self.emit("")
+    
+    def write_footer(self):
+        """写出文件尾"""
+        self.emit("COMMIT;")
+        self.emit("SET FOREIGN_KEY_CHECKS=1;")
+    
+    def write_section_header(self, title: str, use_delimiter: bool = False):
+        """写出分段标题，存储过程等对象需要切换语句分隔符"""
+        self.emit("-- ----------------------------------------")
+        self.emit(f"-- {title}")
+        self.emit("-- ----------------------------------------")
+        if use_delimiter:
+            self.emit("DELIMITER $$")
+        self.emit("")
+    
+    def write_delimiter_reset(self):
+        """恢复默认的语句分隔符"""
+        self.emit("DELIMITER ;")
+        self.emit("")
+    
+    def write_object(self, label: str, keyword: str, name: str,
+                     create_sql: Optional[Union[str, List[str]]], delimiter: str):
+        """写出一个对象的DROP和CREATE语句，create_sql为列表时依次写出其中的各条语句"""
+        if create_sql:
+            self.emit(f"-- {label}: {name}")
+            self.emit(f"DROP {keyword} IF EXISTS `{name}`{delimiter}")
+            for statement in ([create_sql] if isinstance(create_sql, str) else create_sql):
+                self.emit(statement + delimiter)
+            self.emit("")
+    
+    def write_deferred_indexes(self, tables: List[str]):
+        """写出延后创建的二级索引，每个表合并成一条ALTER TABLE"""
+        deferred = {}
+        for table in tables:
+            create_statement = self.export_table_structure(table)
+            if create_statement:
+                _, indexes = SecondaryIndexes.split(create_statement)
+                if indexes:
+                    deferred[table] = indexes
+        if not deferred:
+            return
+        
+        self.run_unit('section:indexes', lambda: self.write_section_header("索引"))
+        for table, indexes in deferred.items():
+            self.run_unit(f"indexes:{table}", lambda: self.write_statements(
+                f"-- 索引: {table}", SecondaryIndexes.alter_statements(table, indexes)))
+    
+    def write_statements(self, comment: str, statements: List[str]):
+        """写出一组带注释的语句"""
+        self.emit(comment)
+        for statement in statements:
+            self.emit(statement + ";")
+        self.emit("")
+    
+    def write_users(self):
+        """写出用户权限"""
+        user_statements = self.export_users_and_privileges()
+        if user_statements:
+            self.write_section_header("用户权限")
+            for statement in user_statements:
+                self.emit(statement)
+            self.emit("")
+    
+    def checkpoint_options(self) -> Dict[str, Any]:
+        """影响输出内容的导出选项，续传时必须与中断前一致"""
+        return {
+            'database': self.source_db.database,
+            'include_data': self.include_data,
+            'include_users': self.include_users,
+            'batch_size': self.batch_size,
+            'chunk_size': self.chunk_size,
+            'defer_indexes': self.defer_indexes,
+            'binary_encoding': self.binary_encoding,
+            'passthrough': self.passthrough
+        }
+    
+    def export_database(self, sink: Optional['SqlSink'] = None,
+                        checkpoint: Optional[ExportCheckpoint] = None) -> bool:
+        """导出整个数据库
+        
+        指定sink时语句边生成边写出，不在内存中保留；否则收集到self.sql_statements。
+        指定checkpoint(需配合FileSink)时记录每个完成的单元，并跳过其中已完成的单元。
+        """
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.metrics = ExportMetrics()
         if not self.source_db.connect():
             logging.error("无法连接到源数据库")
             return False
@@ -404,8 +2107,9 @@ class DatabaseExporter:
                 self.source_db.database
             )
             
-            # 获取所有对象
-            all_objects = self.discovery.get_all_objects()
+            # 构建对象目录快照，之后各阶段都从快照读取
+            self.catalog = self.load_schema()
+            all_objects = self.catalog.objects
             
             # 统计对象数量
             total_objects = sum(len(objs) for objs in all_objects.values())
@@ -425,189 +2129,372 @@ class DatabaseExporter:
                 progress_bar = tqdm(total=total_objects, desc="导出进度", unit="对象")
             
             # 添加文件头
-            self.sql_statements.append(f"-- MySQL数据库完整导出")
-            self.sql_statements.append(f"-- 数据库: {self.source_db.database}")
-            self.sql_statements.append(f"-- 导出时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            self.sql_statements.append("")
-            self.sql_statements.append("SET FOREIGN_KEY_CHECKS=0;")
-            self.sql_statements.append("SET SQL_MODE='NO_AUTO_VALUE_ON_ZERO';")
-            self.sql_statements.append("SET AUTOCOMMIT=0;")
-            self.sql_statements.append("START TRANSACTION;")
-            self.sql_statements.append("")
+            self.run_unit('header', self.write_header)
             
             # 导出表结构
             if all_objects['tables']:
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("-- 表结构")
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("")
+                self.run_unit('section:tables', lambda: self.write_section_header("表结构"))
                 
                 for table in all_objects['tables']:
-                    create_sql = self.export_table_structure(table)
-                    if create_sql:
-                        self.sql_statements.append(f"-- 表: {table}")
-                        self.sql_statements.append(f"DROP TABLE IF EXISTS `{table}`;")
-                        self.sql_statements.append(create_sql + ";")
-                        self.sql_statements.append("")
+                    self.run_unit(f"tables:{table}", lambda: self.write_object(
+                        "表", "TABLE", table, self.export_table_definition(table), ";"))
                     
                     if self.show_progress:
                         progress_bar.update(1)
             
-            # 导出表数据
+            # 导出表数据，增量导出时未变化的表直接从上次导出文件复制
             if self.include_data and all_objects['tables']:
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("-- 数据")
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("")
+                self.table_states = self.collect_table_states()
+                if self.since is not None:
+                    self.reused = self.plan_reuse(all_objects['tables'])
                 
-                for table in all_objects['tables']:
-                    data_statements = self.export_table_data(table)
-                    if data_statements:
-                        self.sql_statements.append(f"-- 数据: {table}")
-                        self.sql_statements.extend(data_statements)
-                        self.sql_statements.append("")
-                    
-                    if self.show_progress:
-                        progress_bar.update(1)
-            
-            # 导出视图
-            if all_objects['views']:
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("-- 视图")
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("")
+                self.run_unit('section:data', lambda: self.write_section_header("数据"))
+                self.start_format_pool()
                 
-                for view in all_objects['views']:
-                    create_sql = self.export_view(view)
-                    if create_sql:
-                        self.sql_statements.append(f"-- 视图: {view}")
-                        self.sql_statements.append(f"DROP VIEW IF EXISTS `{view}`;")
-                        self.sql_statements.append(create_sql + ";")
-                        self.sql_statements.append("")
-                    
-                    if self.show_progress:
-                        progress_bar.update(1)
+                if self.jobs > 1:
+                    self.export_data_parallel(
+                        all_objects['tables'],
+                        lambda: progress_bar.update(1) if self.show_progress else None
+                    )
+                else:
+                    for table in all_objects['tables']:
+                        self.export_table_data_serial(table)
+                        
+                        if self.show_progress:
+                            progress_bar.update(1)
+                self.stop_format_pool()
             
-            # 导出存储过程
-            if all_objects['procedures']:
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("-- 存储过程")
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("DELIMITER $$")
-                self.sql_statements.append("")
-                
-                for proc in all_objects['procedures']:
-                    create_sql = self.export_procedure(proc)
-                    if create_sql:
-                        self.sql_statements.append(f"-- 存储过程: {proc}")
-                        self.sql_statements.append(f"DROP PROCEDURE IF EXISTS `{proc}`$$")
-                        self.sql_statements.append(create_sql + "$$")
-                        self.sql_statements.append("")
-                    
-                    if self.show_progress:
-                        progress_bar.update(1)
-                
-                self.sql_statements.append("DELIMITER ;")
-                self.sql_statements.append("")
-            
-            # 导出函数
-            if all_objects['functions']:
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("-- 函数")
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("DELIMITER $$")
-                self.sql_statements.append("")
-                
-                for func in all_objects['functions']:
-                    create_sql = self.export_function(func)
-                    if create_sql:
-                        self.sql_statements.append(f"-- 函数: {func}")
-                        self.sql_statements.append(f"DROP FUNCTION IF EXISTS `{func}`$$")
-                        self.sql_statements.append(create_sql + "$$")
-                        self.sql_statements.append("")
-                    
-                    if self.show_progress:
-                        progress_bar.update(1)
+            # 数据之后创建延后的二级索引
+            if self.defer_indexes and all_objects['tables']:
+                self.write_deferred_indexes(all_objects['tables'])
+            
+            # 导出视图、存储过程、函数、触发器、事件
+            sections = [
+                ('views', "视图", "VIEW", self.export_view, False),
+                ('procedures', "存储过程", "PROCEDURE", self.export_procedure, True),
+                ('functions', "函数", "FUNCTION", self.export_function, True),
+                ('triggers', "触发器", "TRIGGER", self.export_trigger, True),
+                ('events', "事件", "EVENT", self.export_event_statements, True),
+            ]
+            for kind, label, keyword, export_func, use_delimiter in sections:
+                if not all_objects[kind]:
+                    continue
                 
-                self.sql_statements.append("DELIMITER ;")
-                self.sql_statements.append("")
-            
-            # 导出触发器
-            if all_objects['triggers']:
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("-- 触发器")
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("DELIMITER $$")
-                self.sql_statements.append("")
+                delimiter = "$$" if use_delimiter else ";"
+                self.run_unit(f"section:{kind}", lambda: self.write_section_header(label, use_delimiter))
                 
-                for trigger in all_objects['triggers']:
-                    create_sql = self.export_trigger(trigger)
-                    if create_sql:
-                        self.sql_statements.append(f"-- 触发器: {trigger}")
-                        self.sql_statements.append(f"DROP TRIGGER IF EXISTS `{trigger}`$$")
-                        self.sql_statements.append(create_sql + "$$")
-                        self.sql_statements.append("")
+                for name in all_objects[kind]:
+                    self.run_unit(f"{kind}:{name}", lambda: self.write_object(
+                        label, keyword, name, export_func(name), delimiter))
                     
                     if self.show_progress:
                         progress_bar.update(1)
                 
-                self.sql_statements.append("DELIMITER ;")
-                self.sql_statements.append("")
-            
-            # 导出事件
-            if all_objects['events']:
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("-- 事件")
-                self.sql_statements.append("-- ----------------------------------------")
-                self.sql_statements.append("DELIMITER $$")
-                self.sql_statements.append("")
-                
-                for event in all_objects['events']:
-                    create_sql = self.export_event(event)
-                    if create_sql:
-                        self.sql_statements.append(f"-- 事件: {event}")
-                        self.sql_statements.append(f"DROP EVENT IF EXISTS `{event}`$$")
-                        self.sql_statements.append(create_sql + "$$")
-                        self.sql_statements.append("")
-                    
+                if use_delimiter:
+                    self.run_unit(f"section:{kind}:end", self.write_delimiter_reset)
+            
+            # 导出用户权限
+            if self.include_users:
+                self.run_unit('users', self.write_users)
+            
+            # 添加文件尾
+            self.run_unit('footer', self.write_footer)
+            
+            if self.show_progress:
+                progress_bar.close()
+            
+            return True
+        
+        except Exception as e:
+            logging.error(f"导出过程中发生错误: {e}")
+            return False
+        finally:
+            self.stop_format_pool()
+            self.metrics.finish()
+            self.source_db.close()
+            if self.previous_reader is not None:
+                self.previous_reader.close()
+                self.previous_reader = None
+    
+    @staticmethod
+    def find_references(create_sql: Optional[str], pattern: str, candidates: List[str],
+                        exclude: Optional[str] = None) -> List[str]:
+        """从CREATE语句中找出引用的对象名，只保留candidates中存在的对象"""
+        if not create_sql:
+            return []
+        known = set(candidates)
+        names = []
+        for match in re.finditer(pattern, create_sql):
+            name = match.group(1).replace('``', '`')
+            if name in known and name != exclude and name not in names:
+                names.append(name)
+        return names
+    
+    @staticmethod
+    def sort_by_dependencies(names: List[str], depends_on: Dict[str, List[str]]) -> List[str]:
+        """按依赖关系排序，被依赖的对象在前；没有依赖关系的对象保持原有顺序"""
+        ordered: List[str] = []
+        visiting = set()
+        members = set(names)
+        
+        def visit(name: str):
+            if name in ordered or name in visiting or name not in members:
+                return
+            visiting.add(name)
+            for dependency in depends_on.get(name, []):
+                visit(dependency)
+            visiting.discard(name)
+            ordered.append(name)
+        
+        for name in names:
+            visit(name)
+        return ordered
+    
+    def object_dependencies(self, kind: str, name: str, create_sql: Optional[Union[str, List[str]]]) -> List[str]:
+        """对象依赖的表或视图：表的外键引用表、视图引用的表和视图、触发器所在的表"""
+        tables = self.catalog.objects['tables']
+        identifier = r'`((?:[^`]|``)+)`'
+        if kind == 'tables':
+            return self.find_references(create_sql, r'REFERENCES\s+' + identifier, tables, exclude=name)
+        if kind == 'views':
+            # SHOW CREATE VIEW中引用的表和视图都带有库名限定
+            database = re.escape(self.source_db.database.replace('`', '``'))
+            return self.find_references(create_sql, rf'`{database}`\.' + identifier,
+                                        list(tables) + list(self.catalog.objects['views']), exclude=name)
+        if kind == 'triggers':
+            return self.find_references(create_sql, r'\bON\s+' + identifier, tables)[:1]
+        return []
+    
+    def write_object_file(self, directory: DumpDirectory, kind: str, label: str, keyword: str,
+                          name: str, create_sql: Optional[Union[str, List[str]]],
+                          use_delimiter: bool) -> Optional[str]:
+        """把一个对象的DROP和CREATE语句写入单独的结构文件，返回文件名"""
+        if not create_sql:
+            return None
+        filename = directory.schema_file(kind, name)
+        with directory.open_file(filename) as sink:
+            self.sink = sink
+            try:
+                self.emit("SET FOREIGN_KEY_CHECKS=0;")
+                if use_delimiter:
+                    self.emit("DELIMITER $$")
+                self.write_object(label, keyword, name, create_sql, "$$" if use_delimiter else ";")
+                if use_delimiter:
+                    self.emit("DELIMITER ;")
+            finally:
+                self.sink = None
+        return filename
+    
+    def dump_data_file(self, pool: ConnectionPool, directory: DumpDirectory, table_name: str,
+                       chunk: Optional[Tuple['TableChunker', Optional[Tuple], Optional[Tuple]]],
+                       index: int) -> Optional[Dict[str, Any]]:
+        """从连接池取一个连接，把一个表(或表的一个键区间)的数据写入单独的数据文件
+        
+        返回文件名、行数、解压后的字节数和CRC32；没有数据时删除文件并返回None。
+        """
+        if directory.data_format != 'sql':
+            return self.dump_rows_file(pool, directory, table_name, chunk, index)
+        
+        stats: Dict[str, Any] = {}
+        filename = directory.data_file(table_name, index)
+        db = pool.acquire()
+        try:
+            with directory.open_file(filename) as sink:
+                sink.write(f"-- 数据: {table_name}")
+                sink.write("SET FOREIGN_KEY_CHECKS=0;")
+                sink.write("SET SQL_MODE='NO_AUTO_VALUE_ON_ZERO';")
+                for insert_sql in self.iter_table_data(table_name, db, chunk, stats=stats):
+                    sink.write(insert_sql)
+        finally:
+            pool.release(db)
+        
+        if stats.get('error'):
+            raise RuntimeError(f"导出表数据失败 ({table_name}): {stats['error']}")
+        if not stats['rows']:
+            directory.remove_file(filename)
+            return None
+        return {'file': filename, 'rows': stats['rows'], 'bytes': sink.bytes_written, 'crc32': sink.crc32}
+    
+    def dump_rows_file(self, pool: ConnectionPool, directory: DumpDirectory, table_name: str,
+                       chunk: Optional[Tuple['TableChunker', Optional[Tuple], Optional[Tuple]]],
+                       index: int) -> Optional[Dict[str, Any]]:
+        """与dump_data_file相同，但把行写成TSV/CSV/JSON Lines/Parquet数据文件
+        
+        行从游标中逐批读出后直接交给写出器，不生成INSERT语句。Parquet文件记录的
+        字节数和CRC32按文件本身计算。写出器内的格式化和写文件一起计为write阶段耗时。
+        """
+        filename = directory.data_file(table_name, index)
+        timings = ExportMetrics.new_timings()
+        writer = None
+        db = pool.acquire()
+        try:
+            if directory.data_format == 'parquet':
+                columns = self.get_column_details(table_name, db)
+            else:
+                columns = [{'COLUMN_NAME': name, 'DATA_TYPE': data_type}
+                           for name, data_type in self.get_columns(table_name, db)]
+            writer = directory.open_row_writer(filename, columns)
+            try:
+                rows = self.iter_table_rows(table_name, db, chunk, timings=timings)
+                while True:
+                    batch = list(islice(rows, self.batch_size))
+                    if not batch:
+                        break
+                    started = time.monotonic()
+                    writer.write_rows(batch)
+                    timings['write'] += time.monotonic() - started
+            finally:
+                started = time.monotonic()
+                writer.close()
+                timings['write'] += time.monotonic() - started
+        except pymysql.Error as e:
+            raise RuntimeError(f"导出表数据失败 ({table_name}): {e}")
+        finally:
+            pool.release(db)
+            if writer is not None:
+                self.metrics.add_table(table_name, timings, writer.rows, writer.bytes_written)
+        
+        if not writer.rows:
+            directory.remove_file(filename)
+            return None
+        return {'file': filename, 'rows': writer.rows, 'bytes': writer.bytes_written, 'crc32': writer.crc32}
+    
+    def export_database_dir(self, directory: DumpDirectory) -> bool:
+        """以目录格式导出整个数据库
+        
+        表数据由连接池中的jobs个连接并行读取(处于同一个一致性快照中)，每个数据块
+        直接写入自己的数据文件，不再拼接；全部完成后写出manifest.json。
+        """
+        self.metrics = ExportMetrics()
+        if not self.source_db.connect():
+            logging.error("无法连接到源数据库")
+            return False
+        
+        pool = None
+        try:
+            os.makedirs(directory.path, exist_ok=True)
+            self.discovery = DatabaseObjectDiscovery(
+                self.source_db.connection,
+                self.source_db.database
+            )
+            self.catalog = self.load_schema()
+            all_objects = self.catalog.objects
+            tables = list(all_objects['tables'])
+            
+            total_objects = sum(len(objs) for objs in all_objects.values())
+            if self.show_progress:
+                progress_bar = tqdm(total=total_objects, desc="导出进度", unit="对象")
+            
+            if self.include_data and tables:
+                self.table_states = self.collect_table_states()
+            
+            # 表结构
+            table_entries: Dict[str, Dict[str, Any]] = {}
+            for table in tables:
+                create_sql = self.export_table_structure(table)
+                table_entries[table] = {
+                    'kind': 'tables',
+                    'name': table,
+                    'schema': self.write_object_file(directory, 'tables', "表", "TABLE", table, create_sql, False),
+                    'depends_on': self.object_dependencies('tables', table, create_sql)
+                }
+            
+            # 表数据：所有表的所有数据块一起提交给线程池
+            if self.include_data and tables:
+                pool = ConnectionPool(self.source_db, self.jobs)
+                if not pool.open():
+                    raise RuntimeError("无法创建并行导出连接池")
+                if directory.data_format == 'sql':
+                    self.start_format_pool()
+                with ThreadPoolExecutor(max_workers=pool.size) as executor:
+                    futures = {
+                        table: [executor.submit(self.dump_data_file, pool, directory, table, chunk, index)
+                                for index, chunk in enumerate(self.plan_table_chunks(table))]
+                        for table in tables
+                    }
+                    for table in tables:
+                        files = [future.result() for future in futures[table]]
+                        files = [entry for entry in files if entry is not None]
+                        table_entries[table].update(
+                            rows=sum(entry['rows'] for entry in files),
+                            data=files,
+                            state=self.table_states.get(table)
+                        )
+                        if self.show_progress:
+                            progress_bar.update(1)
+            elif self.show_progress:
+                progress_bar.update(len(tables))
+            
+            entries = list(table_entries.values())
+            
+            # 视图按依赖关系排序，其余对象照原有顺序
+            sections = [
+                ('views', "视图", "VIEW", self.export_view, False),
+                ('procedures', "存储过程", "PROCEDURE", self.export_procedure, True),
+                ('functions', "函数", "FUNCTION", self.export_function, True),
+                ('triggers', "触发器", "TRIGGER", self.export_trigger, True),
+                ('events', "事件", "EVENT", self.export_event_statements, True),
+            ]
+            for kind, label, keyword, export_func, use_delimiter in sections:
+                kind_entries = {}
+                for name in all_objects[kind]:
+                    create_sql = export_func(name)
+                    filename = self.write_object_file(directory, kind, label, keyword, name,
+                                                      create_sql, use_delimiter)
+                    if filename:
+                        kind_entries[name] = {
+                            'kind': kind,
+                            'name': name,
+                            'schema': filename,
+                            'depends_on': self.object_dependencies(kind, name, create_sql)
+                        }
                     if self.show_progress:
                         progress_bar.update(1)
                 
-                self.sql_statements.append("DELIMITER ;")
-                self.sql_statements.append("")
+                depends_on = {name: entry['depends_on'] for name, entry in kind_entries.items()}
+                for name in self.sort_by_dependencies(list(kind_entries), depends_on):
+                    entries.append(kind_entries[name])
             
-            # 导出用户权限
             if self.include_users:
                 user_statements = self.export_users_and_privileges()
                 if user_statements:
-                    self.sql_statements.append("-- ----------------------------------------")
-                    self.sql_statements.append("-- 用户权限")
-                    self.sql_statements.append("-- ----------------------------------------")
-                    self.sql_statements.append("")
-                    self.sql_statements.extend(user_statements)
-                    self.sql_statements.append("")
-            
-            # 添加文件尾
-            self.sql_statements.append("COMMIT;")
-            self.sql_statements.append("SET FOREIGN_KEY_CHECKS=1;")
+                    filename = 'users' + directory.suffix
+                    with directory.open_file(filename) as sink:
+                        for statement in user_statements:
+                            sink.write(statement)
+                    entries.append({'kind': 'users', 'name': 'users', 'schema': filename, 'depends_on': []})
             
             if self.show_progress:
                 progress_bar.close()
             
+            directory.save_manifest({
+                'format': DumpDirectory.FORMAT,
+                'version': DumpDirectory.VERSION,
+                'database': self.source_db.database,
+                'export_time': datetime.now().isoformat(),
+                'compression': directory.compression,
+                'data_format': directory.data_format,
+                'include_data': self.include_data,
+                'objects': entries
+            })
             return True
-            
+        
         except Exception as e:
             logging.error(f"导出过程中发生错误: {e}")
             return False
         finally:
+            self.stop_format_pool()
+            self.metrics.finish()
+            if pool is not None:
+                pool.close()
             self.source_db.close()
     
     def save_sql_file(self, filename: str) -> bool:
         """保存SQL文件"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
+            with open_file_sink(filename) as sink:
                 for statement in self.sql_statements:
-                    f.write(statement + '\n')
+                    sink.write(statement)
             
             logging.info(f"SQL文件已保存: {filename}")
             return True
@@ -618,8 +2505,9 @@ class DatabaseExporter:
     def save_metadata(self, filename: str) -> bool:
         """保存导出元数据"""
         try:
-            if self.discovery:
-                all_objects = self.discovery.get_all_objects()
+            if self.catalog is not None:
+                # 导出结束时连接已关闭，对象列表取自本次导出使用的快照
+                all_objects = self.catalog.get_all_objects()
                 metadata = {
                     'database': self.source_db.database,
                     'export_time': datetime.now().isoformat(),
@@ -633,6 +2521,18 @@ class DatabaseExporter:
                     },
                     'objects': all_objects
                 }
+                if isinstance(self.sink, FileSink) and self.sink.filename != '-':
+                    metadata['output'] = os.path.abspath(self.sink.filename)
+                if self.table_states:
+                    metadata['tables'] = self.table_states
+                    metadata['options'] = self.checkpoint_options()
+                if self.since is not None:
+                    metadata['reused_tables'] = list(self.reused)
+                if isinstance(self.sink, CompressedFileSink):
+                    metadata['compression'] = self.sink.compression
+                if self.checkpoint is not None:
+                    metadata['parts'] = self.checkpoint.entries
+                metadata['performance'] = self.metrics.report()
                 
                 with open(filename, 'w', encoding='utf-8') as f:
                     json.dump(metadata, f, ensure_ascii=False, indent=2)
@@ -644,6 +2544,73 @@ class DatabaseExporter:
             return False
 
 
+def encode_insert_block(insert_head: str, data_types: List[str], binary_encoding: str,
+                        rows: List[Tuple]) -> bytes:
+    """在格式化进程池中执行：把一批行生成INSERT语句，编码后以换行连接成一个字节块"""
+    formatter = ValueFormatter(data_types, binary_encoding)
+    return b'\n'.join(statement.encode('utf-8', 'surrogateescape') if isinstance(statement, str) else statement
+                      for statement in formatter.iter_insert_statements(insert_head, rows))
+
+
+def format_size(size: int) -> str:
+    """把字节数格式化为便于阅读的文本"""
+    if size > 1024 * 1024:
+        return f"{size / (1024 * 1024):.2f} MB"
+    elif size > 1024:
+        return f"{size / 1024:.2f} KB"
+    return f"{size} bytes"
+
+
+def report_performance(exporter: 'DatabaseExporter', args: argparse.Namespace, console):
+    """显示各阶段耗时，指定 --prometheus 时写出指标文件"""
+    report = exporter.metrics.report()
+    phases = ', '.join(f"{phase} {report['phases'][phase + '_seconds']:.1f}s" for phase in ExportMetrics.PHASES)
+    print(f"   耗时: {report['elapsed_seconds']:.1f}s (对象发现 {report['discovery_seconds']:.1f}s, {phases})",
+          file=console)
+    if report['rows_per_second'] is not None:
+        print(f"   速度: {report['rows_per_second']:.0f} 行/秒, "
+              f"{format_size(int(report['bytes_per_second']))}/秒", file=console)
+    if report['peak_rss_bytes'] is not None:
+        print(f"   峰值内存: {format_size(report['peak_rss_bytes'])}", file=console)
+    
+    if args.prometheus:
+        try:
+            exporter.metrics.write_prometheus(args.prometheus, exporter.source_db.database)
+            print(f"📊 Prometheus指标已保存: {args.prometheus}", file=console)
+        except OSError as e:
+            logging.error(f"保存Prometheus指标失败: {e}")
+            print("⚠️  保存Prometheus指标失败", file=console)
+
+
+def export_to_directory(exporter: 'DatabaseExporter', args: argparse.Namespace,
+                        compression: str, console) -> int:
+    """以目录格式导出，并显示统计信息"""
+    directory = DumpDirectory(args.output, None if compression == 'none' else compression, args.data_format)
+    print("\n📦 开始导出数据库...", file=console)
+    if not exporter.export_database_dir(directory):
+        print("❌ 数据库导出失败", file=console)
+        return 1
+    print(f"✅ 导出目录已保存: {args.output}", file=console)
+    
+    if args.metadata:
+        if not exporter.save_metadata(args.metadata):
+            print("⚠️  保存元数据失败", file=console)
+        else:
+            print(f"📊 元数据已保存: {args.metadata}", file=console)
+    
+    filenames = os.listdir(args.output)
+    total_size = sum(os.path.getsize(os.path.join(args.output, name)) for name in filenames)
+    print(f"\n📈 导出统计:", file=console)
+    print(f"   文件数: {len(filenames)}", file=console)
+    print(f"   总大小: {format_size(total_size)}", file=console)
+    print(f"   包含数据: {'是' if not args.no_data else '否'}", file=console)
+    print(f"   包含用户权限: {'是' if args.include_users else '否'}", file=console)
+    report_performance(exporter, args, console)
+    
+    print("\n🎉 数据库导出完成！", file=console)
+    return 0
+
+
 def parse_connection_string(conn_str: str) -> Dict[str, Any]:
     """解析连接字符串格式: user:password@host:port/database"""
     try:
@@ -693,7 +2660,7 @@ def main():
   
   %(prog)s --source-host localhost --source-user root --source-password 123456 \\
            --source-db mydb --output mydb_full.sql --include-users
-           
+  
   %(prog)s --source root:123456@localhost:3306/mydb --no-data --output mydb_structure.sql
 
 连接字符串格式: user:password@host:port/database
@@ -711,10 +2678,45 @@ def main():
     
     # 导出选项
     export_group = parser.add_argument_group('导出选项')
-    export_group.add_argument('--output', '-o', type=str, required=True, help='输出SQL文件路径')
+    export_group.add_argument('--output', '-o', type=str, required=True,
+                              help='输出SQL文件路径 ("-" 表示标准输出)，--format dir 时为输出目录')
+    export_group.add_argument('--format', choices=['sql', 'dir'], default='sql',
+                              help='输出格式: sql 为单个SQL文件，dir 为每个对象一个文件的目录加 manifest.json (默认: sql)')
+    export_group.add_argument('--data-format', choices=DumpDirectory.DATA_FORMATS, default='sql',
+                              help='目录格式中表数据文件的格式 (默认: sql)')
     export_group.add_argument('--no-data', action='store_true', help='只导出结构，不导出数据')
     export_group.add_argument('--include-users', action='store_true', help='包含用户和权限信息')
-    export_group.add_argument('--metadata', type=str, help='保存导出元数据的JSON文件路径')
+    export_group.add_argument('--metadata', type=str, help='保存导出元数据的JSON文件路径 (包含各表各阶段耗时)')
+    export_group.add_argument('--prometheus', type=str,
+                              help='导出完成后写出Prometheus指标文件 (textfile collector格式)')
+    export_group.add_argument('--stream', action='store_true', help='使用服务端游标流式读取表数据，内存占用与表大小无关')
+    export_group.add_argument('--batch-size', type=int, default=1000, help='每条INSERT语句包含的行数 (默认: 1000)')
+    export_group.add_argument('--jobs', '-j', type=int, default=1, help='并行导出表数据的连接数 (默认: 1)')
+    export_group.add_argument('--chunk-size', type=int, default=0,
+                              help='按主键/唯一键分块读取表数据，每块的行数 (默认: 0，不分块)')
+    export_group.add_argument('--resume', action='store_true', help='从上次中断的位置继续导出')
+    export_group.add_argument('--checkpoint', type=str, help='断点文件路径 (默认: 输出文件名加 .checkpoint)')
+    export_group.add_argument('--temp-dir', type=str, help='并行导出时存放临时文件的目录 (默认: 系统临时目录)')
+    export_group.add_argument('--since', type=str,
+                              help='上次导出的元数据JSON文件，只重新导出结构或数据有变化的表，'
+                                   '未变化的表从上次的导出文件复制')
+    export_group.add_argument('--checksum', action='store_true',
+                              help='用CHECKSUM TABLE计算各表校验和并写入元数据，供下次 --since 对比')
+    export_group.add_argument('--schema-cache', type=str,
+                              help='对象目录缓存文件，数据库结构未变化时跳过对象发现')
+    export_group.add_argument('--defer-indexes', action='store_true',
+                              help='建表语句中去掉二级索引，导入数据后每个表用一条ALTER TABLE批量创建')
+    export_group.add_argument('--binary-encoding', choices=ValueFormatter.BINARY_ENCODINGS, default='hex',
+                              help="SQL中二进制值的写法: hex 为 0x...，binary 为 _binary'...' (按原始字节转义，体积最小)，"
+                                   "base64 为 FROM_BASE64('...') (默认: hex)")
+    export_group.add_argument('--passthrough', action='store_true',
+                              help='DECIMAL、浮点数和日期时间列保留服务端返回的文本，生成INSERT时不再经过Python类型转换')
+    export_group.add_argument('--format-workers', type=int, default=0,
+                              help='并行生成INSERT语句的进程数，用于CPU成为瓶颈的大表 (默认: 0，在导出进程中生成)')
+    export_group.add_argument('--compress', choices=['gzip', 'zstd', 'none'],
+                              help='输出压缩格式 (默认: 按输出文件扩展名判断，.gz为gzip，.zst为zstd)')
+    export_group.add_argument('--compress-threads', type=int, default=2,
+                              help='并行压缩的线程数 (默认: 2)')
     
     # 其他选项
     parser.add_argument('--no-progress', action='store_true', help='不显示进度条')
@@ -737,6 +2739,39 @@ def main():
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
+    if args.jobs < 1:
+        parser.error("--jobs 必须大于等于1")
+    if args.format_workers < 0:
+        parser.error("--format-workers 不能为负数")
+    if args.chunk_size < 0:
+        parser.error("--chunk-size 不能为负数")
+    if args.resume and args.output == '-':
+        parser.error("输出到标准输出时不能使用 --resume")
+    if args.since and (args.output == '-' or args.no_data):
+        parser.error("--since 需要输出到文件，且不能与 --no-data 同时使用")
+    compression = args.compress or CompressedFileSink.detect(args.output) or 'none'
+    if compression == 'zstd' and zstandard is None:
+        parser.error("zstd压缩需要安装zstandard: pip install zstandard")
+    if compression != 'none' and args.resume:
+        parser.error("压缩输出不能使用 --resume，压缩流无法从中间截断续写")
+    if args.compress_threads < 1:
+        parser.error("--compress-threads 至少为1")
+    if args.data_format != 'sql' and args.format != 'dir':
+        parser.error("--data-format 需要与 --format dir 一起使用")
+    if args.data_format == 'parquet' and pyarrow is None:
+        parser.error("Parquet输出需要安装pyarrow: pip install pyarrow")
+    if args.passthrough and args.data_format != 'sql':
+        parser.error(f"--passthrough 只用于生成INSERT语句，不能与 --data-format {args.data_format} 同用")
+    if args.format == 'dir':
+        if args.output == '-':
+            parser.error("--format dir 需要指定输出目录")
+        if args.resume or args.since or args.checkpoint:
+            parser.error("--format dir 不支持 --resume、--checkpoint 和 --since")
+        if args.defer_indexes:
+            parser.error("--format dir 不支持 --defer-indexes，db_restore导入目录时会自动延后创建索引")
+        if os.path.isdir(args.output) and os.listdir(args.output):
+            parser.error(f"输出目录 {args.output} 不为空")
+    
     try:
         # 解析数据库连接参数
         if args.source:
@@ -752,64 +2787,117 @@ def main():
                 'database': args.source_db
             }
         
-        print("🔄 MySQL数据库完整导出工具")
-        print(f"📍 数据库: {source_config['user']}@{source_config['host']}:{source_config['port']}/{source_config['database']}")
+        # 输出到标准输出时，提示信息改写到标准错误，避免混入SQL
+        console = sys.stderr if args.output == '-' else sys.stdout
+        
+        print("🔄 MySQL数据库完整导出工具", file=console)
+        print(f"📍 数据库: {source_config['user']}@{source_config['host']}:{source_config['port']}/{source_config['database']}", file=console)
         
         # 创建数据库连接器
         source_db = DatabaseConnector(**source_config)
         
         # 测试连接
-        print("\n🔍 测试数据库连接...")
+        print("\n🔍 测试数据库连接...", file=console)
         if not source_db.test_connection():
-            print("❌ 数据库连接失败")
+            print("❌ 数据库连接失败", file=console)
             return 1
-        print("✅ 数据库连接成功")
+        print("✅ 数据库连接成功", file=console)
+        
+        # 增量导出: 读取上次导出的元数据
+        since = None
+        if args.since:
+            try:
+                with open(args.since, 'r', encoding='utf-8') as f:
+                    since = json.load(f)
+            except (IOError, ValueError) as e:
+                print(f"❌ 无法读取上次导出的元数据: {e}", file=console)
+                return 1
+            if since.get('output') == os.path.abspath(args.output):
+                print("❌ 增量导出需要从上次的导出文件复制数据，输出文件不能与其相同", file=console)
+                return 1
         
         # 创建导出器
         exporter = DatabaseExporter(
             source_db,
             include_data=not args.no_data,
             include_users=args.include_users,
-            show_progress=not args.no_progress
+            show_progress=not args.no_progress,
+            stream_rows=args.stream,
+            batch_size=args.batch_size,
+            jobs=args.jobs,
+            temp_dir=args.temp_dir,
+            chunk_size=args.chunk_size,
+            schema_cache=args.schema_cache,
+            checksum=args.checksum,
+            since=since,
+            defer_indexes=args.defer_indexes,
+            binary_encoding=args.binary_encoding,
+            passthrough=args.passthrough,
+            format_workers=args.format_workers
         )
         
-        # 执行导出
-        print("\n📦 开始导出数据库...")
-        if not exporter.export_database():
-            print("❌ 数据库导出失败")
-            return 1
+        if args.format == 'dir':
+            return export_to_directory(exporter, args, compression, console)
+        
+        # 输出到文件时记录断点清单，中断后可用 --resume 继续
+        checkpoint = None
+        resume_offset = None
+        if args.output != '-':
+            checkpoint = ExportCheckpoint(args.checkpoint or args.output + '.checkpoint')
+            if args.resume:
+                if not checkpoint.load():
+                    print("❌ 无法读取断点文件", file=console)
+                    return 1
+                if checkpoint.options != exporter.checkpoint_options():
+                    print("❌ 导出选项与断点文件中记录的不一致，无法续传", file=console)
+                    return 1
+                resume_offset = checkpoint.verify(args.output)
+                print(f"⏩ 从断点继续: 已完成 {len(checkpoint.entries)} 个单元，"
+                      f"保留已导出的 {resume_offset} 字节", file=console)
+            else:
+                checkpoint.start(exporter.checkpoint_options())
         
-        # 保存SQL文件
-        if not exporter.save_sql_file(args.output):
-            print("❌ 保存SQL文件失败")
+        # 执行导出，语句边生成边写入输出文件
+        print("\n📦 开始导出数据库...", file=console)
+        try:
+            with open_file_sink(args.output, compression, args.compress_threads, resume_offset) as sink:
+                if not exporter.export_database(sink, checkpoint):
+                    print("❌ 数据库导出失败", file=console)
+                    if checkpoint and compression == 'none':
+                        checkpoint.close()
+                        print(f"💡 可使用 --resume 从断点继续 (断点文件: {checkpoint.filename})", file=console)
+                    return 1
+        except IOError as e:
+            logging.error(f"保存文件失败: {e}")
+            print("❌ 保存SQL文件失败", file=console)
             return 1
         
-        print(f"✅ SQL文件已保存: {args.output}")
+        if checkpoint:
+            checkpoint.finish()
+        
+        print(f"✅ SQL文件已保存: {args.output}", file=console)
         
         # 保存元数据
         if args.metadata:
             if not exporter.save_metadata(args.metadata):
-                print("⚠️  保存元数据失败")
+                print("⚠️  保存元数据失败", file=console)
             else:
-                print(f"📊 元数据已保存: {args.metadata}")
+                print(f"📊 元数据已保存: {args.metadata}", file=console)
         
         # 显示统计信息
-        file_size = os.path.getsize(args.output)
-        if file_size > 1024 * 1024:
-            size_str = f"{file_size / (1024 * 1024):.2f} MB"
-        elif file_size > 1024:
-            size_str = f"{file_size / 1024:.2f} KB"
-        else:
-            size_str = f"{file_size} bytes"
-        
-        print(f"\n📈 导出统计:")
-        print(f"   文件大小: {size_str}")
-        print(f"   包含数据: {'是' if not args.no_data else '否'}")
-        print(f"   包含用户权限: {'是' if args.include_users else '否'}")
+        print(f"\n📈 导出统计:", file=console)
+        print(f"   文件大小: {format_size(sink.bytes_written)}", file=console)
+        if compression != 'none' and args.output != '-':
+            compressed_size = os.path.getsize(args.output)
+            ratio = sink.bytes_written / compressed_size if compressed_size else 0
+            print(f"   压缩后: {format_size(compressed_size)} ({compression}, 压缩比 {ratio:.1f}x)", file=console)
+        print(f"   包含数据: {'是' if not args.no_data else '否'}", file=console)
+        print(f"   包含用户权限: {'是' if args.include_users else '否'}", file=console)
+        report_performance(exporter, args, console)
         
-        print("\n🎉 数据库导出完成！")
+        print("\n🎉 数据库导出完成！", file=console)
         return 0
-        
+    
     except Exception as e:
         logging.error(f"程序执行失败: {e}")
         return 1
@@ -0,0 +1,905 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MySQL并行导入工具
+读取db_exp/tab_exp生成的导出(SQL文件或 --format dir 目录)，用连接池并行导入表数据
+"""
+
+import argparse
+import sys
+import os
+import io
+import re
+import gzip
+import time
+import zlib
+import json
+import queue
+import logging
+import pymysql
+from pymysql.constants import CLIENT
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator, BinaryIO
+from tqdm import tqdm
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 与db_exp、tab_exp共用的组件位于同级的dump_common目录
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(TOOLS_DIR, 'dump_common'))
+
+from dump_common import SecondaryIndexes
+
+
+class DatabaseConnector:
+    """数据库连接管理器"""
+    
+    def __init__(self, host: str, port: int, user: str, password: str, database: str):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.database = database
+        self.connection: Optional[pymysql.Connection] = None
+    
+    def connect(self) -> bool:
+        """连接数据库"""
+        try:
+            self.connection = pymysql.connect(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                database=self.database,
+                charset='utf8mb4',
+                client_flag=CLIENT.MULTI_STATEMENTS
+            )
+            return True
+        except pymysql.Error as e:
+            logging.error(f"数据库连接失败: {e}")
+            return False
+    
+    def close(self):
+        """关闭数据库连接"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+    
+    def clone(self) -> 'DatabaseConnector':
+        """创建使用相同连接参数的新连接器"""
+        return DatabaseConnector(self.host, self.port, self.user, self.password, self.database)
+    
+    def test_connection(self) -> bool:
+        """测试数据库连接"""
+        if not self.connect():
+            return False
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT VERSION()")
+                version = cursor.fetchone()[0]
+                logging.info(f"MySQL版本: {version}")
+            return True
+        except pymysql.Error as e:
+            logging.error(f"连接测试失败: {e}")
+            return False
+        finally:
+            self.close()
+    
+    def count_tables(self) -> int:
+        """目标库中已有的表和视图数量"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s",
+                (self.database,)
+            )
+            return cursor.fetchone()[0]
+
+
+class RestorePool:
+    """导入用的固定大小连接池，每个连接都关闭唯一性检查和外键检查"""
+    
+    def __init__(self, template: DatabaseConnector, size: int, session_statements: List[str]):
+        self.template = template
+        self.size = size
+        self.session_statements = session_statements
+        self.connectors: List[DatabaseConnector] = []
+        self.idle: queue.Queue = queue.Queue()
+    
+    def open(self) -> bool:
+        for _ in range(self.size):
+            db = self.template.clone()
+            if not db.connect():
+                return False
+            self.connectors.append(db)
+            try:
+                with db.connection.cursor() as cursor:
+                    for statement in self.session_statements:
+                        cursor.execute(statement)
+            except pymysql.Error as e:
+                logging.error(f"设置导入会话失败: {e}")
+                return False
+            self.idle.put(db)
+        return True
+    
+    def acquire(self) -> DatabaseConnector:
+        """取出一个空闲连接，没有空闲连接时阻塞等待"""
+        return self.idle.get()
+    
+    def release(self, db: DatabaseConnector):
+        """归还连接"""
+        self.idle.put(db)
+    
+    def close(self):
+        for db in self.connectors:
+            db.close()
+        self.connectors = []
+
+
+class DumpFile:
+    """读取导出文件，gzip/zstd压缩的文件按文件头自动识别并解压
+    
+    逐行返回解码后的文本，同时累计解压后内容的字节数和CRC32，用于与清单中的记录比对。
+    """
+    
+    GZIP_MAGIC = b'\x1f\x8b'
+    ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.bytes_read = 0
+        self.crc32 = 0
+        with open(filename, 'rb') as f:
+            magic = f.read(4)
+        if magic.startswith(self.GZIP_MAGIC):
+            self.compression = 'gzip'
+        elif magic == self.ZSTD_MAGIC:
+            if zstandard is None:
+                raise IOError(f"{filename} 是zstd压缩文件，需要安装zstandard: pip install zstandard")
+            self.compression = 'zstd'
+        else:
+            self.compression = None
+    
+    def open(self) -> BinaryIO:
+        if self.compression == 'gzip':
+            return gzip.open(self.filename, 'rb')
+        if self.compression == 'zstd':
+            reader = zstandard.ZstdDecompressor().stream_reader(open(self.filename, 'rb'), closefd=True)
+            return io.BufferedReader(reader)
+        return open(self.filename, 'rb', buffering=1024 * 1024)
+    
+    def lines(self) -> Iterator[str]:
+        with self.open() as f:
+            for raw in f:
+                self.bytes_read += len(raw)
+                self.crc32 = zlib.crc32(raw, self.crc32)
+                yield raw.decode('utf-8', 'surrogateescape')
+
+
+class SqlStatementReader:
+    """从SQL文本中逐条读取语句
+    
+    识别单引号、双引号字符串中的反斜杠转义和重复引号，反引号标识符，-- 与 # 行注释，
+    /* */ 块注释，以及mysql客户端的DELIMITER指令。按行读取，内存占用只与单条语句的
+    长度有关。语句开头的注释行会被丢弃，返回的语句不含结尾的分隔符。
+    """
+    
+    QUOTE_ENDS = {
+        "'": re.compile(r"(?:[^'\\]|\\.|'')*'", re.S),
+        '"': re.compile(r'(?:[^"\\]|\\.|"")*"', re.S),
+        '`': re.compile(r'(?:[^`]|``)*`', re.S),
+    }
+    DELIMITER_COMMAND = re.compile(r'^\s*DELIMITER\s+(\S+)', re.I)
+    
+    def __init__(self, lines: Iterable[str]):
+        self.lines = lines
+        self.delimiter = ';'
+    
+    def special_pattern(self) -> 're.Pattern':
+        """当前分隔符下需要逐个处理的记号：引号、注释起始和分隔符"""
+        return re.compile(r"""['"`]|/\*|--(?=\s)|#|""" + re.escape(self.delimiter))
+    
+    def __iter__(self) -> Iterator[str]:
+        special = self.special_pattern()
+        parts: List[str] = []
+        quote: Optional[str] = None
+        in_comment = False
+        
+        for line in self.lines:
+            if not parts and quote is None and not in_comment:
+                stripped = line.strip()
+                if not stripped or stripped.startswith('--') or stripped.startswith('#'):
+                    continue
+                match = self.DELIMITER_COMMAND.match(line)
+                if match:
+                    self.delimiter = match.group(1)
+                    special = self.special_pattern()
+                    continue
+            
+            start = pos = 0
+            length = len(line)
+            while pos < length:
+                if quote is not None:
+                    match = self.QUOTE_ENDS[quote].match(line, pos)
+                    if match is None:
+                        # 字符串跨行，本行剩余部分都在字符串内
+                        break
+                    pos = match.end()
+                    quote = None
+                    continue
+                if in_comment:
+                    end = line.find('*/', pos)
+                    if end < 0:
+                        break
+                    pos = end + 2
+                    in_comment = False
+                    continue
+                
+                match = special.search(line, pos)
+                if match is None:
+                    break
+                token = match.group()
+                pos = match.end()
+                if token in self.QUOTE_ENDS:
+                    quote = token
+                elif token == '/*':
+                    in_comment = True
+                elif token == '#' or token == '--':
+                    # 行注释不放进语句
+                    if line[start:match.start()].strip():
+                        parts.append(line[start:match.start()])
+                    start = length
+                    break
+                else:
+                    parts.append(line[start:match.start()])
+                    statement = ''.join(parts).strip()
+                    parts = []
+                    start = pos
+                    if statement:
+                        yield statement
+            
+            rest = line[start:]
+            if parts or rest.strip():
+                parts.append(rest)
+        
+        statement = ''.join(parts).strip()
+        if statement:
+            yield statement
+
+
+class DumpRestorer:
+    """并行导入器
+    
+    导入分为四个阶段：建表(二级索引延后)、并行导入数据、并行创建延后的索引、
+    最后按依赖顺序创建视图、存储过程、函数、触发器和事件。所有连接都设置
+    unique_checks=0、foreign_key_checks=0。
+    """
+    
+    SESSION_SETTINGS = ["SET SESSION unique_checks = 0, foreign_key_checks = 0"]
+    # SQL文件模式下一个导入任务最多包含的语句数和字节数
+    BATCH_STATEMENTS = 16
+    BATCH_BYTES = 16 * 1024 * 1024
+    # 视图等对象引用的对象尚未创建时的错误码，先跳过，其他对象创建后重试
+    # (3011: FOLLOWS引用的触发器还不存在)
+    DEPENDENCY_ERRORS = {1146, 1356, 1305, 1449, 3011}
+    
+    IDENTIFIER = r'(?:`((?:[^`]|``)+)`|(\w+))'
+    TABLE_STATEMENT = re.compile(r'^(CREATE|DROP|TRUNCATE)\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?'
+                                 + IDENTIFIER, re.I)
+    ALTER_STATEMENT = re.compile(r'^ALTER\s+TABLE\s+' + IDENTIFIER, re.I)
+    DATA_STATEMENT = re.compile(r'^(?:INSERT|REPLACE)\s+(?:(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE)\s+)*'
+                                r'(?:INTO\s+)?' + IDENTIFIER, re.I)
+    NAME = r'(?:`(?:[^`]|``)+`|\w+)'
+    TRIGGER_STATEMENT = re.compile(r"^CREATE\s+(?:DEFINER\s*=\s*(?:`[^`]*`|'[^']*'|[^\s`']+)+\s+)?TRIGGER\s+"
+                                   r'(?:IF\s+NOT\s+EXISTS\s+)?(?:' + NAME + r'\s*\.\s*)?' + NAME +
+                                   r'\s+(?:BEFORE|AFTER)\s+(?:INSERT|UPDATE|DELETE)\s+ON\s+(?:' + NAME + r'\s*\.\s*)?'
+                                   + IDENTIFIER, re.I)
+    DROP_TRIGGER = re.compile(r'^DROP\s+TRIGGER\s', re.I)
+    # 把变量恢复为之前保存的值的SET(如 SET time_zone = @saved_time_zone)，属于前面的对象
+    RESTORE_SETTING = re.compile(r'^SET\s+[\w@.]+\s*=\s*@\w+(?:\s*,\s*[\w@.]+\s*=\s*@\w+)*\s*$', re.I)
+    # mysqldump把CREATE TRIGGER的各部分包在 /*!50003 ... */ 条件注释中
+    CONDITIONAL_COMMENT = re.compile(r'/\*!\d*\s*|\*/')
+    SKIPPED_STATEMENT = re.compile(r'^(START\s+TRANSACTION|BEGIN|COMMIT|ROLLBACK|LOCK\s+TABLES|UNLOCK\s+TABLES|'
+                                   r'USE\s|SET\s+AUTOCOMMIT)', re.I)
+    
+    def __init__(self, target_db: DatabaseConnector, jobs: int = 4, defer_indexes: bool = True,
+                 tables: Optional[List[str]] = None, show_progress: bool = True):
+        self.target_db = target_db
+        self.jobs = jobs
+        self.defer_indexes = defer_indexes
+        self.tables = set(tables) if tables else None
+        self.show_progress = show_progress
+        self.session_statements: List[str] = list(self.SESSION_SETTINGS)
+        self.deferred: Dict[str, List[str]] = {}
+        self.pool: Optional[RestorePool] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.stats: Dict[str, Any] = {'tables': 0, 'rows': 0, 'statements': 0, 'objects': 0,
+                                      'indexes': 0, 'phases': {}}
+    
+    @classmethod
+    def strip_comments(cls, statement: str) -> str:
+        """去掉语句开头的注释，用于判断语句类型(/*! */ 条件注释会被执行，保留)"""
+        text = statement.lstrip()
+        while True:
+            if text.startswith('--') or text.startswith('#'):
+                text = text.split('\n', 1)[1].lstrip() if '\n' in text else ''
+            elif text.startswith('/*') and not text.startswith('/*!'):
+                end = text.find('*/')
+                text = text[end + 2:].lstrip() if end >= 0 else ''
+            else:
+                return text
+    
+    @classmethod
+    def statement_text(cls, statement: str) -> str:
+        """去掉开头的注释，语句整个包在 /*!NNNNN ... */ 条件注释中时去掉注释标记，用于判断语句类型"""
+        text = cls.strip_comments(statement)
+        if text.startswith('/*!'):
+            text = cls.CONDITIONAL_COMMENT.sub(' ', text[:4096]).lstrip()
+        return text
+    
+    @classmethod
+    def classify(cls, statement: str) -> Tuple[str, Optional[str]]:
+        """判断语句类型，返回(类型, 表名)
+        
+        类型: data(INSERT/REPLACE)、table(建表、删表)、alter(ALTER TABLE)、
+        session(SET，包括mysqldump的 /*!40103 SET ... */)、skip(事务控制、锁表、USE)、
+        object(视图、存储过程等其他语句)
+        """
+        text = cls.statement_text(statement)
+        for kind, pattern in (('data', cls.DATA_STATEMENT), ('table', cls.TABLE_STATEMENT),
+                              ('alter', cls.ALTER_STATEMENT)):
+            match = pattern.match(text)
+            if match:
+                quoted, plain = match.groups()[-2:]
+                return kind, quoted.replace('``', '`') if quoted is not None else plain
+        if cls.SKIPPED_STATEMENT.match(text):
+            return 'skip', None
+        if text[:4].upper() == 'SET ':
+            return 'session', None
+        return 'object', None
+    
+    @classmethod
+    def trigger_table(cls, statement: str) -> Optional[str]:
+        """CREATE TRIGGER语句所在的表名，不是建触发器的语句时返回None"""
+        text = cls.CONDITIONAL_COMMENT.sub(' ', cls.strip_comments(statement)[:4096]).lstrip()
+        match = cls.TRIGGER_STATEMENT.match(text)
+        if match is None:
+            return None
+        quoted, plain = match.groups()[-2:]
+        return quoted.replace('``', '`') if quoted is not None else plain
+    
+    def wanted(self, table_name: Optional[str]) -> bool:
+        """是否导入该表(未指定 --tables 时导入全部)"""
+        return self.tables is None or table_name in self.tables
+    
+    def apply_table_statement(self, cursor, statement: str, table_name: str):
+        """执行建表/删表语句，建表时按需拆出二级索引留到数据导入之后"""
+        if self.defer_indexes and self.strip_comments(statement)[:6].upper() == 'CREATE':
+            statement, indexes = SecondaryIndexes.split(statement)
+            self.deferred[table_name] = SecondaryIndexes.alter_statements(table_name, indexes)
+            if indexes:
+                logging.debug(f"表 {table_name} 延后创建 {len(indexes)} 个二级索引")
+        cursor.execute(statement)
+    
+    def open_pool(self) -> ThreadPoolExecutor:
+        """打开连接池和线程池，会话设置包括导出文件开头的SET语句"""
+        if self.executor is None:
+            self.pool = RestorePool(self.target_db, self.jobs, self.session_statements)
+            if not self.pool.open():
+                raise RuntimeError("无法创建导入连接池")
+            self.executor = ThreadPoolExecutor(max_workers=self.jobs)
+        return self.executor
+    
+    def close_pool(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+    
+    def load_statements(self, statements: Iterable[str], label: str,
+                        check: Optional[Tuple[DumpFile, Dict[str, Any]]] = None) -> int:
+        """从连接池取一个连接，在一个事务中执行一组语句，返回影响的行数
+        
+        check为(导出文件, 清单中的文件记录)时，提交前核对读取的字节数和CRC32，不一致则回滚。
+        """
+        db = self.pool.acquire()
+        rows = 0
+        try:
+            with db.connection.cursor() as cursor:
+                for statement in statements:
+                    rows += cursor.execute(statement)
+            if check is not None:
+                dump_file, entry = check
+                if dump_file.bytes_read != entry['bytes'] or dump_file.crc32 != entry['crc32']:
+                    raise RuntimeError(f"文件 {entry['file']} 校验失败，内容与清单不一致")
+            db.connection.commit()
+            return rows
+        except Exception as e:
+            db.connection.rollback()
+            raise RuntimeError(f"导入失败 ({label}): {e}")
+        finally:
+            self.pool.release(db)
+    
+    def run_deferred_indexes(self, table_name: str) -> int:
+        """创建一个表延后的二级索引"""
+        statements = self.deferred.pop(table_name, [])
+        if statements:
+            self.load_statements(statements, f"{table_name} 的索引")
+        return len(statements)
+    
+    def run_objects(self, units: List[Tuple[str, List[str]]]) -> bool:
+        """在主连接上依次创建视图、存储过程等对象
+        
+        因引用的对象尚不存在而失败的对象先跳过，一轮结束后重试，直到没有进展为止。
+        """
+        pending = units
+        errors: List[Tuple[str, Exception]] = []
+        while pending:
+            retry: List[Tuple[str, List[str], Exception]] = []
+            for label, statements in pending:
+                try:
+                    with self.target_db.connection.cursor() as cursor:
+                        for statement in statements:
+                            cursor.execute(statement)
+                    self.stats['objects'] += 1
+                except pymysql.Error as e:
+                    if e.args and e.args[0] in self.DEPENDENCY_ERRORS:
+                        retry.append((label, statements, e))
+                    else:
+                        errors.append((label, e))
+            if not retry or len(retry) == len(pending):
+                errors.extend((label, error) for label, _, error in retry)
+                break
+            pending = [(label, statements) for label, statements, _ in retry]
+        
+        for label, error in errors:
+            logging.error(f"创建对象失败 ({label}): {error}")
+        return not errors
+    
+    def timed(self, phase: str, started: float):
+        self.stats['phases'][phase] = round(time.time() - started, 3)
+    
+    @staticmethod
+    def report_incomplete(tables: Iterable[str]):
+        """导入中断时列出数据没有完整导入的表，已提交的批次不会回滚，这些表需要清空后重新导入"""
+        names = sorted(set(tables))
+        if names:
+            logging.error(f"以下表的数据可能没有完整导入，需要清空后重新导入: {', '.join(names)}")
+    
+    def restore_directory(self, path: str) -> bool:
+        """导入 db_exp --format dir 生成的目录"""
+        try:
+            with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (IOError, ValueError) as e:
+            logging.error(f"读取清单失败: {e}")
+            return False
+        if manifest.get('format') != 'db_exp-dir':
+            logging.error(f"不支持的导出格式: {manifest.get('format')}")
+            return False
+        if manifest.get('include_data') and manifest.get('data_format', 'sql') != 'sql':
+            logging.error(f"数据文件为 {manifest['data_format']} 格式，只能导入SQL格式的数据文件")
+            return False
+        
+        objects = manifest['objects']
+        tables = [entry for entry in objects if entry['kind'] == 'tables' and self.wanted(entry['name'])]
+        if self.tables is None:
+            others = [entry for entry in objects if entry['kind'] != 'tables']
+        else:
+            # 只导入部分表时，只带上这些表的触发器
+            others = [entry for entry in objects if entry['kind'] == 'triggers'
+                      and entry['depends_on'] and all(self.wanted(name) for name in entry['depends_on'])]
+        
+        if not self.target_db.connect():
+            return False
+        remaining: Dict[str, int] = {}
+        try:
+            # 1. 建表
+            started = time.time()
+            with self.target_db.connection.cursor() as cursor:
+                for statement in self.SESSION_SETTINGS:
+                    cursor.execute(statement)
+                for entry in tables:
+                    if not entry.get('schema'):
+                        continue
+                    for statement in SqlStatementReader(DumpFile(os.path.join(path, entry['schema'])).lines()):
+                        kind, _ = self.classify(statement)
+                        if kind == 'table':
+                            self.apply_table_statement(cursor, statement, entry['name'])
+                        elif kind != 'skip':
+                            cursor.execute(statement)
+            self.stats['tables'] = len(tables)
+            self.timed('schema', started)
+            
+            # 2. 并行导入数据文件，大文件先导入；一个表的数据全部导入后立即创建它的索引
+            started = time.time()
+            executor = self.open_pool()
+            files = [(entry['name'], data) for entry in tables for data in entry.get('data', [])]
+            files.sort(key=lambda item: item[1]['bytes'], reverse=True)
+            remaining = {entry['name']: len(entry.get('data', [])) for entry in tables}
+            
+            index_futures: List[Future] = [executor.submit(self.run_deferred_indexes, name)
+                                           for name, count in remaining.items() if count == 0]
+            data_futures = {executor.submit(self.load_data_file, path, name, data): name for name, data in files}
+            progress_bar = tqdm(total=len(files), desc="导入数据", unit="文件") if self.show_progress else None
+            for future in as_completed(data_futures):
+                self.stats['rows'] += future.result()
+                name = data_futures[future]
+                remaining[name] -= 1
+                if remaining[name] == 0:
+                    index_futures.append(executor.submit(self.run_deferred_indexes, name))
+                if progress_bar:
+                    progress_bar.update(1)
+            if progress_bar:
+                progress_bar.close()
+            self.timed('data', started)
+            
+            started = time.time()
+            for future in index_futures:
+                self.stats['indexes'] += future.result()
+            self.timed('indexes', started)
+            
+            # 3. 视图、存储过程、函数、触发器、事件、用户权限(清单中已按依赖排序)
+            started = time.time()
+            units = []
+            for entry in others:
+                statements = [statement for statement in
+                              SqlStatementReader(DumpFile(os.path.join(path, entry['schema'])).lines())
+                              if self.classify(statement)[0] != 'skip']
+                units.append((f"{entry['kind']}:{entry['name']}", statements))
+            ok = self.run_objects(units)
+            self.timed('objects', started)
+            return ok
+        
+        except Exception as e:
+            logging.error(f"导入过程中发生错误: {e}")
+            self.report_incomplete(name for name, count in remaining.items() if count > 0)
+            return False
+        finally:
+            self.close_pool()
+            self.target_db.close()
+    
+    def load_data_file(self, path: str, table_name: str, entry: Dict[str, Any]) -> int:
+        """导入一个数据文件，整个文件在一个事务中提交"""
+        dump_file = DumpFile(os.path.join(path, entry['file']))
+        statements = (statement for statement in SqlStatementReader(dump_file.lines())
+                      if self.classify(statement)[0] != 'skip')
+        return self.load_statements(statements, entry['file'], (dump_file, entry))
+    
+    def restore_sql_file(self, filename: str) -> bool:
+        """导入单个SQL文件(可以是gzip/zstd压缩的)
+        
+        主线程顺序读取语句：建表等结构语句在主连接上执行，INSERT按表攒成批交给连接池
+        并行执行，ALTER TABLE和延后的索引在数据导入完成后并行执行，视图、存储过程等
+        对象最后执行。结构语句涉及的表还有未完成的数据批次时，先等待这些批次完成。
+        """
+        if not self.target_db.connect():
+            return False
+        
+        pending: deque = deque()
+        dispatched_tables = set()
+        objects: List[Tuple[str, List[str]]] = []
+        # 只导入部分表时，触发器前面的 DROP TRIGGER 先暂存，随所选表的触发器一起执行
+        drop_trigger: Optional[str] = None
+        # 紧挨在对象语句之前的SET语句(如事件的时区、存储过程的sql_mode)，随该对象一起执行
+        settings: List[str] = []
+        # 刚加入的对象的语句列表，其后恢复变量的SET追加在对象之后(跳过的对象为临时列表)
+        restores: Optional[List[str]] = None
+        batches: Dict[str, Tuple[List[str], int]] = {}
+        # 导入中断时数据可能不完整的表: 失败的批次所属的表，以及正在读取数据的表
+        incomplete = set()
+        reading_table: Optional[str] = None
+        
+        def finish(table_name: str, future: Future):
+            try:
+                self.stats['rows'] += future.result()
+            except Exception:
+                incomplete.add(table_name)
+                raise
+        
+        def submit(table_name: str):
+            # 已有批次失败时不再提交新的批次，尽量少留下只导入了一部分的表
+            for name, future in pending:
+                if future.done() and future.exception() is not None:
+                    finish(name, future)
+            statements, _ = batches.pop(table_name)
+            executor = self.open_pool()
+            pending.append((table_name, executor.submit(self.load_statements, statements, table_name)))
+            dispatched_tables.add(table_name)
+            # 排队的批次有上限，避免读取速度超过导入速度时占满内存
+            while pending and (len(pending) > self.jobs * 2 or pending[0][1].done()):
+                finish(*pending.popleft())
+        
+        def wait_all():
+            for name in list(batches):
+                submit(name)
+            while pending:
+                finish(*pending.popleft())
+            dispatched_tables.clear()
+        
+        try:
+            started = time.time()
+            dump_file = DumpFile(filename)
+            progress_bar = None
+            if self.show_progress:
+                total = os.path.getsize(filename) if dump_file.compression is None else None
+                progress_bar = tqdm(total=total, desc="导入", unit="B", unit_scale=True)
+            position = 0
+            
+            with self.target_db.connection.cursor() as cursor:
+                for statement in self.SESSION_SETTINGS:
+                    cursor.execute(statement)
+                
+                for statement in SqlStatementReader(dump_file.lines()):
+                    self.stats['statements'] += 1
+                    kind, table_name = self.classify(statement)
+                    if kind != 'session':
+                        preceding, settings = settings, []
+                        restores = None
+                    if kind == 'data':
+                        if not self.wanted(table_name):
+                            continue
+                        reading_table = table_name
+                        statements, size = batches.get(table_name, ([], 0))
+                        statements.append(statement)
+                        batches[table_name] = (statements, size + len(statement))
+                        if len(statements) >= self.BATCH_STATEMENTS or size + len(statement) >= self.BATCH_BYTES:
+                            submit(table_name)
+                    elif kind in ('table', 'alter'):
+                        if not self.wanted(table_name):
+                            continue
+                        if table_name in batches:
+                            submit(table_name)
+                        if table_name in dispatched_tables:
+                            wait_all()
+                        if kind == 'alter':
+                            self.deferred.setdefault(table_name, []).append(statement)
+                        else:
+                            if self.strip_comments(statement)[:6].upper() == 'CREATE':
+                                self.stats['tables'] += 1
+                            self.apply_table_statement(cursor, statement, table_name)
+                    elif kind == 'session':
+                        cursor.execute(statement)
+                        if self.executor is None:
+                            self.session_statements.append(statement)
+                        if restores is not None and self.RESTORE_SETTING.match(self.statement_text(statement)):
+                            restores.append(statement)
+                        else:
+                            settings.append(statement)
+                            restores = None
+                    elif kind == 'object' and self.tables is None:
+                        label = self.strip_comments(statement)[:60].split('\n')[0]
+                        restores = preceding + [statement]
+                        objects.append((label, restores))
+                    elif kind == 'object':
+                        # 只导入部分表时，与目录格式一致，只带上这些表的触发器
+                        restores = []
+                        if self.DROP_TRIGGER.match(self.strip_comments(statement)):
+                            drop_trigger = statement
+                        else:
+                            if self.wanted(self.trigger_table(statement)):
+                                restores = ([drop_trigger] if drop_trigger else []) + preceding + [statement]
+                                objects.append((self.strip_comments(statement)[:60].split('\n')[0], restores))
+                            drop_trigger = None
+                    
+                    if progress_bar:
+                        progress_bar.update(dump_file.bytes_read - position)
+                        position = dump_file.bytes_read
+                
+                wait_all()
+                reading_table = None
+            if progress_bar:
+                progress_bar.close()
+            self.timed('data', started)
+            
+            started = time.time()
+            tables = [name for name, statements in self.deferred.items() if statements]
+            if tables:
+                executor = self.open_pool()
+                for future in [executor.submit(self.run_deferred_indexes, name) for name in tables]:
+                    self.stats['indexes'] += future.result()
+            self.timed('indexes', started)
+            
+            started = time.time()
+            ok = self.run_objects(objects)
+            self.timed('objects', started)
+            return ok
+        
+        except Exception as e:
+            logging.error(f"导入过程中发生错误: {e}")
+            incomplete.update(name for name, _ in pending)
+            incomplete.update(batches)
+            if reading_table is not None:
+                incomplete.add(reading_table)
+            self.report_incomplete(incomplete)
+            return False
+        finally:
+            self.close_pool()
+            self.target_db.close()
+
+
+def parse_connection_string(conn_str: str) -> Dict[str, Any]:
+    """解析连接字符串格式: user:password@host:port/database"""
+    try:
+        # 分离用户信息和主机信息
+        if '@' in conn_str:
+            user_part, host_part = conn_str.split('@', 1)
+            if ':' in user_part:
+                user, password = user_part.split(':', 1)
+            else:
+                user = user_part
+                password = ""
+        else:
+            raise ValueError("连接字符串格式错误")
+        
+        # 分离主机和数据库
+        if '/' in host_part:
+            host_port, database = host_part.rsplit('/', 1)
+        else:
+            raise ValueError("连接字符串格式错误")
+        
+        # 分离主机和端口
+        if ':' in host_port:
+            host, port_str = host_port.rsplit(':', 1)
+            port = int(port_str)
+        else:
+            host = host_port
+            port = 3306
+        
+        return {
+            'host': host,
+            'port': port,
+            'user': user,
+            'password': password,
+            'database': database
+        }
+    except Exception as e:
+        raise ValueError(f"无法解析连接字符串 '{conn_str}': {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="MySQL并行导入工具 - 导入db_exp/tab_exp生成的导出",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s --target root:123456@localhost:3306/newdb --input mydb_dump/ --jobs 8
+  
+  %(prog)s --target root:123456@localhost:3306/newdb --input mydb_backup.sql.gz
+  
+  %(prog)s --target root:123456@localhost:3306/newdb --input mydb_dump/ --tables orders,order_items
+
+连接字符串格式: user:password@host:port/database
+        """
+    )
+    
+    # 目标数据库参数
+    target_group = parser.add_argument_group('数据库配置')
+    target_group.add_argument('--target', type=str, help='目标数据库连接字符串')
+    target_group.add_argument('--target-host', type=str, help='目标数据库主机')
+    target_group.add_argument('--target-port', type=int, default=3306, help='目标数据库端口 (默认: 3306)')
+    target_group.add_argument('--target-user', type=str, help='目标数据库用户名')
+    target_group.add_argument('--target-password', type=str, help='目标数据库密码')
+    target_group.add_argument('--target-db', type=str, help='目标数据库名')
+    
+    # 导入选项
+    restore_group = parser.add_argument_group('导入选项')
+    restore_group.add_argument('--input', '-i', type=str, required=True,
+                               help='导出文件(.sql/.sql.gz/.sql.zst)或 db_exp --format dir 生成的目录')
+    restore_group.add_argument('--jobs', '-j', type=int, default=4, help='并行导入的连接数 (默认: 4)')
+    restore_group.add_argument('--tables', type=str, help='只导入这些表，逗号分隔 (默认: 全部)')
+    restore_group.add_argument('--no-defer-indexes', action='store_true',
+                               help='建表时直接创建二级索引 (默认: 导入数据后再批量创建)')
+    restore_group.add_argument('--force', '-f', action='store_true', help='目标库已有表时不询问确认')
+    
+    # 其他选项
+    parser.add_argument('--no-progress', action='store_true', help='不显示进度条')
+    parser.add_argument('--verbose', '-v', action='store_true', help='详细输出')
+    parser.add_argument('--quiet', '-q', action='store_true', help='静默模式')
+    
+    args = parser.parse_args()
+    
+    # 设置日志级别
+    if args.quiet:
+        log_level = logging.ERROR
+    elif args.verbose:
+        log_level = logging.DEBUG
+    else:
+        log_level = logging.INFO
+    
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
+    if args.jobs < 1:
+        parser.error("--jobs 至少为1")
+    if not os.path.exists(args.input):
+        parser.error(f"找不到导入文件或目录: {args.input}")
+    is_directory = os.path.isdir(args.input)
+    if is_directory and not os.path.exists(os.path.join(args.input, 'manifest.json')):
+        parser.error(f"目录 {args.input} 中没有 manifest.json，不是完整的目录格式导出")
+    
+    try:
+        # 解析数据库连接参数
+        if args.target:
+            target_config = parse_connection_string(args.target)
+        else:
+            if not all([args.target_host, args.target_user, args.target_db]):
+                parser.error("必须提供 --target 或完整的目标数据库连接参数")
+            target_config = {
+                'host': args.target_host,
+                'port': args.target_port,
+                'user': args.target_user,
+                'password': args.target_password or "",
+                'database': args.target_db
+            }
+        
+        print("🔄 MySQL并行导入工具")
+        print(f"📍 目标数据库: {target_config['user']}@{target_config['host']}:{target_config['port']}/{target_config['database']}")
+        print(f"📂 导入: {args.input}")
+        
+        target_db = DatabaseConnector(**target_config)
+        
+        print("\n🔍 测试数据库连接...")
+        if not target_db.test_connection():
+            print("❌ 数据库连接失败")
+            return 1
+        print("✅ 数据库连接成功")
+        
+        # 导入会删除并重建同名对象，目标库不为空时先确认
+        if not args.force:
+            target_db.connect()
+            try:
+                existing = target_db.count_tables()
+            finally:
+                target_db.close()
+            if existing:
+                answer = input(f"\n⚠️  目标库中已有 {existing} 个表/视图，导入会覆盖同名对象，是否继续? (y/N): ")
+                if answer.strip().lower() != 'y':
+                    print("❌ 用户取消操作")
+                    return 1
+        
+        restorer = DumpRestorer(
+            target_db,
+            jobs=args.jobs,
+            defer_indexes=not args.no_defer_indexes,
+            tables=[name.strip() for name in args.tables.split(',') if name.strip()] if args.tables else None,
+            show_progress=not args.no_progress
+        )
+        
+        print(f"\n📦 开始导入 (并行连接数: {args.jobs})...")
+        started = time.time()
+        if is_directory:
+            ok = restorer.restore_directory(args.input)
+        else:
+            ok = restorer.restore_sql_file(args.input)
+        if not ok:
+            print("❌ 导入失败")
+            return 1
+        
+        stats = restorer.stats
+        print(f"\n📈 导入统计:")
+        print(f"   表: {stats['tables']}个")
+        print(f"   数据行: {stats['rows']}")
+        print(f"   延后创建的索引语句: {stats['indexes']}条")
+        print(f"   视图/存储过程/函数/触发器/事件: {stats['objects']}个")
+        print(f"   各阶段耗时(秒): {stats['phases']}")
+        print(f"   总耗时: {time.time() - started:.1f} 秒")
+        
+        print("\n🎉 导入完成！")
+        return 0
+    
+    except Exception as e:
+        logging.error(f"程序执行失败: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
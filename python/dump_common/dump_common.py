@@ -0,0 +1,949 @@
+# -*- coding: utf-8 -*-
+"""
+MySQL导出工具共用组件
+db_exp、tab_exp、db_restore 和 dump_rewrite 共用的SQL字面量格式化器、SQL输出端(普通文件、标准输出、并行压缩文件)、
+TSV/CSV/JSON Lines/Parquet数据文件的格式化和写出，以及二级索引的拆分
+"""
+
+import base64
+import binascii
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+import zlib
+import pymysql.converters
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby
+from typing import Optional, Dict, Any, List, Tuple, Iterator, Callable, Union, BinaryIO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class SqlSink:
+    """SQL语句输出端基类"""
+    
+    def write(self, statement: Union[str, bytes]):
+        """写出一条语句，含大字段的语句是已编码的bytes/bytearray"""
+        raise NotImplementedError
+    
+    def flush(self):
+        """刷新缓冲区"""
+        pass
+    
+    def append_file(self, filename: str):
+        """将另一个输出文件的内容追加到本输出端"""
+        with open(filename, 'r', encoding='utf-8', errors='surrogateescape', newline='\n') as f:
+            for line in f:
+                self.write(line[:-1] if line.endswith('\n') else line)
+    
+    def close(self):
+        """关闭输出端"""
+        self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ListSink(SqlSink):
+    """将语句收集到列表中的输出端"""
+    
+    def __init__(self, statements: Optional[List[Union[str, bytes]]] = None):
+        self.statements = statements if statements is not None else []
+    
+    def write(self, statement: Union[str, bytes]):
+        self.statements.append(statement)
+
+
+class FileSink(SqlSink):
+    """带缓冲的文件输出端，文件名为'-'时写到标准输出"""
+    
+    COPY_CHUNK_SIZE = 1024 * 1024
+    
+    def __init__(self, filename: str, buffer_size: int = 1024 * 1024, resume_offset: Optional[int] = None):
+        """resume_offset不为None时保留文件前resume_offset个字节，从该位置继续写入"""
+        self.filename = filename
+        self.bytes_written = 0
+        self.crc32 = 0
+        if filename == '-':
+            self.file = sys.stdout.buffer
+            self.owns_file = False
+        elif resume_offset and os.path.exists(filename):
+            self.file = open(filename, 'r+b', buffering=buffer_size)
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+            self.bytes_written = resume_offset
+            self.owns_file = True
+        else:
+            self.file = open(filename, 'wb', buffering=buffer_size)
+            self.owns_file = True
+    
+    def write(self, statement: Union[str, bytes]):
+        if isinstance(statement, str):
+            # _binary编码的二进制值以代理字符保存原始字节，surrogateescape还原成原字节
+            self.write_bytes((statement + '\n').encode('utf-8', 'surrogateescape'))
+        else:
+            # 含大字段的语句已经编码在bytearray中，直接写出，不再拼接换行符复制一遍
+            self.write_bytes(statement)
+            self.write_bytes(b'\n')
+    
+    def write_bytes(self, data: bytes):
+        """写出一段已编码的数据，并累计字节数和CRC32"""
+        self.file.write(data)
+        self.bytes_written += len(data)
+        self.crc32 = zlib.crc32(data, self.crc32)
+    
+    def append_file(self, filename: str):
+        with open(filename, 'rb') as f:
+            while True:
+                chunk = f.read(self.COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.write_bytes(chunk)
+    
+    def append_range(self, reader: BinaryIO, start: int, end: int):
+        """复制另一个导出文件中[start, end)字节区间的内容，reader需要有seek/read方法和filename属性
+        
+        db_exp的DumpReader透明解压压缩过的导出文件，此时区间是解压后的偏移。
+        """
+        reader.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = reader.read(min(remaining, self.COPY_CHUNK_SIZE))
+            if not chunk:
+                raise IOError(f"文件 {reader.filename} 长度不足，无法复制 {start}-{end} 字节区间")
+            self.write_bytes(chunk)
+            remaining -= len(chunk)
+    
+    def flush(self):
+        self.file.flush()
+    
+    def close(self):
+        if self.file is None:
+            return
+        self.flush()
+        if self.owns_file:
+            self.file.close()
+        self.file = None
+
+
+class CompressedFileSink(FileSink):
+    """压缩输出端，按块并行压缩
+    
+    写出的数据先攒成BLOCK_SIZE大小的块，每块在线程池中独立压缩成一个gzip成员或zstd帧，
+    再按原顺序写入文件(与pigz的做法相同)。多个成员/帧首尾相接仍是合法的.gz/.zst文件，
+    gunzip、zstd -d、zcat 都可以直接解压。zlib和zstd压缩时释放GIL，导出线程只负责把块
+    交给线程池，最多有threads * 2个块在排队，内存占用有上限。
+    
+    bytes_written和crc32按压缩前的数据统计，断点清单和元数据中的偏移量都是解压后的偏移量。
+    """
+    
+    BLOCK_SIZE = 1024 * 1024
+    SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+    DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+    
+    def __init__(self, filename: str, compression: str, threads: int = 2, level: Optional[int] = None,
+                 buffer_size: int = 1024 * 1024):
+        if compression == 'zstd' and zstandard is None:
+            raise RuntimeError("zstd压缩需要安装zstandard: pip install zstandard")
+        super().__init__(filename, buffer_size)
+        self.compression = compression
+        self.level = level if level is not None else self.DEFAULT_LEVELS[compression]
+        self.block: List[bytes] = []
+        self.block_size = 0
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.pending: deque = deque()
+        self.max_pending = threads * 2
+    
+    @classmethod
+    def detect(cls, filename: str) -> Optional[str]:
+        """根据文件扩展名判断压缩格式"""
+        for suffix, compression in cls.SUFFIXES.items():
+            if filename.endswith(suffix):
+                return compression
+        return None
+    
+    def compress_block(self, data: bytes) -> bytes:
+        if self.compression == 'gzip':
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+    
+    def write_bytes(self, data: bytes):
+        self.block.append(data)
+        self.block_size += len(data)
+        self.bytes_written += len(data)
+        self.crc32 = zlib.crc32(data, self.crc32)
+        if self.block_size >= self.BLOCK_SIZE:
+            self.submit_block()
+    
+    def submit_block(self):
+        """把当前块交给线程池压缩，排队的块过多时先写出最早的块"""
+        if not self.block:
+            return
+        data = b''.join(self.block)
+        self.block = []
+        self.block_size = 0
+        self.pending.append(self.executor.submit(self.compress_block, data))
+        while len(self.pending) > self.max_pending:
+            self.file.write(self.pending.popleft().result())
+    
+    def write_completed(self, wait: bool = False):
+        """按顺序写出已压缩完成的块，wait为True时等待所有块完成"""
+        while self.pending and (wait or self.pending[0].done()):
+            future: Future = self.pending.popleft()
+            self.file.write(future.result())
+    
+    def flush(self):
+        """只写出已压缩完成的块；未满的块留在缓冲中，避免每个导出单元都切出一个小块"""
+        self.write_completed()
+        self.file.flush()
+    
+    def close(self):
+        if self.file is None:
+            return
+        try:
+            self.submit_block()
+            self.write_completed(wait=True)
+        finally:
+            self.executor.shutdown()
+            super().close()
+
+
+def open_file_sink(filename: str, compression: Optional[str] = None, threads: int = 2,
+                   resume_offset: Optional[int] = None) -> FileSink:
+    """打开文件输出端：compression为None时按扩展名(.gz/.zst)判断，'none'表示不压缩"""
+    if compression is None:
+        compression = CompressedFileSink.detect(filename)
+    if compression and compression != 'none':
+        return CompressedFileSink(filename, compression, threads=threads)
+    return FileSink(filename, resume_offset=resume_offset)
+
+
+class ValueFormatter:
+    """SQL字面量格式化器
+    
+    按列的DATA_TYPE为每一列预先选定一个格式化函数，并按列(而不是逐个值)批量处理：
+    一批行先转置成列，字符串列拼接成一个长字符串后一次性完成转义再切分，数值列直接
+    map(str)，最后用预先生成的行模板拼出VALUES文本。这样每个值不再经过isinstance
+    判断和函数调用，格式化开销集中在C实现的字符串操作里。
+    
+    二进制值按binary_encoding写成十六进制(0x...)、_binary'...'或FROM_BASE64('...')。
+    BLOB/TEXT/JSON列中超过LOB_THRESHOLD的大值不走上面的字符串拼接，由encode_row
+    通过memoryview按块编码后直接追加到bytearray中，避免为整个值生成多份中间字符串。
+    """
+    
+    NUMERIC_TYPES = {'tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint',
+                     'decimal', 'numeric', 'float', 'double', 'real', 'year'}
+    STRING_TYPES = {'char', 'varchar', 'tinytext', 'text', 'mediumtext', 'longtext',
+                    'enum', 'set', 'json'}
+    BINARY_TYPES = {'binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob',
+                    'bit', 'geometry', 'point', 'linestring', 'polygon', 'multipoint',
+                    'multilinestring', 'multipolygon', 'geometrycollection', 'geomcollection'}
+    TEMPORAL_TYPES = {'date', 'datetime', 'timestamp'}
+    LOB_TYPES = {'tinyblob', 'blob', 'mediumblob', 'longblob',
+                 'tinytext', 'text', 'mediumtext', 'longtext', 'json'}
+    BINARY_ENCODINGS = ('hex', 'binary', 'base64')
+    
+    # 批量转义时用于拼接同一列各个值的分隔符(Unicode非字符)，数据中出现时退回逐个转义
+    SEPARATOR = '\uffff'
+    # 大字段的值超过这个长度(字节数或字符数)时按块编码
+    LOB_THRESHOLD = 64 * 1024
+    # 每块的大小，取3的倍数使各块的base64结果可以直接拼接
+    LOB_CHUNK_SIZE = 3 * 64 * 1024
+    # _binary'...'中需要转义的字节，与mysql_real_escape_string一致
+    BINARY_ESCAPES = str.maketrans({'\0': '\\0', "'": "\\'", '\\': '\\\\', '\n': '\\n',
+                                    '\r': '\\r', '\x1a': '\\Z'})
+    
+    def __init__(self, data_types: List[str], binary_encoding: str = 'hex'):
+        self.binary_encoding = binary_encoding
+        self.column_formatters = [self.column_formatter_for(data_type) for data_type in data_types]
+        if binary_encoding != 'hex':
+            self.column_formatters = [self.format_encoded_binary_column if formatter == ValueFormatter.format_binary_column
+                                      else formatter for formatter in self.column_formatters]
+        self.lob_columns = {index for index, data_type in enumerate(data_types)
+                            if (data_type or '').lower() in self.LOB_TYPES}
+        self.row_template = '(' + ', '.join(['%s'] * len(data_types)) + ')'
+    
+    @staticmethod
+    def escape_string(value: str) -> str:
+        """转义字符串中的反斜杠、单引号和换行符"""
+        return value.replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n').replace('\r', '\\r')
+    
+    @staticmethod
+    def format_time(value: Any) -> str:
+        """TIME列的值是timedelta，str()会得到'1 day, 2:00:00'这样MySQL无法识别的文本"""
+        if not isinstance(value, timedelta):
+            return f"'{value}'"
+        negative = value < timedelta(0)
+        if negative:
+            value = -value
+        total = value.days * 86400 + value.seconds
+        hours, remainder = divmod(total, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        text = f"{'-' if negative else ''}{hours:02d}:{minutes:02d}:{seconds:02d}"
+        if value.microseconds:
+            text += f".{value.microseconds:06d}"
+        return f"'{text}'"
+    
+    @classmethod
+    def format_value_column(cls, column: Tuple) -> List[str]:
+        format_value = cls.format_value
+        return [format_value(value) for value in column]
+    
+    @staticmethod
+    def format_numeric_column(column: Tuple) -> List[str]:
+        if None in column:
+            return ['NULL' if value is None else str(value) for value in column]
+        return list(map(str, column))
+    
+    @classmethod
+    def format_string_column(cls, column: Tuple) -> List[str]:
+        separator = cls.SEPARATOR
+        try:
+            joined = separator.join(column)
+        except TypeError:
+            # 含NULL或非字符串值
+            return cls.format_value_column(column)
+        if joined.count(separator) != len(column) - 1:
+            return cls.format_value_column(column)
+        escaped = cls.escape_string(joined)
+        return ("'" + escaped.replace(separator, "'" + separator + "'") + "'").split(separator)
+    
+    @classmethod
+    def format_quoted_column(cls, column: Tuple) -> List[str]:
+        """日期时间等str()结果不含需要转义字符的值，直接加引号"""
+        if None in column:
+            return ['NULL' if value is None else f"'{value}'" for value in column]
+        separator = cls.SEPARATOR
+        return ("'" + ("'" + separator + "'").join(map(str, column)) + "'").split(separator)
+    
+    @classmethod
+    def format_time_column(cls, column: Tuple) -> List[str]:
+        format_time = cls.format_time
+        return ['NULL' if value is None else format_time(value) for value in column]
+    
+    def format_row_values(self, rows: List[Tuple]) -> List[str]:
+        """将一批行分别格式化为VALUES元组文本"""
+        if not rows:
+            return []
+        columns = [formatter(column) for formatter, column in zip(self.column_formatters, zip(*rows))]
+        return list(map(self.row_template.__mod__, zip(*columns)))
+    
+    def format_row(self, row: Tuple) -> str:
+        """将一行数据格式化为VALUES元组文本"""
+        return self.format_row_values([row])[0]
+    
+    def format_rows(self, rows: List[Tuple]) -> str:
+        """将一批行格式化为多行INSERT的VALUES部分"""
+        return ',\n'.join(self.format_row_values(rows))
+    
+    @staticmethod
+    def format_value(value: Any) -> str:
+        """按Python类型格式化单个值，用于无法按列类型批量处理的情况"""
+        if value is None:
+            return 'NULL'
+        elif isinstance(value, str):
+            return f"'{ValueFormatter.escape_string(value)}'"
+        elif isinstance(value, (int, float, Decimal)):
+            return str(value)
+        elif isinstance(value, timedelta):
+            return ValueFormatter.format_time(value)
+        elif isinstance(value, bytes):
+            return f"0x{value.hex()}" if value else "''"
+        else:
+            return f"'{value}'"
+    
+    @classmethod
+    def format_binary_column(cls, column: Tuple) -> List[str]:
+        format_value = cls.format_value
+        return [(f"0x{value.hex()}" if value else "''") if value.__class__ is bytes else format_value(value)
+                for value in column]
+    
+    def format_encoded_binary_column(self, column: Tuple) -> List[str]:
+        """按binary_encoding格式化二进制列
+        
+        _binary编码中0x80以上的字节用surrogateescape映射成代理字符，输出端编码时原样
+        还原为原来的字节(PyMySQL执行语句时也是这样处理的)。
+        """
+        format_value = self.format_value
+        escapes = self.BINARY_ESCAPES
+        if self.binary_encoding == 'base64':
+            return [(f"FROM_BASE64('{base64.b64encode(value).decode('ascii')}')" if value else "''")
+                    if value.__class__ is bytes else format_value(value) for value in column]
+        return [("_binary'" + value.decode('ascii', 'surrogateescape').translate(escapes) + "'" if value else "''")
+                if value.__class__ is bytes else format_value(value) for value in column]
+    
+    def is_large_row(self, row: Tuple) -> bool:
+        """行中是否有超过LOB_THRESHOLD的大字段值"""
+        threshold = self.LOB_THRESHOLD
+        return any(row[index] is not None and len(row[index]) > threshold for index in self.lob_columns)
+    
+    def lob_size(self, row: Tuple) -> int:
+        """行中大字段值的总长度，用于限制一批行占用的内存"""
+        return sum(len(row[index]) for index in self.lob_columns if row[index] is not None)
+    
+    def iter_runs(self, rows: List[Tuple]) -> Iterator[Tuple[bool, List[Tuple]]]:
+        """把一批行分成连续的(是否带有大字段值, 行列表)段，没有大字段列时整批作为一段"""
+        if not self.lob_columns:
+            yield False, rows
+            return
+        for large, run in groupby(rows, key=self.is_large_row):
+            yield large, list(run)
+    
+    def iter_insert_statements(self, insert_head: str, rows: List[Tuple]) -> Iterator[Union[str, bytes]]:
+        """把一批行生成INSERT语句：连续的普通行合成一条，带有大字段值的行各自编码成一条bytearray"""
+        for large, run in self.iter_runs(rows):
+            if not large:
+                yield insert_head + self.format_rows(run) + ';'
+                continue
+            for row in run:
+                statement = bytearray(insert_head.encode('utf-8'))
+                self.encode_row(row, statement)
+                statement += b';'
+                yield statement
+    
+    def encode_row(self, row: Tuple, buffer: bytearray):
+        """把一行写成VALUES元组追加到buffer，大字段的值按块编码"""
+        threshold = self.LOB_THRESHOLD
+        buffer += b'('
+        for index, (formatter, value) in enumerate(zip(self.column_formatters, row)):
+            if index:
+                buffer += b', '
+            if index in self.lob_columns and value is not None and len(value) > threshold:
+                self.encode_lob(value, buffer)
+            else:
+                buffer += formatter((value,))[0].encode('utf-8', 'surrogateescape')
+        buffer += b')'
+    
+    def encode_lob(self, value: Union[str, bytes], buffer: bytearray):
+        """把一个大字段的值逐块编码后追加到buffer
+        
+        通过memoryview切片取块，每次只产生一块大小的临时对象，不会生成整个值的
+        十六进制字符串或转义后的副本。
+        """
+        size = self.LOB_CHUNK_SIZE
+        if isinstance(value, str):
+            escape_string = self.escape_string
+            buffer += b"'"
+            for start in range(0, len(value), size):
+                buffer += escape_string(value[start:start + size]).encode('utf-8')
+            buffer += b"'"
+            return
+        
+        view = memoryview(value)
+        if self.binary_encoding == 'base64':
+            buffer += b"FROM_BASE64('"
+            for start in range(0, len(view), size):
+                buffer += binascii.b2a_base64(view[start:start + size], newline=False)
+            buffer += b"')"
+        elif self.binary_encoding == 'binary':
+            escapes = self.BINARY_ESCAPES
+            buffer += b"_binary'"
+            for start in range(0, len(view), size):
+                text = str(view[start:start + size], 'ascii', 'surrogateescape')
+                buffer += text.translate(escapes).encode('utf-8', 'surrogateescape')
+            buffer += b"'"
+        else:
+            buffer += b'0x'
+            for start in range(0, len(view), size):
+                buffer += binascii.hexlify(view[start:start + size])
+    
+    @classmethod
+    def column_formatter_for(cls, data_type: str) -> Callable[[Tuple], List[str]]:
+        """根据列的DATA_TYPE选择列格式化函数"""
+        data_type = (data_type or '').lower()
+        if data_type in cls.NUMERIC_TYPES:
+            return cls.format_numeric_column
+        if data_type in cls.STRING_TYPES:
+            return cls.format_string_column
+        if data_type in cls.BINARY_TYPES:
+            return cls.format_binary_column
+        if data_type in cls.TEMPORAL_TYPES:
+            return cls.format_quoted_column
+        if data_type == 'time':
+            return cls.format_time_column
+        return cls.format_value_column
+
+
+class TsvFormatter:
+    """LOAD DATA文本格式化器，也用于TSV数据文件
+    
+    按LOAD DATA的默认格式(制表符分隔、换行结尾、反斜杠转义)批量格式化行，NULL写作\\N。
+    二进制列写成十六进制，由LOAD DATA的SET子句用UNHEX()还原；BIT列写成整数，
+    用CAST(... AS UNSIGNED)赋值(LOAD DATA不能直接装载BIT的二进制值)。
+    """
+    
+    NULL = '\\N'
+    SEPARATOR = ValueFormatter.SEPARATOR
+    # LOAD DATA默认的 ESCAPED BY '\\' 下需要转义的字符，反斜杠必须最先替换
+    # (dump_rewrite的TsvConverter也用这张表转义从SQL文件中取出的值)
+    ESCAPES = (('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r'), ('\0', '\\0'))
+    BYTE_ESCAPES = tuple((char.encode('ascii'), escaped.encode('ascii')) for char, escaped in ESCAPES)
+    
+    def __init__(self, data_types: List[str]):
+        data_types = [(data_type or '').lower() for data_type in data_types]
+        self.column_formatters = [self.column_formatter_for(data_type) for data_type in data_types]
+        self.column_setters = [self.column_setter_for(data_type) for data_type in data_types]
+    
+    @classmethod
+    def escape_string(cls, value: str) -> str:
+        """转义反斜杠、制表符、换行符、回车和NUL"""
+        for char, escaped in cls.ESCAPES:
+            value = value.replace(char, escaped)
+        return value
+    
+    @classmethod
+    def escape_bytes(cls, value: bytes) -> bytes:
+        """按字节转义，用于不解码的导出文件内容"""
+        for char, escaped in cls.BYTE_ESCAPES:
+            value = value.replace(char, escaped)
+        return value
+    
+    @classmethod
+    def format_value(cls, value: Any) -> str:
+        """按Python类型格式化单个值"""
+        if value is None:
+            return cls.NULL
+        elif isinstance(value, str):
+            return cls.escape_string(value)
+        elif isinstance(value, timedelta):
+            return ValueFormatter.format_time(value)[1:-1]
+        elif isinstance(value, bytes):
+            return value.hex()
+        else:
+            return cls.escape_string(str(value))
+    
+    @classmethod
+    def format_value_column(cls, column: Tuple) -> List[str]:
+        format_value = cls.format_value
+        return [format_value(value) for value in column]
+    
+    @classmethod
+    def format_plain_column(cls, column: Tuple) -> List[str]:
+        """数值、日期时间等str()结果不含需要转义字符的值"""
+        if None in column:
+            return [cls.NULL if value is None else str(value) for value in column]
+        return list(map(str, column))
+    
+    @classmethod
+    def format_string_column(cls, column: Tuple) -> List[str]:
+        separator = cls.SEPARATOR
+        try:
+            joined = separator.join(column)
+        except TypeError:
+            # 含NULL或非字符串值
+            return cls.format_value_column(column)
+        if joined.count(separator) != len(column) - 1:
+            return cls.format_value_column(column)
+        return cls.escape_string(joined).split(separator)
+    
+    @classmethod
+    def format_binary_column(cls, column: Tuple) -> List[str]:
+        return [cls.NULL if value is None else bytes(value).hex() for value in column]
+    
+    @classmethod
+    def format_bit_column(cls, column: Tuple) -> List[str]:
+        return [cls.NULL if value is None else str(int.from_bytes(value, 'big')) for value in column]
+    
+    def format_rows(self, rows: List[Tuple]) -> str:
+        """将一批行格式化为LOAD DATA文本"""
+        if not rows:
+            return ''
+        columns = [formatter(column) for formatter, column in zip(self.column_formatters, zip(*rows))]
+        return '\n'.join(map('\t'.join, zip(*columns))) + '\n'
+    
+    def load_data_sql(self, filename: str, table_name: str, column_names: List[str],
+                      replace: bool = False) -> str:
+        """生成导入filename的LOAD DATA LOCAL INFILE语句，replace为True时替换主键/唯一键冲突的行"""
+        targets = []
+        assignments = []
+        for index, (name, setter) in enumerate(zip(column_names, self.column_setters)):
+            if setter is None:
+                targets.append(f"`{name}`")
+            else:
+                variable = f"@c{index}"
+                targets.append(variable)
+                assignments.append(f"`{name}` = {setter.format(variable)}")
+        sql = (f"LOAD DATA LOCAL INFILE '{pymysql.converters.escape_string(filename)}' "
+               f"{'REPLACE ' if replace else ''}INTO TABLE `{table_name}` CHARACTER SET utf8mb4 "
+               f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+               f"({', '.join(targets)})")
+        if assignments:
+            sql += " SET " + ', '.join(assignments)
+        return sql
+    
+    @classmethod
+    def column_formatter_for(cls, data_type: str) -> Callable[[Tuple], List[str]]:
+        """根据列的DATA_TYPE选择列格式化函数"""
+        if data_type == 'bit':
+            return cls.format_bit_column
+        if data_type in ValueFormatter.BINARY_TYPES:
+            return cls.format_binary_column
+        if data_type in ValueFormatter.NUMERIC_TYPES or data_type in ValueFormatter.TEMPORAL_TYPES:
+            return cls.format_plain_column
+        if data_type in ValueFormatter.STRING_TYPES:
+            return cls.format_string_column
+        return cls.format_value_column
+    
+    @staticmethod
+    def column_setter_for(data_type: str) -> Optional[str]:
+        """需要经用户变量转换后赋值的列，返回SET子句的表达式模板"""
+        if data_type == 'bit':
+            return "CAST({} AS UNSIGNED)"
+        if data_type in ValueFormatter.BINARY_TYPES:
+            return "UNHEX({})"
+        return None
+
+
+class CsvFormatter(TsvFormatter):
+    """CSV格式化器(RFC 4180，逗号分隔，第一行为列名)
+    
+    NULL写成空字段，空字符串写成 ""，两者可以区分。含逗号、双引号或换行的值加双引号，
+    其中的双引号写两次。二进制列写成十六进制，BIT列写成整数。
+    """
+    
+    NULL = ''
+    SPECIAL = re.compile(r'[",\r\n]')
+    
+    @classmethod
+    def escape_string(cls, value: str) -> str:
+        if not value or cls.SPECIAL.search(value):
+            return '"' + value.replace('"', '""') + '"'
+        return value
+    
+    @classmethod
+    def format_string_column(cls, column: Tuple) -> List[str]:
+        separator = cls.SEPARATOR
+        try:
+            joined = separator.join(column)
+        except TypeError:
+            return cls.format_value_column(column)
+        # 没有空字符串和特殊字符时整列原样输出
+        if (joined.count(separator) != len(column) - 1 or cls.SPECIAL.search(joined)
+                or '' in column):
+            return cls.format_value_column(column)
+        return joined.split(separator)
+    
+    def format_header(self, column_names: List[str]) -> str:
+        return ','.join(self.escape_string(name) for name in column_names) + '\n'
+    
+    def format_rows(self, rows: List[Tuple]) -> str:
+        """将一批行格式化为CSV文本"""
+        if not rows:
+            return ''
+        columns = [formatter(column) for formatter, column in zip(self.column_formatters, zip(*rows))]
+        return '\n'.join(map(','.join, zip(*columns))) + '\n'
+
+
+class JsonLinesFormatter:
+    """JSON Lines格式化器，每行一个以列名为键的JSON对象
+    
+    数值写成JSON数字(DECIMAL保留原有的精度和小数位)，日期时间写成MySQL的
+    文本格式，JSON列原样嵌入，二进制列写成base64字符串，BIT列写成整数。
+    """
+    
+    def __init__(self, data_types: List[str], column_names: List[str]):
+        self.column_formatters = [self.column_formatter_for((data_type or '').lower()) for data_type in data_types]
+        self.row_template = '{' + ', '.join(json.dumps(name, ensure_ascii=False).replace('%', '%%') + ': %s'
+                                            for name in column_names) + '}'
+    
+    @staticmethod
+    def format_value(value: Any) -> str:
+        """按Python类型格式化单个值"""
+        if value is None:
+            return 'null'
+        elif isinstance(value, str):
+            return json.encoder.encode_basestring(value)
+        elif isinstance(value, (int, float, Decimal)):
+            return str(value)
+        elif isinstance(value, timedelta):
+            return '"' + ValueFormatter.format_time(value)[1:-1] + '"'
+        elif isinstance(value, (bytes, bytearray)):
+            return '"' + base64.b64encode(value).decode('ascii') + '"'
+        else:
+            return json.encoder.encode_basestring(str(value))
+    
+    @classmethod
+    def format_value_column(cls, column: Tuple) -> List[str]:
+        format_value = cls.format_value
+        return [format_value(value) for value in column]
+    
+    @staticmethod
+    def format_number_column(column: Tuple) -> List[str]:
+        if None in column:
+            return ['null' if value is None else str(value) for value in column]
+        return list(map(str, column))
+    
+    @staticmethod
+    def format_string_column(column: Tuple) -> List[str]:
+        encode = json.encoder.encode_basestring
+        return ['null' if value is None else encode(value) if value.__class__ is str else encode(str(value))
+                for value in column]
+    
+    @staticmethod
+    def format_quoted_column(column: Tuple) -> List[str]:
+        """日期时间的str()结果不含需要转义的字符"""
+        return ['null' if value is None else f'"{value}"' for value in column]
+    
+    @staticmethod
+    def format_json_column(column: Tuple) -> List[str]:
+        return ['null' if value is None else value for value in column]
+    
+    @staticmethod
+    def format_bit_column(column: Tuple) -> List[str]:
+        return ['null' if value is None else str(int.from_bytes(value, 'big')) for value in column]
+    
+    def format_rows(self, rows: List[Tuple]) -> str:
+        """将一批行格式化为JSON Lines文本"""
+        if not rows:
+            return ''
+        columns = [formatter(column) for formatter, column in zip(self.column_formatters, zip(*rows))]
+        return '\n'.join(map(self.row_template.__mod__, zip(*columns))) + '\n'
+    
+    @classmethod
+    def column_formatter_for(cls, data_type: str) -> Callable[[Tuple], List[str]]:
+        """根据列的DATA_TYPE选择列格式化函数"""
+        if data_type in ValueFormatter.NUMERIC_TYPES:
+            return cls.format_number_column
+        if data_type == 'json':
+            return cls.format_json_column
+        if data_type in ValueFormatter.STRING_TYPES:
+            return cls.format_string_column
+        if data_type in ValueFormatter.TEMPORAL_TYPES:
+            return cls.format_quoted_column
+        if data_type == 'bit':
+            return cls.format_bit_column
+        return cls.format_value_column
+
+
+class TextRowWriter:
+    """TSV/CSV/JSON Lines数据文件的写出器，文本写入FileSink(可以是压缩输出端)"""
+    
+    def __init__(self, sink: FileSink, formatter: Any):
+        self.sink = sink
+        self.formatter = formatter
+        self.rows = 0
+    
+    @property
+    def bytes_written(self) -> int:
+        return self.sink.bytes_written
+    
+    @property
+    def crc32(self) -> int:
+        return self.sink.crc32
+    
+    def write_rows(self, rows: List[Tuple]):
+        self.sink.write_bytes(self.formatter.format_rows(rows).encode('utf-8'))
+        self.rows += len(rows)
+    
+    def close(self):
+        self.sink.close()
+
+
+class ParquetRowWriter:
+    """Parquet数据文件的写出器(需要安装pyarrow)
+    
+    列类型按information_schema映射成Arrow类型：整数为int64(BIGINT UNSIGNED为uint64)，
+    DECIMAL为decimal128(精度, 小数位)(精度未知时为string)，FLOAT/DOUBLE为float32/float64，DATE为date32，
+    DATETIME/TIMESTAMP为timestamp(us)，TIME为duration(us)，二进制和BIT为binary，其余为string。
+    
+    游标中读出的行攒满ROW_GROUP_ROWS行就写成一个行组，内存中最多保留一个行组的数据。
+    写第一个行组时确定字典编码的列：不同值的个数不超过行数的DICTIONARY_RATIO(如国家、
+    机组类型这类低基数列)时使用字典编码，其余列使用普通编码。
+    """
+    
+    ROW_GROUP_ROWS = 100000
+    DICTIONARY_RATIO = 0.1
+    INTEGER_TYPES = {'tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint', 'year'}
+    
+    def __init__(self, filename: str, columns: List[Dict[str, Any]], compression: Optional[str] = None):
+        self.filename = filename
+        self.schema = pyarrow.schema([(column['COLUMN_NAME'], self.arrow_type(column)) for column in columns])
+        self.compression = compression or 'snappy'
+        self.writer = None
+        self.pending: List[Tuple] = []
+        self.rows = 0
+        self.bytes_written = 0
+        self.crc32 = 0
+    
+    @classmethod
+    def arrow_type(cls, column: Dict[str, Any]) -> 'pyarrow.DataType':
+        """information_schema中的列类型对应的Arrow类型"""
+        data_type = (column.get('DATA_TYPE') or '').lower()
+        if data_type in cls.INTEGER_TYPES:
+            if data_type == 'bigint' and 'unsigned' in (column.get('COLUMN_TYPE') or '').lower():
+                return pyarrow.uint64()
+            return pyarrow.int64()
+        if data_type in ('decimal', 'numeric'):
+            precision = column.get('NUMERIC_PRECISION')
+            scale = column.get('NUMERIC_SCALE')
+            if precision is None or scale is None:
+                # 不知道精度和小数位时写成字符串，不丢失数值
+                return pyarrow.string()
+            if precision > 38:
+                return pyarrow.decimal256(precision, scale)
+            return pyarrow.decimal128(precision, scale)
+        if data_type == 'float':
+            return pyarrow.float32()
+        if data_type in ('double', 'real'):
+            return pyarrow.float64()
+        if data_type == 'date':
+            return pyarrow.date32()
+        if data_type in ('datetime', 'timestamp'):
+            return pyarrow.timestamp('us')
+        if data_type == 'time':
+            return pyarrow.duration('us')
+        if data_type in ValueFormatter.BINARY_TYPES:
+            return pyarrow.binary()
+        return pyarrow.string()
+    
+    def to_array(self, column: Tuple, arrow_type: 'pyarrow.DataType') -> 'pyarrow.Array':
+        """把一列值转换成Arrow数组，无法转换的值(如驱动以字符串返回的零日期)写成NULL"""
+        if arrow_type == pyarrow.string():
+            column = [value if value is None or value.__class__ is str else str(value) for value in column]
+        try:
+            return pyarrow.array(column, type=arrow_type)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, TypeError, ValueError, OverflowError):
+            pass
+        values = []
+        invalid = []
+        for value in column:
+            try:
+                pyarrow.scalar(value, type=arrow_type)
+                values.append(value)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, TypeError, ValueError, OverflowError):
+                invalid.append(value)
+                values.append(None)
+        logging.warning(f"{self.filename}: {len(invalid)} 个值无法转换为 {arrow_type}，写为NULL (如 {invalid[0]!r})")
+        return pyarrow.array(values, type=arrow_type)
+    
+    def open_writer(self, columns: List[Tuple]):
+        dictionary = [field.name for field, column in zip(self.schema, columns)
+                      if len(set(column)) <= len(column) * self.DICTIONARY_RATIO]
+        logging.debug(f"{self.filename}: 字典编码的列 {dictionary}")
+        self.writer = pyarrow.parquet.ParquetWriter(self.filename, self.schema, compression=self.compression,
+                                                    use_dictionary=dictionary or False)
+    
+    def write_row_group(self, rows: List[Tuple]):
+        columns = list(zip(*rows))
+        if self.writer is None:
+            self.open_writer(columns)
+        arrays = [self.to_array(column, field.type) for column, field in zip(columns, self.schema)]
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema), row_group_size=len(rows))
+        self.rows += len(rows)
+    
+    def write_rows(self, rows: List[Tuple]):
+        self.pending.extend(rows)
+        while len(self.pending) >= self.ROW_GROUP_ROWS:
+            self.write_row_group(self.pending[:self.ROW_GROUP_ROWS])
+            del self.pending[:self.ROW_GROUP_ROWS]
+    
+    def close(self):
+        """写出剩余的行并关闭文件，统计文件的字节数和CRC32"""
+        if self.pending:
+            self.write_row_group(self.pending)
+            self.pending = []
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.filename, self.schema, compression=self.compression)
+        self.writer.close()
+        with open(self.filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(FileSink.COPY_CHUNK_SIZE), b''):
+                self.bytes_written += len(chunk)
+                self.crc32 = zlib.crc32(chunk, self.crc32)
+
+
+def open_row_writer(data_format: str, filename: str, columns: List[Dict[str, Any]],
+                    compression: Optional[str] = None, threads: int = 2) -> Any:
+    """打开TSV/CSV/JSON Lines/Parquet数据文件的写出器
+    
+    columns为information_schema中的列信息(COLUMN_NAME、DATA_TYPE，Parquet还用到COLUMN_TYPE、
+    NUMERIC_PRECISION、NUMERIC_SCALE)。compression为gzip/zstd时文本格式整个文件压缩，
+    Parquet使用同名的列压缩编码(默认snappy)。
+    """
+    if data_format == 'parquet':
+        return ParquetRowWriter(filename, columns, compression)
+    
+    data_types = [column['DATA_TYPE'] for column in columns]
+    column_names = [column['COLUMN_NAME'] for column in columns]
+    if data_format == 'jsonl':
+        formatter = JsonLinesFormatter(data_types, column_names)
+    elif data_format == 'csv':
+        formatter = CsvFormatter(data_types)
+    else:
+        formatter = TsvFormatter(data_types)
+    sink = open_file_sink(filename, compression or 'none', threads)
+    if data_format == 'csv':
+        sink.write_bytes(formatter.format_header(column_names).encode('utf-8'))
+    return TextRowWriter(sink, formatter)
+
+
+class SecondaryIndexes:
+    """从SHOW CREATE TABLE的输出中拆出二级索引，导入数据后再统一创建
+    
+    主键、唯一键留在CREATE TABLE中(决定数据的唯一性)，用到外键列或AUTO_INCREMENT列的
+    索引也保留(建表的前提条件)，复合索引的任何一列是这样的列都保留。其余 KEY/INDEX/
+    FULLTEXT/SPATIAL 索引(包括前缀索引)从建表语句中移除，导入数据后合并成一条
+    ALTER TABLE ... ADD ... 语句，由InnoDB排序后批量构建，比逐行维护快得多。FULLTEXT索引
+    每条ALTER只能创建一个，单独成句。函数索引等无法解析出列的索引留在建表语句中。
+    """
+    
+    INDEX_LINE = re.compile(r'^\s*(FULLTEXT\s+|SPATIAL\s+)?(?:KEY|INDEX)\s+`(?:[^`]|``)+`\s*'
+                            r'\(((?:\s*`(?:[^`]|``)+`(?:\(\d+\))?(?:\s+(?:ASC|DESC))?\s*,?)+)\)', re.I)
+    COLUMN_NAME = re.compile(r'`((?:[^`]|``)+)`')
+    FOREIGN_KEY = re.compile(r'FOREIGN KEY\s*\(([^)]*)\)', re.I)
+    AUTO_INCREMENT_COLUMN = re.compile(r'^\s*`((?:[^`]|``)+)`[^\n]*\bAUTO_INCREMENT\b', re.I | re.M)
+    
+    @classmethod
+    def split(cls, create_sql: str) -> Tuple[str, List[str]]:
+        """返回去掉二级索引的建表语句，以及被移除的索引定义"""
+        required = {column for match in cls.FOREIGN_KEY.finditer(create_sql)
+                    for column in cls.COLUMN_NAME.findall(match.group(1))}
+        required |= {match.group(1) for match in cls.AUTO_INCREMENT_COLUMN.finditer(create_sql)}
+        
+        kept: List[str] = []
+        indexes: List[str] = []
+        for line in create_sql.split('\n'):
+            match = cls.INDEX_LINE.match(line)
+            if match and required.isdisjoint(cls.COLUMN_NAME.findall(match.group(2))):
+                indexes.append(line.strip().rstrip(','))
+            else:
+                kept.append(line)
+        if not indexes:
+            return create_sql, []
+        
+        # 移除索引行后，列定义部分的最后一行不能再以逗号结尾
+        for i in range(1, len(kept)):
+            if kept[i].lstrip().startswith(')'):
+                if kept[i - 1].rstrip().endswith(','):
+                    kept[i - 1] = kept[i - 1].rstrip()[:-1]
+                break
+        return '\n'.join(kept), indexes
+    
+    @staticmethod
+    def alter_statements(table_name: str, indexes: List[str]) -> List[str]:
+        """把索引定义合并成ALTER TABLE语句，FULLTEXT索引各自单独一条"""
+        regular = [index for index in indexes if not index.upper().startswith('FULLTEXT')]
+        fulltext = [index for index in indexes if index.upper().startswith('FULLTEXT')]
+        statements = []
+        if regular:
+            statements.append(f"ALTER TABLE `{table_name}` " + ', '.join(f"ADD {index}" for index in regular))
+        for index in fulltext:
+            statements.append(f"ALTER TABLE `{table_name}` ADD {index}")
+        return statements
\ No newline at end of file
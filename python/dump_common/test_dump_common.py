@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""dump_common 共用组件的测试"""
+
+import base64
+import csv
+import io
+import json
+
+from dump_common import SecondaryIndexes, TsvFormatter, CsvFormatter, JsonLinesFormatter
+
+
+CREATE_ORDERS = """CREATE TABLE `orders` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `customer_id` int NOT NULL,
+  `region_id` int NOT NULL,
+  `status` varchar(20) NOT NULL,
+  `note` text,
+  `created_at` datetime NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_status_id` (`status`,`id`),
+  KEY `idx_status_created` (`status`,`created_at`),
+  KEY `idx_created_customer` (`created_at`,`customer_id`),
+  KEY `idx_note` (`note`(32)),
+  KEY `idx_region_desc` (`created_at` DESC,`region_id`),
+  FULLTEXT KEY `ft_note` (`note`),
+  FULLTEXT KEY `ft_status_note` (`status`,`note`),
+  CONSTRAINT `fk_customer` FOREIGN KEY (`customer_id`) REFERENCES `customers` (`id`),
+  CONSTRAINT `fk_region` FOREIGN KEY (`status`, `region_id`) REFERENCES `regions` (`code`, `id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+
+
+def test_split_keeps_composite_indexes_on_foreign_key_columns():
+    create_sql, indexes = SecondaryIndexes.split(CREATE_ORDERS)
+    # 外键列不在第一列的复合索引也要保留，否则外键约束缺少可用的索引
+    assert 'KEY `idx_created_customer`' in create_sql
+    assert 'KEY `idx_region_desc`' in create_sql
+    # 复合外键的任何一列出现在索引中都保留
+    assert 'KEY `idx_status_created`' in create_sql
+    assert 'FULLTEXT KEY `ft_status_note`' in create_sql
+    assert 'UNIQUE KEY `uk_status_id`' in create_sql
+    assert indexes == ['KEY `idx_note` (`note`(32))', 'FULLTEXT KEY `ft_note` (`note`)']
+
+
+def test_split_prefix_and_fulltext_indexes():
+    create_sql = """CREATE TABLE `articles` (
+  `id` int NOT NULL,
+  `title` varchar(200) NOT NULL,
+  `body` longtext,
+  PRIMARY KEY (`id`),
+  KEY `idx_title` (`title`(20),`id`),
+  FULLTEXT KEY `ft_title` (`title`),
+  FULLTEXT KEY `ft_body` (`title`,`body`) /*!50100 WITH PARSER `ngram` */
+) ENGINE=InnoDB"""
+    stripped, indexes = SecondaryIndexes.split(create_sql)
+    assert indexes == ['KEY `idx_title` (`title`(20),`id`)', 'FULLTEXT KEY `ft_title` (`title`)',
+                       'FULLTEXT KEY `ft_body` (`title`,`body`) /*!50100 WITH PARSER `ngram` */']
+    # 移除索引后主键是最后一个定义，不能留下逗号
+    assert '  PRIMARY KEY (`id`)\n) ENGINE=InnoDB' in stripped
+    assert SecondaryIndexes.alter_statements('articles', indexes) == [
+        "ALTER TABLE `articles` ADD KEY `idx_title` (`title`(20),`id`)",
+        "ALTER TABLE `articles` ADD FULLTEXT KEY `ft_title` (`title`)",
+        "ALTER TABLE `articles` ADD FULLTEXT KEY `ft_body` (`title`,`body`) /*!50100 WITH PARSER `ngram` */",
+    ]
+
+
+def test_split_keeps_indexes_on_auto_increment_column():
+    create_sql = """CREATE TABLE `events` (
+  `tenant_id` int NOT NULL,
+  `seq` bigint NOT NULL AUTO_INCREMENT,
+  `kind` varchar(10) DEFAULT NULL,
+  PRIMARY KEY (`tenant_id`,`seq`),
+  KEY `idx_kind_seq` (`kind`,`seq`),
+  KEY `idx_seq` (`seq`),
+  KEY `idx_kind` (`kind`)
+) ENGINE=InnoDB AUTO_INCREMENT=42"""
+    stripped, indexes = SecondaryIndexes.split(create_sql)
+    assert indexes == ['KEY `idx_kind` (`kind`)']
+    assert 'KEY `idx_kind_seq` (`kind`,`seq`),\n  KEY `idx_seq` (`seq`)\n) ENGINE' in stripped
+
+
+def test_split_leaves_functional_indexes_and_plain_tables_alone():
+    create_sql = """CREATE TABLE `t` (
+  `id` int NOT NULL,
+  `doc` json DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_expr` ((cast(json_extract(`doc`,_utf8mb4'$.a') as unsigned)))
+) ENGINE=InnoDB"""
+    assert SecondaryIndexes.split(create_sql) == (create_sql, [])
+    assert SecondaryIndexes.alter_statements('t', []) == []
+
+
+LOAD_DATA_UNESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+
+def load_data_fields(line: str) -> list:
+    """按LOAD DATA默认的 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' 规则解析一行"""
+    fields = []
+    for field in line.split('\t'):
+        if field == '\\N':
+            fields.append(None)
+            continue
+        value = []
+        chars = iter(field)
+        for char in chars:
+            if char == '\\':
+                char = next(chars)
+                value.append(LOAD_DATA_UNESCAPES.get(char, char))
+            else:
+                value.append(char)
+        fields.append(''.join(value))
+    return fields
+
+
+TSV_ROWS = [
+    (1, 'plain', b'\x00\x01\xff', None),
+    (2, 'tab\there', b'', 'line\nbreak'),
+    (3, 'back\\slash \\N \\t', b'\t\n\\', 'cr\r and nul\0'),
+    (4, None, None, ''),
+    (5, '\\', bytes(range(256)), 'N'),
+]
+
+
+def test_tsv_round_trip_through_load_data_rules():
+    formatter = TsvFormatter(['int', 'varchar', 'varbinary', 'text'])
+    text = formatter.format_rows(TSV_ROWS)
+    lines = text.split('\n')
+    # 值中的换行和制表符都已转义，每行数据正好一行、四个字段
+    assert lines[-1] == '' and len(lines) == len(TSV_ROWS) + 1
+    for row, line in zip(TSV_ROWS, lines):
+        number, string, binary, note = load_data_fields(line)
+        assert int(number) == row[0]
+        assert string == row[1]
+        # 二进制列由LOAD DATA的SET子句用UNHEX()还原
+        assert (None if binary is None else bytes.fromhex(binary)) == row[2]
+        assert note == row[3]
+
+
+def test_tsv_value_fallback_matches_column_formatters():
+    # 列类型未知时逐个按Python类型格式化，结果与按列类型批量格式化相同
+    typed = TsvFormatter(['int', 'varchar', 'varbinary', 'text']).format_rows(TSV_ROWS)
+    untyped = TsvFormatter(['', '', '', '']).format_rows(TSV_ROWS)
+    assert typed == untyped
+    assert TsvFormatter.escape_bytes(b'a\\b\tc\nd\re\0f') == TsvFormatter.escape_string('a\\b\tc\nd\re\0f').encode()
+
+
+def test_load_data_sql_converts_binary_and_bit_columns():
+    formatter = TsvFormatter(['int', 'varbinary', 'bit'])
+    assert formatter.format_rows([(7, b'\xab', b'\x01\x02')]) == '7\tab\t258\n'
+    sql = formatter.load_data_sql("/tmp/o'rders.tsv", 'orders', ['id', 'data', 'flags'], replace=True)
+    assert sql.startswith("LOAD DATA LOCAL INFILE '/tmp/o\\'rders.tsv' REPLACE INTO TABLE `orders`")
+    assert sql.endswith("(`id`, @c1, @c2) SET `data` = UNHEX(@c1), `flags` = CAST(@c2 AS UNSIGNED)")
+
+
+def test_csv_and_json_lines_round_trip():
+    rows = [(1, 'a,"b"', b'\x00'), (2, '', None), (3, None, b''), (4, 'multi\nline', b'\xff')]
+    formatter = CsvFormatter(['int', 'varchar', 'blob'])
+    text = formatter.format_header(['id', 'name', 'data']) + formatter.format_rows(rows)
+    parsed = list(csv.reader(io.StringIO(text, newline='')))
+    assert parsed[0] == ['id', 'name', 'data']
+    # NULL是空字段，空字符串是 ""，csv模块读出来都是空字符串，只能从原文区分
+    assert parsed[1:] == [['1', 'a,"b"', '00'], ['2', '', ''], ['3', '', ''], ['4', 'multi\nline', 'ff']]
+    assert '\n2,"",\n' in text and '\n3,,\n' in text
+    
+    formatter = JsonLinesFormatter(['int', 'varchar', 'blob'], ['id', 'name', 'data'])
+    decoded = [json.loads(line) for line in formatter.format_rows(rows).splitlines()]
+    assert decoded == [{'id': row[0], 'name': row[1],
+                        'data': None if row[2] is None else base64.b64encode(row[2]).decode('ascii')}
+                       for row in rows]
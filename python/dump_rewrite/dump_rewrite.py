@@ -0,0 +1,698 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQL导出文件改写工具
+以内存映射方式流式解析已有的SQL导出文件，把逐行INSERT合并成不超过数据包上限的多行INSERT，
+或者把表数据转换成TSV文件，并统计每个表的行数和字节数
+"""
+
+import argparse
+import sys
+import os
+import re
+import mmap
+import json
+import base64
+import logging
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator, BinaryIO
+from tqdm import tqdm
+
+# 与db_exp、tab_exp共用的组件位于同级的dump_common目录
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(TOOLS_DIR, 'dump_common'))
+
+from dump_common import TsvFormatter
+
+
+class DumpScanner:
+    """在内存映射的SQL文件上逐条切分语句
+    
+    与db_restore的SqlStatementReader规则相同：识别单引号、双引号字符串中的反斜杠转义
+    和重复引号，反引号标识符，-- 与 # 行注释，/* */ 块注释(/*! */ 条件注释属于语句)，
+    以及mysql客户端的DELIMITER指令。不同的是直接在映射的字节上用正则表达式查找，
+    只返回语句的起止位置，不复制文本，文件多大内存占用都不变。
+    
+    迭代返回的事件：
+    - ('comment', start, end): 语句之间的注释
+    - ('delimiter', 分隔符): DELIMITER指令
+    - ('statement', start, end): 一条语句，不含结尾的分隔符和空白
+    """
+    
+    # 展开循环写法的字符串匹配，长字符串也不会逐字符回溯
+    QUOTED = {
+        b"'": rb"'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'",
+        b'"': rb'"[^"\\]*(?:(?:\\.|"")[^"\\]*)*"',
+        b'`': rb'`[^`]*(?:``[^`]*)*`',
+    }
+    QUOTE_ENDS = {quote: re.compile(pattern[1:], re.S) for quote, pattern in QUOTED.items()}
+    WHITESPACE = re.compile(rb'\s*')
+    LEADING_COMMENT = re.compile(rb'(?:--(?=\s)|#)[^\n]*\n?|/\*(?!!).*?\*/', re.S)
+    DELIMITER_COMMAND = re.compile(rb'DELIMITER[ \t]+(\S+)[^\n]*\n?', re.I)
+    MATCH_REPEAT = 4096
+    
+    def __init__(self, data):
+        self.data = data
+        self.delimiter = b';'
+    
+    def statement_pattern(self) -> 're.Pattern':
+        """当前分隔符下一条语句的正文
+        
+        匹配分隔符之前的普通字符、完整的字符串和标识符、注释，以及不构成分隔符的
+        注释起始字符。字符串没有结束时匹配停在引号处。正则引擎为每次重复保存回溯状态，
+        重复次数不限时很长的语句会占用数倍于语句长度的内存，所以每次最多匹配
+        MATCH_REPEAT 个片段，由调用方循环。
+        """
+        delimiter = self.delimiter
+        lone = re.escape(b'/-' + delimiter[:1])
+        plain = re.escape(b'\'"`/#-' + delimiter[:1])
+        return re.compile(
+            rb'(?:[^' + plain + rb']+|' + rb'|'.join(self.QUOTED.values()) +
+            rb'|/\*.*?(?:\*/|\Z)|(?:--(?=\s)|#)[^\n]*|(?!' + re.escape(delimiter) + rb')[' + lone + rb'])'
+            rb'{0,%d}' % self.MATCH_REPEAT, re.S)
+    
+    def __iter__(self) -> Iterator[Tuple]:
+        data = self.data
+        length = len(data)
+        whitespace = self.WHITESPACE
+        statement = self.statement_pattern()
+        pos = 0
+        
+        while True:
+            # 语句之间：空白、注释和DELIMITER指令
+            pos = whitespace.match(data, pos).end()
+            if pos >= length:
+                return
+            first = data[pos]
+            if first in b'-#/':
+                match = self.LEADING_COMMENT.match(data, pos)
+                if match:
+                    yield 'comment', pos, match.end()
+                    pos = match.end()
+                    continue
+            elif first in b'Dd':
+                match = self.DELIMITER_COMMAND.match(data, pos)
+                if match:
+                    self.delimiter = match.group(1)
+                    statement = self.statement_pattern()
+                    yield 'delimiter', self.delimiter
+                    pos = match.end()
+                    continue
+            
+            start = pos
+            while True:
+                end = statement.match(data, pos).end()
+                if end >= length:
+                    pos = end
+                    break
+                if data[end:end + len(self.delimiter)] == self.delimiter:
+                    pos = end + len(self.delimiter)
+                    break
+                if end == pos:
+                    # 字符串没有结束，剩余部分都属于这条语句
+                    logging.warning(f"位置 {pos} 处的字符串到文件结尾都没有结束")
+                    end = pos = length
+                    break
+                pos = end
+            
+            while end > start and data[end - 1] in b' \t\r\n':
+                end -= 1
+            if end > start:
+                yield 'statement', start, end
+
+
+class InsertParser:
+    """解析 INSERT ... VALUES (...), (...) 语句中的值列表
+    
+    只处理值列表之后没有其他子句(ON DUPLICATE KEY UPDATE等)的INSERT/REPLACE，其他形式
+    (INSERT ... SELECT、INSERT ... SET)返回None，由调用方原样输出。
+    """
+    
+    IDENTIFIER = rb'(?:`(?:[^`]|``)+`|[\w$]+)'
+    HEAD = re.compile(rb'(?:INSERT|REPLACE)\s+(?:(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE)\s+)*(?:INTO\s+)?'
+                      rb'(' + IDENTIFIER + rb')(?:\s*\.\s*(' + IDENTIFIER + rb'))?\s*'
+                      rb'(\((?:`(?:[^`]|``)*`|[^)`])*\))?\s*VALUES?\s*', re.I)
+    # 不含括号嵌套的一行，绝大多数行可以一次匹配
+    FLAT_ROW = re.compile(rb"""\((?:[^'"()]+|""" + DumpScanner.QUOTED[b"'"] + rb'|' + DumpScanner.QUOTED[b'"'] +
+                          rb""")*\)""", re.S)
+    FLAT_VALUE = re.compile(rb"""(?:[^'"(),]+|""" + DumpScanner.QUOTED[b"'"] + rb'|' + DumpScanner.QUOTED[b'"'] +
+                            rb')+', re.S)
+    TOKEN = re.compile(rb"""['"()]""")
+    VALUE_TOKEN = re.compile(rb"""['"(),]""")
+    WHITESPACE = re.compile(rb'\s*')
+    # 行位置列表最多占用的语句长度，更长的语句先完整校验一遍，再逐行返回
+    LIST_LIMIT = 16 * 1024 * 1024
+    
+    @classmethod
+    def match_head(cls, data, start: int, end: int) -> Optional[Tuple[bytes, str, Optional[bytes]]]:
+        """返回(语句头, 表名, 列清单)，语句头为 VALUES 之前的部分，不是带值列表的INSERT时返回None"""
+        match = cls.HEAD.match(data, start, end)
+        if match is None:
+            return None
+        table = match.group(2) or match.group(1)
+        if table.startswith(b'`'):
+            table = table[1:-1].replace(b'``', b'`')
+        head = data[start:match.end()].rstrip()
+        return head, table.decode('utf-8', 'surrogateescape'), match.group(3)
+    
+    @classmethod
+    def nested_row_end(cls, data, pos: int, end: int) -> int:
+        """含括号嵌套(函数调用等)的一行的结束位置"""
+        quote_ends = DumpScanner.QUOTE_ENDS
+        row_start = pos
+        depth = 0
+        while True:
+            match = cls.TOKEN.search(data, pos, end)
+            if match is None:
+                raise ValueError(f"位置 {row_start} 处的值列表没有结束")
+            token = match.group()
+            pos = match.end()
+            if token == b'(':
+                depth += 1
+            elif token == b')':
+                depth -= 1
+                if depth == 0:
+                    return pos
+            else:
+                quote_end = quote_ends[token].match(data, pos, end)
+                if quote_end is None:
+                    raise ValueError(f"位置 {match.start()} 处的字符串没有结束")
+                pos = quote_end.end()
+    
+    @classmethod
+    def iter_rows(cls, data, pos: int, end: int) -> Iterator[Tuple[int, int]]:
+        """逐个返回值列表中每行 (...) 的起止位置，值列表格式不对或后面还有其他子句时抛出ValueError"""
+        whitespace = cls.WHITESPACE
+        flat_row = cls.FLAT_ROW
+        while True:
+            pos = whitespace.match(data, pos, end).end()
+            if data[pos:pos + 1] != b'(':
+                raise ValueError(f"位置 {pos} 处不是值列表")
+            row_start = pos
+            match = flat_row.match(data, pos, end)
+            pos = match.end() if match else cls.nested_row_end(data, pos, end)
+            yield row_start, pos
+            
+            pos = whitespace.match(data, pos, end).end()
+            if pos >= end:
+                return
+            if data[pos:pos + 1] != b',':
+                raise ValueError(f"位置 {pos} 处的值列表后还有其他子句")
+            pos += 1
+    
+    @classmethod
+    def rows(cls, data, pos: int, end: int) -> Optional[Iterable[Tuple[int, int]]]:
+        """值列表中各行的起止位置，不能合并时返回None
+        
+        一般的语句直接返回位置列表；超过LIST_LIMIT的语句(单条INSERT包含整张大表)先
+        扫描一遍确认格式，再返回生成器逐行读取，不在内存中保存所有行的位置。
+        """
+        try:
+            if end - pos <= cls.LIST_LIMIT:
+                return list(cls.iter_rows(data, pos, end))
+            for _ in cls.iter_rows(data, pos, end):
+                pass
+        except ValueError as e:
+            logging.debug(f"INSERT语句不能合并，原样输出: {e}")
+            return None
+        return cls.iter_rows(data, pos, end)
+    
+    @classmethod
+    def split_values(cls, row: bytes) -> List[bytes]:
+        """把一行 (...) 拆成各个值的SQL文本"""
+        if cls.FLAT_ROW.fullmatch(row):
+            return [value.strip() for value in cls.FLAT_VALUE.findall(row, 1, len(row) - 1)]
+        quote_ends = DumpScanner.QUOTE_ENDS
+        values = []
+        start = pos = 1
+        end = len(row) - 1
+        depth = 0
+        while True:
+            match = cls.VALUE_TOKEN.search(row, pos, end)
+            if match is None:
+                values.append(row[start:end].strip())
+                return values
+            token = match.group()
+            pos = match.end()
+            if token == b',':
+                if depth == 0:
+                    values.append(row[start:match.start()].strip())
+                    start = pos
+            elif token == b'(':
+                depth += 1
+            elif token == b')':
+                depth -= 1
+            else:
+                quote_end = quote_ends[token].match(row, pos, end)
+                pos = end if quote_end is None else quote_end.end()
+
+
+class TsvConverter:
+    """把SQL值转换成TSV字段
+    
+    与db_exp/tab_exp的TSV数据文件格式相同(LOAD DATA的默认格式)：制表符分隔，NULL写作\\N，
+    反斜杠、制表符、换行符、回车和NUL用dump_common中TsvFormatter的转义表转义；二进制值
+    (0x...、X'...'、_binary'...'、FROM_BASE64('...'))写成十六进制，导入时用UNHEX()还原。
+    数字等其他值原样写出。
+    """
+    
+    UNESCAPES = {b'0': b'\0', b'b': b'\b', b'n': b'\n', b'r': b'\r', b't': b'\t', b'Z': b'\x1a',
+                 b'%': b'\\%', b'_': b'\\_'}
+    STRING_ESCAPE = re.compile(rb"\\(.)|''|\"\"", re.S)
+    INTRODUCER = re.compile(rb"_(\w+)\s*(?=['\"])")
+    BASE64_CALL = re.compile(rb"FROM_BASE64\(\s*'([^']*)'\s*\)", re.I)
+    
+    @classmethod
+    def unescape_match(cls, match: 're.Match') -> bytes:
+        char = match.group(1)
+        if char is None:
+            return match.group()[:1]
+        return cls.UNESCAPES.get(char, char)
+    
+    @classmethod
+    def unquote(cls, literal: bytes) -> bytes:
+        """去掉引号并还原转义"""
+        text = literal[1:-1]
+        if b'\\' in text or literal[:1] * 2 in text:
+            text = cls.STRING_ESCAPE.sub(cls.unescape_match, text)
+        return text
+    
+    @classmethod
+    def field(cls, value: bytes) -> bytes:
+        """单个SQL值对应的TSV字段"""
+        escape = TsvFormatter.escape_bytes
+        first = value[:1]
+        if first == b"'" or first == b'"':
+            return escape(cls.unquote(value))
+        if value.upper() == b'NULL':
+            return b'\\N'
+        if first == b'0' and value[1:2] in (b'x', b'X'):
+            return value[2:].lower()
+        if first in (b'x', b'X') and value[1:2] == b"'":
+            return value[2:-1].lower()
+        if first == b'_':
+            match = cls.INTRODUCER.match(value)
+            if match:
+                text = cls.unquote(value[match.end():])
+                return text.hex().encode() if match.group(1).lower() == b'binary' else escape(text)
+        match = cls.BASE64_CALL.fullmatch(value)
+        if match:
+            return base64.b64decode(match.group(1)).hex().encode()
+        return escape(value)
+    
+    @classmethod
+    def row(cls, row: bytes) -> bytes:
+        """一行 (...) 对应的TSV行"""
+        return b'\t'.join(map(cls.field, InsertParser.split_values(row))) + b'\n'
+
+
+class SqlRewriter:
+    """改写成多行INSERT的SQL文件
+    
+    连续的、语句头(表名、列清单、INSERT/REPLACE/IGNORE)相同的INSERT合并成一条，
+    每条语句不超过max_packet字节；单行本身超过上限时单独成句。其他语句、注释和
+    DELIMITER指令按原来的顺序原样写出。
+    """
+    
+    # 为协议包头等预留的字节数，与tab_exp相同
+    PACKET_MARGIN = 1024
+    
+    def __init__(self, output: BinaryIO, max_packet: int):
+        self.output = output
+        self.max_packet = max_packet
+        self.head: Optional[bytes] = None
+        self.table: Optional[str] = None
+        self.rows: List[bytes] = []
+        self.size = 0
+        self.delimiter = b';'
+        self.stats: Dict[str, Dict[str, int]] = {}
+    
+    def write(self, text: bytes):
+        self.output.write(text)
+    
+    def comment(self, text: bytes):
+        self.flush()
+        self.write(text if text.endswith(b'\n') else text + b'\n')
+    
+    def set_delimiter(self, delimiter: bytes):
+        self.flush()
+        self.delimiter = delimiter
+        self.write(b'DELIMITER ' + delimiter + b'\n')
+    
+    def statement(self, text: bytes):
+        self.flush()
+        self.write(text + self.delimiter + b'\n')
+    
+    def insert_rows(self, table: str, head: bytes, columns: Optional[bytes], data,
+                    rows: Iterable[Tuple[int, int]]) -> int:
+        """追加一条INSERT的各行，语句头与正在合并的不同或超过上限时先写出已合并的部分，返回行数"""
+        if head != self.head:
+            self.flush()
+            self.head = head
+            self.table = table
+            self.size = len(head) + 1 + len(self.delimiter) + 1
+        limit = self.max_packet - self.PACKET_MARGIN
+        count = 0
+        for row_start, row_end in rows:
+            if self.rows and self.size + row_end - row_start + 2 > limit:
+                self.flush()
+                self.head = head
+                self.table = table
+                self.size = len(head) + 1 + len(self.delimiter) + 1
+            self.rows.append(data[row_start:row_end])
+            self.size += row_end - row_start + 2
+            count += 1
+        return count
+    
+    def flush(self):
+        """写出正在合并的INSERT"""
+        if self.rows:
+            statement = self.head + b'\n' + b',\n'.join(self.rows) + self.delimiter + b'\n'
+            self.write(statement)
+            stats = self.stats.setdefault(self.table, {'output_statements': 0, 'output_bytes': 0})
+            stats['output_statements'] += 1
+            stats['output_bytes'] += len(statement)
+            self.rows = []
+        self.head = None
+        self.table = None
+    
+    def close(self):
+        self.flush()
+
+
+class TsvRewriter:
+    """把表数据转换成TSV文件
+    
+    每个表一个 <表名>.tsv 文件，行的列顺序与INSERT中相同；建表语句等其他语句按原来
+    的顺序写入 schema.sql，不能转换的INSERT(带ON DUPLICATE KEY UPDATE等子句)也写入
+    schema.sql，不会丢失数据。同一时间只打开一个数据文件。
+    """
+    
+    SCHEMA_FILE = 'schema.sql'
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.schema = open(os.path.join(directory, self.SCHEMA_FILE), 'wb', buffering=1024 * 1024)
+        self.sql = SqlRewriter(self.schema, 0)
+        self.table: Optional[str] = None
+        self.data_file: Optional[BinaryIO] = None
+        self.files: Dict[str, str] = {}
+        self.columns: Dict[str, Optional[bytes]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+    
+    def comment(self, text: bytes):
+        self.sql.comment(text)
+    
+    def set_delimiter(self, delimiter: bytes):
+        self.sql.set_delimiter(delimiter)
+    
+    def statement(self, text: bytes):
+        self.sql.statement(text)
+    
+    def data_filename(self, table: str) -> str:
+        """表对应的数据文件名，表名中不能用于文件名的字符替换为下划线"""
+        if table not in self.files:
+            name = re.sub(r'[^\w.-]', '_', table) or '_'
+            filename = f"{name}.tsv"
+            if filename in self.files.values():
+                filename = f"{name}.{len(self.files)}.tsv"
+            self.files[table] = filename
+        return self.files[table]
+    
+    def insert_rows(self, table: str, head: bytes, columns: Optional[bytes], data,
+                    rows: Iterable[Tuple[int, int]]) -> int:
+        if table not in self.columns:
+            self.columns[table] = columns
+        elif self.columns[table] != columns:
+            logging.warning(f"表 {table} 的INSERT列清单前后不一致，TSV文件中各行的列顺序可能不同")
+            self.columns[table] = columns
+        
+        if table != self.table:
+            if self.data_file is not None:
+                self.data_file.close()
+            mode = 'ab' if table in self.files else 'wb'
+            self.data_file = open(os.path.join(self.directory, self.data_filename(table)), mode,
+                                  buffering=1024 * 1024)
+            self.table = table
+        
+        stats = self.stats.setdefault(table, {'output_bytes': 0})
+        count = 0
+        for row_start, row_end in rows:
+            line = TsvConverter.row(data[row_start:row_end])
+            self.data_file.write(line)
+            stats['output_bytes'] += len(line)
+            count += 1
+        return count
+    
+    def close(self):
+        self.sql.close()
+        self.schema.close()
+        if self.data_file is not None:
+            self.data_file.close()
+            self.data_file = None
+
+
+class DumpRewriter:
+    """流式改写SQL导出文件并统计各表的行数和字节数
+    
+    文件以只读方式内存映射，语句和行都以位置表示，只有正在合并的一条INSERT
+    (不超过数据包上限)会复制到内存中。writer为None时只统计不输出。
+    """
+    
+    # 进度条每读过这么多字节刷新一次
+    PROGRESS_STEP = 4 * 1024 * 1024
+    
+    def __init__(self, writer: Optional[Any] = None, show_progress: bool = True):
+        self.writer = writer
+        self.show_progress = show_progress
+        self.tables: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, int] = {'statements': 0, 'inserts': 0, 'rows': 0, 'passthrough_inserts': 0,
+                                      'input_bytes': 0}
+    
+    def table_stats(self, table: str, columns: Optional[bytes]) -> Dict[str, Any]:
+        if table not in self.tables:
+            self.tables[table] = {
+                'rows': 0, 'input_statements': 0, 'input_bytes': 0,
+                'columns': columns.decode('utf-8', 'surrogateescape') if columns else None
+            }
+        return self.tables[table]
+    
+    @staticmethod
+    def release(data: mmap.mmap, start: int, end: int) -> int:
+        """把 [start, end) 中整页的部分交还给操作系统，返回下次开始的位置"""
+        end -= end % mmap.PAGESIZE
+        if end > start:
+            data.madvise(mmap.MADV_DONTNEED, start, end - start)
+        return max(start, end)
+    
+    def process(self, data, scanner: DumpScanner):
+        """依次处理扫描出的注释、DELIMITER指令和语句"""
+        writer = self.writer
+        progress_bar = tqdm(total=len(data), desc="改写", unit="B", unit_scale=True) if self.show_progress else None
+        release = isinstance(data, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED')
+        reported = released = 0
+        
+        for event in scanner:
+            kind = event[0]
+            if kind == 'delimiter':
+                if writer is not None:
+                    writer.set_delimiter(event[1])
+                continue
+            _, start, end = event
+            if kind == 'comment':
+                if writer is not None:
+                    writer.comment(data[start:end].rstrip(b'\r\n'))
+                continue
+            
+            self.stats['statements'] += 1
+            head = InsertParser.match_head(data, start, end)
+            rows = None
+            if head is not None:
+                head_text, table, columns = head
+                rows = InsertParser.rows(data, start + len(head_text), end)
+                stats = self.table_stats(table, columns)
+                stats['input_statements'] += 1
+                stats['input_bytes'] += end - start + len(scanner.delimiter)
+                self.stats['inserts'] += 1
+                if rows is None:
+                    self.stats['passthrough_inserts'] += 1
+            
+            if rows is None:
+                if writer is not None:
+                    writer.statement(data[start:end])
+            else:
+                if writer is not None:
+                    count = writer.insert_rows(table, head_text, columns, data, rows)
+                elif isinstance(rows, list):
+                    count = len(rows)
+                else:
+                    count = sum(1 for _ in rows)
+                stats['rows'] += count
+                self.stats['rows'] += count
+            
+            if end - reported >= self.PROGRESS_STEP:
+                if release:
+                    # 已经处理过的部分不会再读，从进程中解除映射，常驻内存不随文件增大
+                    released = self.release(data, released, end)
+                if progress_bar:
+                    progress_bar.update(end - reported)
+                reported = end
+        
+        if progress_bar:
+            progress_bar.update(len(data) - reported)
+            progress_bar.close()
+    
+    def rewrite(self, filename: str) -> bool:
+        """处理一个SQL文件"""
+        try:
+            with open(filename, 'rb') as f:
+                magic = f.read(4)
+                if magic.startswith(b'\x1f\x8b') or magic == b'\x28\xb5\x2f\xfd':
+                    logging.error(f"{filename} 是压缩文件，无法内存映射，请先解压")
+                    return False
+                size = os.fstat(f.fileno()).st_size
+                self.stats['input_bytes'] = size
+                if size == 0:
+                    return True
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    if hasattr(data, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        # 顺序读取，让内核提前预读、及时回收读过的页
+                        data.madvise(mmap.MADV_SEQUENTIAL)
+                    self.process(data, DumpScanner(data))
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"改写过程中发生错误: {e}")
+            return False
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+    
+    def report(self) -> Dict[str, Any]:
+        """统计报告：整体和各表的行数、语句数和字节数"""
+        tables = {}
+        output_stats = self.writer.stats if self.writer is not None else {}
+        for table, stats in self.tables.items():
+            tables[table] = dict(stats, **output_stats.get(table, {}))
+        return dict(self.stats, tables=tables)
+
+
+def format_size(size: int) -> str:
+    """把字节数格式化为便于阅读的文本"""
+    if size > 1024 * 1024:
+        return f"{size / (1024 * 1024):.2f} MB"
+    elif size > 1024:
+        return f"{size / 1024:.2f} KB"
+    return f"{size} bytes"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="SQL导出文件改写工具 - 把逐行INSERT合并成多行INSERT或转换成TSV，并统计各表数据",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s --input fortune500.sql
+  
+  %(prog)s --input fortune500.sql --output fortune500_fast.sql --max-packet 4194304
+  
+  %(prog)s --input mydb_full.sql --format tsv --output mydb_tsv/ --report mydb_report.json
+        """
+    )
+    
+    parser.add_argument('--input', '-i', type=str, required=True, help='要改写的SQL文件(不支持压缩文件)')
+    parser.add_argument('--output', '-o', type=str,
+                        help='输出SQL文件路径 ("-" 表示标准输出)，--format tsv 时为输出目录；不指定时只统计')
+    parser.add_argument('--format', choices=['sql', 'tsv'], default='sql',
+                        help='输出格式: sql 为多行INSERT的SQL文件，tsv 为每个表一个TSV文件加 schema.sql (默认: sql)')
+    parser.add_argument('--max-packet', type=int, default=1024 * 1024,
+                        help='合并后每条INSERT语句的最大字节数，应不超过目标库的max_allowed_packet (默认: 1048576)')
+    parser.add_argument('--report', type=str, help='把各表的统计信息保存为JSON文件')
+    parser.add_argument('--no-progress', action='store_true', help='不显示进度条')
+    parser.add_argument('--verbose', '-v', action='store_true', help='详细输出')
+    parser.add_argument('--quiet', '-q', action='store_true', help='静默模式')
+    
+    args = parser.parse_args()
+    
+    # 设置日志级别
+    if args.quiet:
+        log_level = logging.ERROR
+    elif args.verbose:
+        log_level = logging.DEBUG
+    else:
+        log_level = logging.INFO
+    
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
+    if not os.path.isfile(args.input):
+        parser.error(f"找不到输入文件: {args.input}")
+    if args.max_packet <= SqlRewriter.PACKET_MARGIN:
+        parser.error(f"--max-packet 必须大于 {SqlRewriter.PACKET_MARGIN}")
+    if args.format == 'tsv' and (not args.output or args.output == '-'):
+        parser.error("--format tsv 需要用 --output 指定输出目录")
+    if args.output and args.output != '-' and os.path.abspath(args.output) == os.path.abspath(args.input):
+        parser.error("输出文件不能与输入文件相同")
+    
+    # 输出到标准输出时提示信息写到标准错误
+    console = sys.stderr if args.output == '-' else sys.stdout
+    
+    output_file = None
+    try:
+        writer = None
+        if args.format == 'tsv':
+            writer = TsvRewriter(args.output)
+        elif args.output == '-':
+            writer = SqlRewriter(sys.stdout.buffer, args.max_packet)
+        elif args.output:
+            output_file = open(args.output, 'wb', buffering=1024 * 1024)
+            writer = SqlRewriter(output_file, args.max_packet)
+        
+        print("🔄 SQL导出文件改写工具", file=console)
+        print(f"📂 输入: {args.input} ({format_size(os.path.getsize(args.input))})", file=console)
+        if args.output:
+            print(f"📝 输出: {args.output} ({args.format})", file=console)
+        
+        rewriter = DumpRewriter(writer, show_progress=not args.no_progress and not args.quiet)
+        ok = rewriter.rewrite(args.input)
+        if output_file is not None:
+            output_file.close()
+        if not ok:
+            print("❌ 改写失败", file=console)
+            return 1
+        
+        report = rewriter.report()
+        print(f"\n📈 统计:", file=console)
+        print(f"   语句: {report['statements']}条，其中INSERT {report['inserts']}条", file=console)
+        if report['passthrough_inserts']:
+            print(f"   无法合并、原样输出的INSERT: {report['passthrough_inserts']}条", file=console)
+        print(f"   数据行: {report['rows']}", file=console)
+        for table, stats in report['tables'].items():
+            line = (f"   {table}: {stats['rows']}行, {stats['input_statements']}条INSERT, "
+                    f"{format_size(stats['input_bytes'])}")
+            if 'output_bytes' in stats:
+                line += f" -> {format_size(stats['output_bytes'])}"
+            if 'output_statements' in stats:
+                line += f" ({stats['output_statements']}条INSERT)"
+            print(line, file=console)
+        
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"📊 统计信息已保存: {args.report}", file=console)
+        
+        print("\n🎉 完成！", file=console)
+        return 0
+    
+    except Exception as e:
+        logging.error(f"程序执行失败: {e}")
+        return 1
+    finally:
+        if output_file is not None:
+            output_file.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""dump_rewrite 语句切分、INSERT解析和TSV转换的测试"""
+
+from dump_rewrite import DumpScanner, InsertParser, TsvConverter
+# dump_rewrite导入时已把同级的dump_common目录加入sys.path
+from dump_common import ValueFormatter, TsvFormatter
+
+
+def scan(data: bytes) -> list:
+    """切分结果，语句和注释换成对应的文本"""
+    events = []
+    for event in DumpScanner(data):
+        if event[0] == 'delimiter':
+            events.append(event)
+        else:
+            events.append((event[0], data[event[1]:event[2]]))
+    return events
+
+
+def statements(data: bytes) -> list:
+    return [text for kind, text in scan(data) if kind == 'statement']
+
+
+def test_scanner_ignores_delimiters_in_strings_and_comments():
+    data = (b"-- header; comment\n"
+            b"INSERT INTO `t` VALUES (1,'a;b'),(2,'it\\'s; ok'),(3,'dou''bled;'),(4,\"d\\\";q\");\n"
+            b"# hash; comment\n"
+            b"/* block; comment */ SELECT 1 /* inline; */ FROM `we;ird` -- tail;\n;\n"
+            b"/*!40101 SET NAMES utf8mb4 */;\n")
+    assert scan(data) == [
+        ('comment', b"-- header; comment\n"),
+        ('statement', b"INSERT INTO `t` VALUES (1,'a;b'),(2,'it\\'s; ok'),(3,'dou''bled;'),(4,\"d\\\";q\")"),
+        ('comment', b"# hash; comment\n"),
+        ('comment', b"/* block; comment */"),
+        ('statement', b"SELECT 1 /* inline; */ FROM `we;ird` -- tail;"),
+        # 条件注释会被服务端执行，属于语句
+        ('statement', b"/*!40101 SET NAMES utf8mb4 */"),
+    ]
+
+
+def test_scanner_keeps_multi_line_strings_in_one_statement():
+    data = (b"INSERT INTO t VALUES (1,'line one;\n-- not a comment\n# nor this;\n'),\n(2,'\\\\');\n"
+            b"SELECT 2;")
+    assert statements(data) == [
+        b"INSERT INTO t VALUES (1,'line one;\n-- not a comment\n# nor this;\n'),\n(2,'\\\\')",
+        b"SELECT 2",
+    ]
+
+
+def test_scanner_follows_delimiter_blocks():
+    data = (b"DELIMITER ;;\n"
+            b"CREATE TRIGGER tr BEFORE INSERT ON t FOR EACH ROW BEGIN\n"
+            b"  SET NEW.a = 1; SET NEW.b = ';;';\nEND ;;\n"
+            b"DELIMITER ;\n"
+            b"SELECT 1;\n")
+    assert scan(data) == [
+        ('delimiter', b';;'),
+        ('statement', b"CREATE TRIGGER tr BEFORE INSERT ON t FOR EACH ROW BEGIN\n"
+                      b"  SET NEW.a = 1; SET NEW.b = ';;';\nEND"),
+        ('delimiter', b';'),
+        ('statement', b"SELECT 1"),
+    ]
+
+
+def test_scanner_unterminated_string_runs_to_end_of_file():
+    data = b"SELECT 1;\nINSERT INTO t VALUES ('never closed; SELECT 2;\n"
+    assert statements(data) == [b"SELECT 1", b"INSERT INTO t VALUES ('never closed; SELECT 2;"]
+
+
+def test_match_head_reads_table_and_column_list():
+    data = b"INSERT IGNORE INTO `db`.`my``t` (`a`,`b)`) VALUES (1,2)"
+    head, table, columns = InsertParser.match_head(data, 0, len(data))
+    assert head == b"INSERT IGNORE INTO `db`.`my``t` (`a`,`b)`) VALUES"
+    assert table == 'my`t'
+    assert columns == b"(`a`,`b)`)"
+    
+    data = b"replace t values(1)"
+    assert InsertParser.match_head(data, 0, len(data)) == (b"replace t values", 't', None)
+    for data in (b"INSERT INTO t SELECT * FROM s", b"INSERT INTO t SET a = 1", b"UPDATE t SET a = 1"):
+        assert InsertParser.match_head(data, 0, len(data)) is None
+
+
+def parse_rows(data: bytes) -> list:
+    head = InsertParser.match_head(data, 0, len(data))[0]
+    rows = InsertParser.rows(data, len(head), len(data))
+    return None if rows is None else [data[start:end] for start, end in rows]
+
+
+def test_rows_with_nested_function_calls():
+    data = (b"INSERT INTO t VALUES (1,CONCAT('a',')',CHAR(40)),ST_GeomFromText('POINT(1 2)')), "
+            b"(2,'(',NOW()),\n(3,\"\"\")\",IF((1)>0,'x','y'))")
+    rows = parse_rows(data)
+    assert rows == [b"(1,CONCAT('a',')',CHAR(40)),ST_GeomFromText('POINT(1 2)'))",
+                    b"(2,'(',NOW())",
+                    b"(3,\"\"\")\",IF((1)>0,'x','y'))"]
+    assert [InsertParser.split_values(row) for row in rows] == [
+        [b'1', b"CONCAT('a',')',CHAR(40))", b"ST_GeomFromText('POINT(1 2)')"],
+        [b'2', b"'('", b'NOW()'],
+        [b'3', b'""")"', b"IF((1)>0,'x','y')"],
+    ]
+    # 不含嵌套的行走正则的快速路径，带空白和转义的值也要拆对
+    assert InsertParser.split_values(b"( 1 , 'a,\\'b' ,NULL,0x0A)") == [b'1', b"'a,\\'b'", b'NULL', b'0x0A']
+
+
+def test_rows_rejects_trailing_clauses(monkeypatch):
+    assert parse_rows(b"INSERT INTO t VALUES (1),(2) ON DUPLICATE KEY UPDATE a = VALUES(a)") is None
+    assert parse_rows(b"INSERT INTO t VALUES (1,'unterminated)") is None
+    # 超过LIST_LIMIT的语句先校验再逐行返回，结果相同
+    data = b"INSERT INTO t VALUES (1,'a'),(2,CHAR(41)),(3,'c')"
+    monkeypatch.setattr(InsertParser, 'LIST_LIMIT', 8)
+    assert parse_rows(data) == [b"(1,'a')", b"(2,CHAR(41))", b"(3,'c')"]
+    assert parse_rows(data + b" ON DUPLICATE KEY UPDATE a = 1") is None
+
+
+def test_tsv_fields_for_literals():
+    field = TsvConverter.field
+    assert field(b'NULL') == b'\\N'
+    assert field(b'null') == b'\\N'
+    assert field(b"'NULL'") == b'NULL'
+    assert field(b'-12.50') == b'-12.50'
+    assert field(b"'it\\'s'") == b"it's"
+    assert field(b"'dou''bled'") == b"dou'bled"
+    assert field(b'"dq""x\\"y"') == b'dq"x"y'
+    # MySQL字符串转义还原后再按LOAD DATA的规则转义
+    assert field(b"'a\\tb\\nc\\rd\\0e\\\\f'") == b'a\\tb\\nc\\rd\\0e\\\\f'
+    assert field(b"'raw\ttab'") == b'raw\\ttab'
+    assert field(b"'\\Z\\b'") == b'\x1a\x08'
+    # \% 和 \_ 在MySQL字符串中保留反斜杠
+    assert field(b"'100\\%\\_'") == b'100\\\\%\\\\_'
+    # 二进制值写成十六进制
+    assert field(b'0xABcd') == b'abcd'
+    assert field(b"X'0aFF'") == b'0aff'
+    assert field(b"x''") == b''
+    assert field(b"_binary'\\t\\\\\\''") == b'095c27'
+    assert field(b"_binary 'ab'") == b'6162'
+    assert field(b"FROM_BASE64('AAH/')") == b'0001ff'
+    # 其他字符集引导符只去掉引导符
+    assert field(b"_utf8mb4'a\\tb'") == b'a\\tb'
+
+
+def test_tsv_rows_match_exporter_data_files():
+    # 各种--binary-encoding生成的INSERT转换出的TSV，与导出工具直接写出的TSV数据文件相同
+    data_types = ['int', 'varchar', 'varbinary', 'text', 'decimal']
+    rows = [
+        (1, 'plain', b'\x00\x01\xff', None, 1),
+        (2, 'tab\there', b'', 'line\nbreak', None),
+        (3, 'back\\slash \\N \\t', b'\t\n\\\'"', 'cr\r and nul\0', 2),
+        (4, None, None, '', 3),
+        (5, "it's \"quoted\", (really)", bytes(range(256)), '中文\\', 4),
+    ]
+    expected = TsvFormatter(data_types).format_rows(rows).encode('utf-8')
+    for encoding in ValueFormatter.BINARY_ENCODINGS:
+        formatter = ValueFormatter(data_types, encoding)
+        values = [formatter.format_row(row).encode('utf-8', 'surrogateescape') for row in rows]
+        assert b''.join(TsvConverter.row(row) for row in values) == expected, encoding
+        
+        # 经过完整的INSERT语句切分和解析，结果也相同
+        data = b"INSERT INTO `t` VALUES " + b',\n'.join(values) + b";\nSELECT 1;\n"
+        (start, end), = [event[1:] for event in DumpScanner(data) if data[event[1]:event[1] + 6] == b'INSERT']
+        head = InsertParser.match_head(data, start, end)[0]
+        converted = [TsvConverter.row(data[row_start:row_end])
+                     for row_start, row_end in InsertParser.rows(data, start + len(head), end)]
+        assert b''.join(converted) == expected, encoding
@@ -0,0 +1,752 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出性能基准测试工具
+不需要MySQL服务器：用进程内的模拟服务端驱动db_exp的DatabaseExporter和tab_exp的TableExporter，
+按真实表结构生成数据，测量各导出模式的行/秒、输出MB/秒和峰值内存
+"""
+
+import argparse
+import sys
+import os
+import re
+import gzip
+import hashlib
+import json
+import random
+import shutil
+import struct
+import tempfile
+import time
+import unicodedata
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+
+import pymysql
+import pymysql.converters
+from pymysql import connections
+from pymysql.constants import COMMAND, FIELD_TYPE
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块，不统计峰值内存
+    resource = None
+
+# 被测的两个导出工具与本工具位于同级目录
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(TOOLS_DIR, 'db_exp'), os.path.join(TOOLS_DIR, 'tab_exp')]
+
+import db_exp
+import tab_exp
+
+# 生成数据时参照的表结构：tab_exp/results 中导出文件的CREATE TABLE
+SCHEMA_DIR = os.path.join(TOOLS_DIR, 'tab_exp', 'results')
+
+
+def length_coded(value: Optional[bytes]) -> bytes:
+    """文本协议中的长度编码字符串，None为NULL"""
+    if value is None:
+        return b'\xfb'
+    length = len(value)
+    if length < 251:
+        return bytes([length]) + value
+    if length < 1 << 16:
+        return b'\xfc' + struct.pack('<H', length) + value
+    if length < 1 << 24:
+        return b'\xfd' + struct.pack('<I', length)[:3] + value
+    return b'\xfe' + struct.pack('<Q', length) + value
+
+
+class TableSchema:
+    """从导出文件的CREATE TABLE语句中解析出的表结构"""
+    
+    COLUMN_PATTERN = re.compile(r"^\s+`([^`]+)` (\w+)(?:\(([^)]*)\))?( unsigned)?(.*?),?$")
+    PRIMARY_KEY_PATTERN = re.compile(r"^\s+PRIMARY KEY \(`([^`]+)`\)")
+    
+    def __init__(self, name: str, create_sql: str):
+        self.name = name
+        self.create_sql = create_sql
+        self.columns: List[Dict[str, Any]] = []
+        self.key_column: Optional[str] = None
+        
+        for line in create_sql.splitlines()[1:]:
+            match = self.PRIMARY_KEY_PATTERN.match(line)
+            if match:
+                self.key_column = match.group(1)
+                continue
+            match = self.COLUMN_PATTERN.match(line)
+            if not match:
+                continue
+            column_name, data_type, args, unsigned, rest = match.groups()
+            data_type = data_type.lower()
+            numbers = [int(arg) for arg in (args or '').split(',') if arg.strip().isdigit()]
+            self.columns.append({
+                'TABLE_NAME': name,
+                'COLUMN_NAME': column_name,
+                'ORDINAL_POSITION': len(self.columns) + 1,
+                'DATA_TYPE': data_type,
+                'COLUMN_TYPE': data_type + (f"({args})" if args else '') + (unsigned or ''),
+                'IS_NULLABLE': 'NO' if 'NOT NULL' in rest else 'YES',
+                'COLUMN_DEFAULT': None,
+                'EXTRA': 'auto_increment' if 'AUTO_INCREMENT' in rest else '',
+                'CHARACTER_MAXIMUM_LENGTH': numbers[0] if data_type in RowGenerator.STRING_TYPES and numbers else None,
+                'NUMERIC_PRECISION': numbers[0] if data_type == 'decimal' and numbers else None,
+                'NUMERIC_SCALE': (numbers[1] if len(numbers) > 1 else 0) if data_type == 'decimal' else None,
+                'COLLATION_NAME': None,
+                'COLUMN_COMMENT': ''
+            })
+        
+        # 主键列取行号(从1开始)，分块读取时按它切分键区间
+        if self.key_column is not None:
+            key = self.column_names.index(self.key_column)
+            self.columns[key]['IS_NULLABLE'] = 'NO'
+    
+    @property
+    def column_names(self) -> List[str]:
+        return [column['COLUMN_NAME'] for column in self.columns]
+    
+    @classmethod
+    def load(cls, filename: str) -> 'TableSchema':
+        """读取导出文件开头的CREATE TABLE语句，不读取数据部分"""
+        lines = []
+        with open(filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                if lines or line.startswith('CREATE TABLE'):
+                    lines.append(line.rstrip('\n'))
+                    if line.startswith(')'):
+                        break
+        if not lines:
+            raise ValueError(f"{filename} 中没有CREATE TABLE语句")
+        name = re.match(r"CREATE TABLE `([^`]+)`", lines[0]).group(1)
+        return cls(name, '\n'.join(lines).rstrip(';'))
+
+
+class RowGenerator:
+    """按列类型生成模拟数据，并编码成文本协议的行数据包
+    
+    预先生成POOL_SIZE行不同的数据，之后每行只替换主键值，生成数据的开销
+    远小于导出工具处理一行的开销，不会影响测量结果。
+    """
+    
+    POOL_SIZE = 1024
+    NULL_RATE = 0.05
+    STRING_TYPES = {'char', 'varchar', 'tinytext', 'text', 'mediumtext', 'longtext', 'enum', 'set'}
+    BINARY_TYPES = {'binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob'}
+    INTEGER_RANGES = {
+        'tinyint': 127, 'smallint': 32767, 'mediumint': 8388607,
+        'int': 2147483647, 'integer': 2147483647, 'bigint': 9223372036854775807
+    }
+    # 文本协议中的字段类型和字符集(63为binary，45为utf8mb4)
+    FIELD_TYPES = {
+        'tinyint': FIELD_TYPE.TINY, 'smallint': FIELD_TYPE.SHORT, 'mediumint': FIELD_TYPE.INT24,
+        'int': FIELD_TYPE.LONG, 'integer': FIELD_TYPE.LONG, 'bigint': FIELD_TYPE.LONGLONG,
+        'year': FIELD_TYPE.YEAR, 'decimal': FIELD_TYPE.NEWDECIMAL,
+        'float': FIELD_TYPE.FLOAT, 'double': FIELD_TYPE.DOUBLE,
+        'date': FIELD_TYPE.DATE, 'datetime': FIELD_TYPE.DATETIME, 'timestamp': FIELD_TYPE.TIMESTAMP,
+        'time': FIELD_TYPE.TIME, 'json': FIELD_TYPE.JSON,
+        'char': FIELD_TYPE.STRING, 'binary': FIELD_TYPE.STRING
+    }
+    # 生成字符串时使用的词，包含需要转义的字符和多字节字符
+    WORDS = ['power', 'station', 'General', 'Motors', 'Exxon', 'Mobil', 'Steel', 'Electric', 'coal',
+             'Bituminous', 'Operating', 'China', 'South Korea', "O'Brien", 'C:\\data', 'line\nbreak',
+             'Müller', 'São Paulo', '北京', '发电厂', 'Tab\tseparated', '"quoted"', '50%', 'Zürich']
+    
+    def __init__(self, schema: TableSchema, seed: int = 0):
+        self.schema = schema
+        rng = random.Random(f"{seed}:{schema.name}")
+        key = schema.column_names.index(schema.key_column) if schema.key_column else None
+        self.has_key = key is not None
+        self.pool: List[Tuple[bytes, bytes]] = []
+        for _ in range(self.POOL_SIZE):
+            values = [None if index == key else self.value(column, rng)
+                      for index, column in enumerate(schema.columns)]
+            if key is None:
+                self.pool.append((b''.join(map(length_coded, values)), b''))
+            else:
+                self.pool.append((b''.join(map(length_coded, values[:key])),
+                                  b''.join(map(length_coded, values[key + 1:]))))
+    
+    @classmethod
+    def field_type(cls, column: Dict[str, Any]) -> Tuple[int, int]:
+        """列对应的(字段类型, 字符集编号)"""
+        data_type = column['DATA_TYPE']
+        if data_type in cls.BINARY_TYPES:
+            return cls.FIELD_TYPES.get(data_type, FIELD_TYPE.BLOB), 63
+        if data_type in cls.STRING_TYPES:
+            return cls.FIELD_TYPES.get(data_type, FIELD_TYPE.VAR_STRING), 45
+        return cls.FIELD_TYPES.get(data_type, FIELD_TYPE.VAR_STRING), 63
+    
+    def value(self, column: Dict[str, Any], rng: random.Random) -> Optional[bytes]:
+        """生成一个值在文本协议中的字节串"""
+        if column['IS_NULLABLE'] == 'YES' and rng.random() < self.NULL_RATE:
+            return None
+        
+        data_type = column['DATA_TYPE']
+        if data_type in self.INTEGER_RANGES:
+            limit = min(self.INTEGER_RANGES[data_type], 10 ** rng.randint(1, 9))
+            text = str(rng.randint(0, limit))
+        elif data_type == 'year':
+            text = str(rng.randint(1955, 2030))
+        elif data_type == 'decimal':
+            precision = column['NUMERIC_PRECISION'] or 10
+            scale = column['NUMERIC_SCALE'] or 0
+            digits = rng.randint(1, max(1, precision - scale))
+            text = str(rng.randint(0, 10 ** digits - 1))
+            if scale:
+                text += f".{rng.randint(0, 10 ** scale - 1):0{scale}d}"
+            if rng.random() < 0.1:
+                text = '-' + text
+        elif data_type in ('float', 'double'):
+            text = repr(round(rng.uniform(-180, 180), rng.randint(0, 6)))
+        elif data_type == 'date':
+            text = f"{rng.randint(1990, 2030)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        elif data_type in ('datetime', 'timestamp'):
+            text = (f"{rng.randint(1990, 2030)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                    f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}")
+        elif data_type == 'time':
+            text = f"{rng.randint(0, 838):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+        elif data_type == 'json':
+            text = json.dumps({'id': rng.randint(0, 1000), 'name': rng.choice(self.WORDS)}, ensure_ascii=False)
+        elif data_type in self.BINARY_TYPES:
+            return bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 64)))
+        else:
+            limit = min(column['CHARACTER_MAXIMUM_LENGTH'] or 255, 60)
+            text = ' '.join(rng.choice(self.WORDS) for _ in range(rng.randint(1, 6)))[:limit]
+        return text.encode('utf-8')
+    
+    def packet(self, row_id: int) -> bytes:
+        """第row_id行(从1开始)的行数据包"""
+        prefix, suffix = self.pool[row_id % self.POOL_SIZE]
+        if not self.has_key:
+            return prefix
+        return prefix + length_coded(str(row_id).encode()) + suffix
+
+
+class FakeServer:
+    """模拟的MySQL服务端
+    
+    回答db_exp和tab_exp导出时发出的查询：information_schema中的表、列和主键，
+    SHOW CREATE TABLE，以及读取表数据(包括按主键分块)的SELECT。每张表有rows行，
+    主键为1到rows。其他语句(SET、START TRANSACTION等)返回OK。结果以文本协议的
+    数据包返回，由PyMySQL照常解析。
+    """
+    
+    EOF_PACKET = b'\xfe\x00\x00\x02\x00'
+    OK_PACKET = b'\x00\x00\x00\x02\x00\x00\x00'
+    DATA_QUERY_PATTERN = re.compile(r"SELECT (.+?) FROM `([^`]+)`(.*)$", re.S)
+    
+    def __init__(self, database: str, schemas: List[TableSchema], rows: int, seed: int = 0):
+        self.database = database
+        self.rows = rows
+        self.schemas = {schema.name: schema for schema in sorted(schemas, key=lambda s: s.name)}
+        self.generators = {name: RowGenerator(schema, seed) for name, schema in self.schemas.items()}
+        
+        # 模拟的information_schema视图，只包含导出工具用到的列
+        self.catalog: Dict[str, List[Dict[str, Any]]] = {'TABLES': [], 'COLUMNS': [], 'STATISTICS': []}
+        for schema in self.schemas.values():
+            self.catalog['TABLES'].append({
+                'TABLE_NAME': schema.name, 'TABLE_TYPE': 'BASE TABLE', 'TABLE_ROWS': rows,
+                'CREATE_TIME': '2024-01-01 00:00:00', 'UPDATE_TIME': None, 'AUTO_INCREMENT': rows + 1,
+                'TABLE_COLLATION': 'utf8mb4_0900_ai_ci', 'CREATE_OPTIONS': '', 'TABLE_COMMENT': ''
+            })
+            self.catalog['COLUMNS'].extend(schema.columns)
+            if schema.key_column is not None:
+                self.catalog['STATISTICS'].append({
+                    'TABLE_NAME': schema.name, 'INDEX_NAME': 'PRIMARY', 'SEQ_IN_INDEX': 1,
+                    'COLUMN_NAME': schema.key_column, 'NON_UNIQUE': 0, 'SUB_PART': None,
+                    'INDEX_TYPE': 'BTREE', 'IS_NULLABLE': 'NO'
+                })
+    
+    @staticmethod
+    def field_packet(name: str, field_type: int, charset: int) -> bytes:
+        """列定义数据包"""
+        return (b''.join(length_coded(part.encode('utf-8')) for part in ('def', '', '', '', name, name))
+                + b'\x0c' + struct.pack('<HIBHB', charset, 255, field_type, 0, 31) + b'\x00\x00')
+    
+    def result_set(self, fields: List[Tuple[str, int, int]], packets: Iterator[bytes]) -> Iterator[bytes]:
+        """结果集：列数、列定义、EOF、各行、EOF"""
+        yield bytes([len(fields)])
+        for field in fields:
+            yield self.field_packet(*field)
+        yield self.EOF_PACKET
+        yield from packets
+        yield self.EOF_PACKET
+    
+    def respond(self, sql: str) -> Iterator[bytes]:
+        """返回一条语句的响应数据包"""
+        if re.search(r"information_schema\.", sql, re.I) and sql.lstrip().upper().startswith('SELECT'):
+            return self.schema_query(sql)
+        if sql.startswith('SHOW CREATE TABLE'):
+            name = re.search(r"`([^`]+)`", sql).group(1)
+            schema = self.schemas[name]
+            fields = [('Table', FIELD_TYPE.VAR_STRING, 45), ('Create Table', FIELD_TYPE.VAR_STRING, 45)]
+            return self.result_set(fields, iter([length_coded(name.encode()) +
+                                                 length_coded(schema.create_sql.encode('utf-8'))]))
+        if sql == 'SELECT VERSION()':
+            return self.result_set([('VERSION()', FIELD_TYPE.VAR_STRING, 45)], iter([length_coded(b'8.0.36-bench')]))
+        if sql == 'SELECT @@max_allowed_packet':
+            return self.result_set([('@@max_allowed_packet', FIELD_TYPE.LONGLONG, 63)],
+                                   iter([length_coded(b'67108864')]))
+        if sql == 'SELECT 1':
+            return self.result_set([('1', FIELD_TYPE.LONGLONG, 63)], iter([length_coded(b'1')]))
+        match = self.DATA_QUERY_PATTERN.match(sql)
+        if match and match.group(2) in self.schemas:
+            return self.data_query(*match.groups())
+        return iter([self.OK_PACKET])
+    
+    def schema_query(self, sql: str) -> Iterator[bytes]:
+        """回答information_schema查询：按TABLE_NAME条件过滤，按SELECT列表取列"""
+        view = re.search(r"FROM information_schema\.(\w+)", sql, re.I).group(1).upper()
+        records = self.catalog.get(view, [])
+        match = re.search(r"table_name\s*=\s*'([^']*)'", sql, re.I)
+        if match:
+            records = [record for record in records if record['TABLE_NAME'] == match.group(1)]
+        
+        select_list = re.match(r"\s*SELECT\s+(?:DISTINCT\s+)?(.*?)\s+FROM\s", sql, re.I | re.S).group(1)
+        names = [item.strip().split('.')[-1].upper() for item in select_list.split(',')]
+        if names == ['COUNT(*)']:
+            return self.result_set([('COUNT(*)', FIELD_TYPE.LONGLONG, 63)],
+                                   iter([length_coded(str(len(records)).encode())]))
+        
+        fields = []
+        for name in names:
+            sample = next((record[name] for record in records if record.get(name) is not None), None)
+            fields.append((name, FIELD_TYPE.LONGLONG, 63) if isinstance(sample, int) else (name, FIELD_TYPE.VAR_STRING, 45))
+        packets = (b''.join(length_coded(None if record.get(name) is None else str(record[name]).encode('utf-8'))
+                            for name in names)
+                   for record in records)
+        return self.result_set(fields, packets)
+    
+    def data_query(self, select_list: str, table_name: str, rest: str) -> Iterator[bytes]:
+        """回答读取表数据的SELECT，支持分块读取时的键区间、LIMIT和OFFSET"""
+        schema = self.schemas[table_name]
+        generator = self.generators[table_name]
+        lower = re.search(r"` > (-?\d+)", rest)
+        upper = re.search(r"` <= (-?\d+)", rest)
+        limit = re.search(r"LIMIT (\d+)", rest)
+        offset = re.search(r"OFFSET (\d+)", rest)
+        
+        first = max(1, int(lower.group(1)) + 1) if lower else 1
+        last = min(self.rows, int(upper.group(1))) if upper else self.rows
+        if offset:
+            first += int(offset.group(1))
+        if limit:
+            last = min(last, first + int(limit.group(1)) - 1)
+        row_ids = range(first, last + 1)
+        
+        if select_list.strip() == '*':
+            fields = [(column['COLUMN_NAME'], *RowGenerator.field_type(column)) for column in schema.columns]
+            return self.result_set(fields, map(generator.packet, row_ids))
+        # 只取键列(切分键区间)
+        key = schema.columns[schema.column_names.index(schema.key_column)]
+        fields = [(key['COLUMN_NAME'], *RowGenerator.field_type(key))]
+        return self.result_set(fields, (length_coded(str(row_id).encode()) for row_id in row_ids))
+
+
+class FakeConnection(connections.Connection):
+    """不连接网络的PyMySQL连接
+    
+    查询交给FakeServer回答，返回的数据包仍由PyMySQL的MySQLResult解析，游标、
+    类型转换、服务端游标(SSCursor)的行为与真实连接相同。
+    """
+    
+    def __init__(self, server: FakeServer):
+        # 不调用父类的__init__，它会连接服务器；这里只设置解析结果需要的属性
+        self.server = server
+        self.host = 'bench'
+        self.port = 0
+        self.db = server.database
+        self.encoding = 'utf8'
+        self.charset = 'utf8mb4'
+        self.use_unicode = True
+        self.decoders = {k: v for k, v in pymysql.converters.conversions.items() if type(k) is int}
+        self.encoders = {k: v for k, v in pymysql.converters.conversions.items() if type(k) is not int}
+        self.cursorclass = pymysql.cursors.Cursor
+        self.server_status = 0
+        self.autocommit_mode = False
+        self._local_infile = False
+        self._affected_rows = 0
+        self._result = None
+        self._sock = True
+        self._packets: Iterator[bytes] = iter(())
+    
+    def _execute_command(self, command, sql):
+        if not self._sock:
+            raise pymysql.err.InterfaceError(0, "")
+        
+        # 上一个服务端游标的结果没有读完时先读完，与真实连接相同
+        if self._result is not None:
+            if self._result.unbuffered_active:
+                self._result._finish_unbuffered_query()
+            self._result = None
+        
+        if command == COMMAND.COM_QUERY:
+            if isinstance(sql, bytes):
+                sql = sql.decode(self.encoding, 'surrogateescape')
+            self._packets = self.server.respond(sql)
+        else:
+            self._packets = iter([FakeServer.OK_PACKET])
+    
+    def _read_packet(self, packet_type=connections.MysqlPacket):
+        return packet_type(next(self._packets), self.encoding)
+    
+    def close(self):
+        self._sock = None
+    
+    @property
+    def open(self):
+        return self._sock is not None
+
+
+class BenchDatabaseConnector(db_exp.DatabaseConnector):
+    """连接到FakeServer的db_exp连接器"""
+    
+    def __init__(self, server: FakeServer):
+        super().__init__('bench', 0, 'bench', '', server.database)
+        self.server = server
+    
+    def connect(self) -> bool:
+        self.connection = FakeConnection(self.server)
+        return True
+    
+    def clone(self) -> 'BenchDatabaseConnector':
+        return BenchDatabaseConnector(self.server)
+
+
+class BenchTableConnector(tab_exp.DatabaseConnector):
+    """连接到FakeServer的tab_exp连接器"""
+    
+    def __init__(self, server: FakeServer):
+        super().__init__('bench', 0, 'bench', '', server.database)
+        self.server = server
+    
+    def connect(self) -> bool:
+        self.connection = FakeConnection(self.server)
+        return True
+
+
+# 测试的导出模式：tool为db_exp或tab_exp，options为导出器参数，buffered表示整表结果集
+# 会一次性读入内存(行数很多时可以用 --max-buffered-rows 跳过)，group为输出内容应当相同的一组模式
+MODES: Dict[str, Dict[str, Any]] = {
+    'db-sql': {'tool': 'db_exp', 'help': 'db_exp 默认参数，SQL文件', 'options': {}, 'buffered': True,
+               'group': 'db-sql'},
+    'db-stream': {'tool': 'db_exp', 'help': 'db_exp --stream', 'options': {'stream_rows': True}, 'group': 'db-sql'},
+    'db-passthrough': {'tool': 'db_exp', 'help': 'db_exp --stream --passthrough',
+                       'options': {'stream_rows': True, 'passthrough': True}, 'group': 'db-sql'},
+    'db-chunked': {'tool': 'db_exp', 'help': 'db_exp --stream --chunk-size 100000 --jobs 2',
+                   'options': {'stream_rows': True, 'chunk_size': 100000, 'jobs': 2}, 'group': 'db-sql'},
+    'db-format-workers': {'tool': 'db_exp', 'help': 'db_exp --stream --format-workers 2',
+                          'options': {'stream_rows': True, 'format_workers': 2}, 'group': 'db-sql'},
+    'db-gzip': {'tool': 'db_exp', 'help': 'db_exp --stream，输出 .sql.gz',
+                'options': {'stream_rows': True}, 'compression': 'gzip', 'group': 'db-sql'},
+    'db-tsv': {'tool': 'db_exp', 'help': 'db_exp --stream --format dir --data-format tsv',
+               'options': {'stream_rows': True}, 'data_format': 'tsv', 'group': 'tsv'},
+    'db-parquet': {'tool': 'db_exp', 'help': 'db_exp --stream --format dir --data-format parquet',
+                   'options': {'stream_rows': True}, 'data_format': 'parquet'},
+    'tab-sql': {'tool': 'tab_exp', 'help': 'tab_exp 默认参数，多行INSERT', 'options': {}, 'buffered': True,
+                'group': 'tab-sql'},
+    'tab-passthrough': {'tool': 'tab_exp', 'help': 'tab_exp --passthrough',
+                        'options': {'passthrough': True}, 'buffered': True, 'group': 'tab-sql'},
+    'tab-chunked': {'tool': 'tab_exp', 'help': 'tab_exp --chunk-size 100000', 'options': {'chunk_size': 100000},
+                    'group': 'tab-sql'},
+    'tab-tsv': {'tool': 'tab_exp', 'help': 'tab_exp --data-format tsv', 'options': {}, 'data_format': 'tsv',
+                'group': 'tsv'},
+}
+
+# 每组模式比较的输出文件：db_exp的目录格式中只比较数据文件，不比较建表语句和清单
+OUTPUT_GROUPS: Dict[str, Tuple[str, ...]] = {
+    'db-sql': ('.sql', '.sql.gz'),
+    'tab-sql': ('.sql',),
+    'tsv': ('.tsv',),
+}
+
+
+def run_db_exp(server: FakeServer, output: str, mode: Dict[str, Any]) -> bool:
+    """用DatabaseExporter导出整个模拟数据库，与 db_exp.py 的main相同"""
+    exporter = db_exp.DatabaseExporter(BenchDatabaseConnector(server), show_progress=False,
+                                       temp_dir=output, **mode['options'])
+    if mode.get('data_format'):
+        directory = db_exp.DumpDirectory(os.path.join(output, 'dump'), None, mode['data_format'])
+        return exporter.export_database_dir(directory)
+    
+    compression = mode.get('compression', 'none')
+    filename = os.path.join(output, 'dump.sql' + ('.gz' if compression == 'gzip' else ''))
+    with db_exp.open_file_sink(filename, compression) as sink:
+        return exporter.export_database(sink)
+
+
+def run_tab_exp(server: FakeServer, output: str, mode: Dict[str, Any]) -> bool:
+    """用TableExporter逐表导出，每张表一个文件，与 tab_exp.py 的main相同"""
+    for table_name in server.schemas:
+        exporter = tab_exp.TableExporter(BenchTableConnector(server), None, **mode['options'])
+        if mode.get('data_format'):
+            filename = os.path.join(output, f"{table_name}.{mode['data_format']}")
+            if not exporter.export_table_file(table_name, filename, mode['data_format']):
+                return False
+            continue
+        
+        with tab_exp.open_file_sink(os.path.join(output, f"{table_name}.sql")) as sink:
+            exporter.write_header(sink)
+            if not exporter.export_table(table_name, table_name, sink):
+                return False
+            exporter.write_footer(sink)
+    return True
+
+
+def peak_rss(who: int = 0) -> Optional[int]:
+    """峰值常驻内存字节数，不支持的平台返回None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who or resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def directory_size(path: str) -> int:
+    """目录中所有文件的总字节数"""
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def output_digest(path: str, suffixes: Tuple[str, ...]) -> str:
+    """目录中以suffixes结尾的文件按路径排序后内容的SHA-256
+    
+    .gz文件先解压；跳过以 "-- " 开头的注释行，其中有导出时间。
+    """
+    names = sorted(os.path.relpath(os.path.join(root, name), path)
+                   for root, _, files in os.walk(path) for name in files if name.endswith(suffixes))
+    digest = hashlib.sha256()
+    for name in names:
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(os.path.join(path, name), 'rb') as f:
+            for line in f:
+                if not line.startswith(b'-- '):
+                    digest.update(line)
+    return digest.hexdigest()
+
+
+def run_case(mode_name: str, schema_files: List[str], rows: int, seed: int,
+             temp_dir: Optional[str]) -> Dict[str, Any]:
+    """在独立的子进程中执行一次测试，子进程的峰值内存只属于这一次导出"""
+    logging.getLogger().setLevel(logging.WARNING)
+    mode = MODES[mode_name]
+    server = FakeServer('bench', [TableSchema.load(filename) for filename in schema_files], rows, seed)
+    startup_rss = peak_rss()
+    
+    output = tempfile.mkdtemp(prefix='exp_bench_', dir=temp_dir)
+    try:
+        runner = run_db_exp if mode['tool'] == 'db_exp' else run_tab_exp
+        started = time.perf_counter()
+        ok = runner(server, output, mode)
+        elapsed = time.perf_counter() - started
+        # 并行导出的临时文件已经拼接到输出文件中并删除，这里只剩输出文件
+        size = directory_size(output)
+        digest = output_digest(output, OUTPUT_GROUPS[mode['group']]) if ok and mode.get('group') else None
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+    
+    total_rows = rows * len(server.schemas)
+    return {
+        'mode': mode_name,
+        'rows': rows,
+        'tables': len(server.schemas),
+        'ok': bool(ok),
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(total_rows / elapsed, 1) if elapsed > 0 else None,
+        'output_bytes': size,
+        'output_digest': digest,
+        'mb_per_second': round(size / elapsed / (1024 * 1024), 2) if elapsed > 0 else None,
+        'peak_rss_bytes': peak_rss(),
+        'startup_rss_bytes': startup_rss,
+        'peak_rss_children_bytes': peak_rss(resource.RUSAGE_CHILDREN) if resource is not None else None
+    }
+
+
+def parse_row_count(text: str) -> int:
+    """解析10k、1m、10M这样的行数"""
+    match = re.fullmatch(r"(\d+)([kKmM]?)", text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"无效的行数: {text}")
+    multiplier = {'': 1, 'k': 1000, 'm': 1000 * 1000}[match.group(2).lower()]
+    return int(match.group(1)) * multiplier
+
+
+def format_size(size: Optional[int]) -> str:
+    """把字节数格式化为便于阅读的文本"""
+    if size is None:
+        return '-'
+    if size > 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    elif size > 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} B"
+
+
+def align(text: str, width: int) -> str:
+    """右对齐到width个显示宽度，中文字符占两格"""
+    display = sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+    return ' ' * max(0, width - display) + text
+
+
+def find_regressions(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                     tolerance: float) -> List[str]:
+    """与基准结果对比，行/秒下降超过tolerance的测试项"""
+    previous = {(item['mode'], item['rows']): item for item in baseline if item.get('ok')}
+    regressions = []
+    for item in results:
+        before = previous.get((item['mode'], item['rows']))
+        if not item['ok'] or before is None or not before.get('rows_per_second'):
+            continue
+        change = item['rows_per_second'] / before['rows_per_second'] - 1
+        if change < -tolerance:
+            regressions.append(f"{item['mode']} ({item['rows']} 行): {before['rows_per_second']:.0f} -> "
+                               f"{item['rows_per_second']:.0f} 行/秒 ({change:+.1%})")
+    return regressions
+
+
+def find_mismatches(results: List[Dict[str, Any]]) -> List[str]:
+    """同一组模式在同样行数下的输出应当相同，列出与组内第一个模式输出不同的测试项"""
+    first: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    mismatches = []
+    for item in results:
+        group = MODES[item['mode']].get('group')
+        if not item['ok'] or group is None or item.get('output_digest') is None:
+            continue
+        reference = first.setdefault((group, item['rows']), item)
+        if item['output_digest'] != reference['output_digest']:
+            mismatches.append(f"{item['mode']} ({item['rows']} 行) 与 {reference['mode']} 的输出不同")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="导出性能基准测试工具 - 不需要MySQL，用模拟数据测量db_exp/tab_exp各导出模式的性能",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  %(prog)s
+  
+  %(prog)s --rows 10k,1m,10m --modes db-stream,db-passthrough,tab-chunked
+  
+  %(prog)s --rows 1m --json bench-new.json --baseline bench-old.json
+
+可用的导出模式:
+""" + '\n'.join(f"  {name:<20}{mode['help']}" for name, mode in MODES.items())
+    )
+    
+    parser.add_argument('--rows', type=str, default='10k,1m',
+                        help='每张表的行数，逗号分隔，可用k/m后缀 (默认: 10k,1m)')
+    parser.add_argument('--modes', type=str, help='要测试的导出模式，逗号分隔 (默认: 全部)')
+    parser.add_argument('--tables', type=str, default='fortune500,powerstation',
+                        help='参照其表结构生成数据的表，取自 tab_exp/results 中的同名导出文件 (默认: fortune500,powerstation)')
+    parser.add_argument('--schema-dir', type=str, default=SCHEMA_DIR, help='存放表结构导出文件的目录')
+    parser.add_argument('--max-buffered-rows', type=parse_row_count, default=1000 * 1000,
+                        help='一次性读取整表的模式最多测试的行数，超过时跳过 (默认: 1m)')
+    parser.add_argument('--seed', type=int, default=0, help='生成数据的随机数种子 (默认: 0)')
+    parser.add_argument('--temp-dir', type=str, help='存放导出文件的目录，每次测试后删除 (默认: 系统临时目录)')
+    parser.add_argument('--json', type=str, help='把测试结果保存为JSON文件，可作为之后的 --baseline')
+    parser.add_argument('--baseline', type=str, help='之前保存的测试结果，行/秒下降超过 --tolerance 时返回非零')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='允许的行/秒下降比例 (默认: 0.1)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='详细输出')
+    
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
+    try:
+        row_counts = [parse_row_count(text) for text in args.rows.split(',') if text.strip()]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    mode_names = [name.strip() for name in args.modes.split(',')] if args.modes else list(MODES)
+    unknown = [name for name in mode_names if name not in MODES]
+    if unknown:
+        parser.error(f"未知的导出模式: {', '.join(unknown)}")
+    schema_files = [os.path.join(args.schema_dir, f"{name.strip()}.sql") for name in args.tables.split(',')]
+    missing = [filename for filename in schema_files if not os.path.exists(filename)]
+    if missing:
+        parser.error(f"找不到表结构文件: {', '.join(missing)}")
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"无法读取基准结果 {args.baseline}: {e}")
+    
+    # 测试前先在本进程中解析一次表结构，结构文件有问题时尽早报错
+    try:
+        schemas = [TableSchema.load(filename) for filename in schema_files]
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    
+    print(f"📋 表: {', '.join(schema.name for schema in schemas)}  "
+          f"(每张表 {', '.join(f'{count:,}' for count in row_counts)} 行)")
+    print('模式' + ' ' * 16 + ''.join(align(title, width) for title, width in
+                                     (('行数', 12), ('耗时', 10), ('行/秒', 12), ('MB/秒', 9), ('输出', 11), ('峰值内存', 11))))
+    
+    results = []
+    # 每次测试用一个新的spawn子进程，测得的峰值内存不受之前测试的影响
+    context = multiprocessing.get_context('spawn')
+    for rows in row_counts:
+        for mode_name in mode_names:
+            mode = MODES[mode_name]
+            if mode.get('buffered') and rows > args.max_buffered_rows:
+                print(f"{mode_name:<20}{rows:>12,}  跳过 (一次性读取整表，超过 --max-buffered-rows)")
+                continue
+            if mode.get('data_format') == 'parquet' and db_exp.pyarrow is None:
+                print(f"{mode_name:<20}{rows:>12,}  跳过 (需要安装pyarrow)")
+                continue
+            
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(run_case, mode_name, schema_files, rows,
+                                             args.seed, args.temp_dir).result()
+            except Exception as e:
+                logging.error(f"测试 {mode_name} ({rows} 行) 失败: {e}")
+                result = {'mode': mode_name, 'rows': rows, 'ok': False, 'error': str(e)}
+            results.append(result)
+            
+            if not result['ok']:
+                print(f"{mode_name:<20}{rows:>12,}  ❌ 导出失败")
+                continue
+            print(f"{mode_name:<20}{rows:>12,}{result['seconds']:>9.2f}s{result['rows_per_second']:>12,.0f}"
+                  f"{result['mb_per_second']:>9.1f}{format_size(result['output_bytes']):>11}"
+                  f"{format_size(result['peak_rss_bytes']):>11}")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'pymysql': pymysql.__version__,
+                'tables': [schema.name for schema in schemas],
+                'seed': args.seed,
+                'results': results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n📊 测试结果已保存: {args.json}")
+    
+    failed = [item for item in results if not item['ok']]
+    mismatches = find_mismatches(results)
+    if mismatches:
+        print("\n❌ 输出内容不一致:")
+        for line in mismatches:
+            print(f"   {line}")
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n⚠️  与基准相比变慢超过 {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ 与基准相比没有超过 {args.tolerance:.0%} 的性能下降")
+    
+    return 1 if failed or mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,21 +8,51 @@
 import argparse
 import sys
 import pymysql
-from pymysql.constants import CLIENT
+import pymysql.converters
+import pymysql.cursors
+from pymysql.constants import CLIENT, FIELD_TYPE
 import logging
 import os
-from typing import Optional, Dict, Any, List, Tuple
+import json
+import queue
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# 与db_exp共用的组件位于同级的dump_common目录
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(TOOLS_DIR, 'dump_common'))
+
+from dump_common import (SqlSink, CompressedFileSink, open_file_sink,
+                         ValueFormatter, TsvFormatter, open_row_writer, SecondaryIndexes)
 
 
 class DatabaseConnector:
     """数据库连接管理器"""
     
-    def __init__(self, host: str, port: int, user: str, password: str, database: str):
+    def __init__(self, host: str, port: int, user: str, password: str, database: str,
+                 local_infile: bool = False):
         self.host = host
         self.port = port
         self.user = user
         self.password = password
         self.database = database
+        self.local_infile = local_infile
         self.connection: Optional[pymysql.Connection] = None
     
     def connect(self) -> bool:
@@ -35,7 +65,8 @@ class DatabaseConnector:
                 password=self.password,
                 database=self.database,
                 charset='utf8mb4',
-                client_flag=CLIENT.MULTI_STATEMENTS
+                client_flag=CLIENT.MULTI_STATEMENTS,
+                local_infile=self.local_infile
             )
             return True
         except pymysql.Error as e:
@@ -63,6 +94,16 @@ class DatabaseConnector:
         finally:
             self.close()
     
+    def get_max_allowed_packet(self) -> Optional[int]:
+        """读取服务器的max_allowed_packet"""
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT @@max_allowed_packet")
+                return int(cursor.fetchone()[0])
+        except pymysql.Error as e:
+            logging.warning(f"读取max_allowed_packet失败: {e}")
+            return None
+    
     def table_exists(self, table_name: str) -> bool:
         """检查表是否存在"""
         try:
@@ -79,13 +120,216 @@ class DatabaseConnector:
             return False
 
 
+# 读取表数据时不做类型转换的字段类型：DECIMAL、浮点数和日期时间保留服务端发送的文本
+RAW_TEXT_FIELD_TYPES = (FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL, FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE,
+                        FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP,
+                        FIELD_TYPE.TIME)
+RAW_TEXT_DECODERS = {**pymysql.converters.decoders,
+                     **dict.fromkeys(RAW_TEXT_FIELD_TYPES, pymysql.converters.through)}
+
+
+class RawTextCursorMixin:
+    """原样保留服务端文本的游标
+    
+    PyMySQL默认把DECIMAL解析成Decimal、DATETIME解析成datetime等，生成INSERT时又
+    str()回文本。这类游标在execute期间把连接的decoders换成RAW_TEXT_DECODERS，
+    这些列直接得到协议中的ASCII文本，由ValueFormatter按列类型加引号或原样写出。
+    PyMySQL在execute时就为每一列选定转换函数，之后取行不再查表，所以只需在
+    execute期间替换。整数列仍转换成int，分块读取时键值的比较不受影响。
+    """
+    
+    def execute(self, query, args=None):
+        connection = self.connection
+        decoders = connection.decoders
+        connection.decoders = RAW_TEXT_DECODERS
+        try:
+            return super().execute(query, args)
+        finally:
+            connection.decoders = decoders
+
+
+class RawTextCursor(RawTextCursorMixin, pymysql.cursors.Cursor):
+    """一次性读取结果集的原样文本游标"""
+
+
+class RawTextSSCursor(RawTextCursorMixin, pymysql.cursors.SSCursor):
+    """流式读取结果集的原样文本游标"""
+
+
+class TableChunker:
+    """基于主键/唯一键的分块扫描器
+    
+    使用键集分页(WHERE key > last ORDER BY key LIMIT n)按键顺序分块读取表，
+    每次查询只涉及一个块，不会长时间持有覆盖整表的查询。
+    """
+    
+    def __init__(self, table_name: str, key_columns: List[str], chunk_size: int,
+                 condition: Optional[Tuple[str, List[Any]]] = None):
+        self.table_name = table_name
+        self.key_columns = key_columns
+        self.chunk_size = chunk_size
+        # 附加的行过滤条件(SQL片段, 参数)，如增量导出的变更列范围
+        self.condition = condition
+    
+    @classmethod
+    def load(cls, db: DatabaseConnector, table_name: str, chunk_size: int) -> Optional['TableChunker']:
+        """从information_schema读取可用于分块的键，优先主键，其次全部列非空的唯一键
+        
+        没有可用的键时返回None，调用方应退回整表扫描。
+        """
+        with db.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT s.INDEX_NAME, s.COLUMN_NAME, s.SUB_PART, c.IS_NULLABLE "
+                "FROM information_schema.STATISTICS s "
+                "JOIN information_schema.COLUMNS c ON c.TABLE_SCHEMA = s.TABLE_SCHEMA "
+                "AND c.TABLE_NAME = s.TABLE_NAME AND c.COLUMN_NAME = s.COLUMN_NAME "
+                "WHERE s.TABLE_SCHEMA = %s AND s.TABLE_NAME = %s AND s.NON_UNIQUE = 0 "
+                "ORDER BY s.INDEX_NAME = 'PRIMARY' DESC, s.INDEX_NAME, s.SEQ_IN_INDEX",
+                (db.database, table_name)
+            )
+            indexes: Dict[str, List[str]] = {}
+            usable: Dict[str, bool] = {}
+            for index_name, column_name, sub_part, is_nullable in cursor.fetchall():
+                indexes.setdefault(index_name, []).append(column_name)
+                usable[index_name] = usable.get(index_name, True) and sub_part is None and is_nullable == 'NO'
+        
+        for index_name, columns in indexes.items():
+            if usable[index_name]:
+                return cls(table_name, columns, chunk_size)
+        return None
+    
+    def _key_expr(self) -> str:
+        columns = ', '.join(f"`{col}`" for col in self.key_columns)
+        return f"({columns})" if len(self.key_columns) > 1 else columns
+    
+    def _placeholders(self) -> str:
+        marks = ', '.join(['%s'] * len(self.key_columns))
+        return f"({marks})" if len(self.key_columns) > 1 else marks
+    
+    def _order_by(self) -> str:
+        return ', '.join(f"`{col}`" for col in self.key_columns)
+    
+    def _where(self, lower: Optional[Tuple], upper: Optional[Tuple]) -> Tuple[str, List[Any]]:
+        conditions = []
+        args: List[Any] = []
+        if lower is not None:
+            conditions.append(f"{self._key_expr()} > {self._placeholders()}")
+            args.extend(lower)
+        if upper is not None:
+            conditions.append(f"{self._key_expr()} <= {self._placeholders()}")
+            args.extend(upper)
+        if self.condition is not None:
+            conditions.append(f"({self.condition[0]})")
+            args.extend(self.condition[1])
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, args
+    
+    def select_range(self, lower: Optional[Tuple], upper: Optional[Tuple],
+                     columns: str = '*', limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+        """生成读取键区间(lower, upper]的查询，lower/upper为None表示不设边界"""
+        where, args = self._where(lower, upper)
+        sql = f"SELECT {columns} FROM `{self.table_name}`{where} ORDER BY {self._order_by()}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return sql, args
+    
+    def split(self, db: DatabaseConnector) -> List[Tuple[Optional[Tuple], Optional[Tuple]]]:
+        """只扫描键索引，把表切分成每块约chunk_size行的键区间列表
+        
+        区间首尾不设边界，因此无论切分时数据如何变化，所有区间合起来总能覆盖整张表。
+        """
+        ranges = []
+        lower = None
+        with db.connection.cursor() as cursor:
+            while True:
+                where, args = self._where(lower, None)
+                cursor.execute(
+                    f"SELECT {self._order_by()} FROM `{self.table_name}`{where} "
+                    f"ORDER BY {self._order_by()} LIMIT 1 OFFSET {int(self.chunk_size) - 1}",
+                    args
+                )
+                boundary = cursor.fetchone()
+                if boundary is None:
+                    break
+                boundary = tuple(boundary)
+                ranges.append((lower, boundary))
+                lower = boundary
+        ranges.append((lower, None))
+        return ranges
+    
+    def iter_rows(self, db: DatabaseConnector, columns: List[str],
+                  cursor_class=pymysql.cursors.Cursor) -> Iterator[Tuple]:
+        """按键集分页逐块读取整张表的行"""
+        key_positions = [columns.index(col) for col in self.key_columns]
+        lower = None
+        while True:
+            sql, args = self.select_range(lower, None, limit=self.chunk_size)
+            count = 0
+            last_row = None
+            with db.connection.cursor(cursor_class) as cursor:
+                cursor.execute(sql, args)
+                for row in cursor:
+                    count += 1
+                    last_row = row
+                    yield row
+            if count < self.chunk_size:
+                break
+            lower = tuple(last_row[pos] for pos in key_positions)
+
+
 class TableExporter:
     """表导出器"""
     
-    def __init__(self, source_db: DatabaseConnector, target_db: DatabaseConnector):
+    # 每次交给ValueFormatter批量格式化的行数
+    FORMAT_BATCH_SIZE = 1000
+    # 批量写入目标库时每次executemany的行数，pymysql会再按语句大小拆分
+    BULK_BATCH_SIZE = 10000
+    # --pipe 模式下读线程与写线程之间队列的默认深度(批数)
+    DEFAULT_PIPE_DEPTH = 4
+    # 增量同步时起点向前回退的默认量：日期时间列为秒数，数值列为数值
+    DEFAULT_OVERLAP = 300
+    # 表示LOAD DATA LOCAL INFILE被客户端或服务端禁用的错误码，遇到时退回批量INSERT
+    LOCAL_INFILE_ERRORS = {1148, 3948}
+    # 未指定且无法从目标库读取max_allowed_packet时，单条INSERT语句的字节数上限
+    DEFAULT_MAX_PACKET = 1024 * 1024
+    # 为协议包头等预留的字节数
+    PACKET_MARGIN = 1024
+    # 含BLOB/TEXT列的表每次从游标取的行数，以及一批行中大字段的总字节数上限
+    LOB_FETCH_ROWS = 16
+    LOB_BATCH_BYTES = 8 * 1024 * 1024
+    
+    def __init__(self, source_db: DatabaseConnector, target_db: DatabaseConnector, chunk_size: int = 0,
+                 extended_insert: bool = True, max_packet: int = DEFAULT_MAX_PACKET,
+                 pipe_depth: int = 0, incremental_column: Optional[str] = None, since: Any = None,
+                 overlap: int = DEFAULT_OVERLAP, defer_indexes: bool = False, binary_encoding: str = 'hex', passthrough: bool = False):
         self.source_db = source_db
         self.target_db = target_db
-        self.sql_statements: List[str] = []
+        self.chunk_size = chunk_size
+        self.extended_insert = extended_insert
+        self.max_packet = max_packet
+        self.pipe_depth = pipe_depth
+        self.incremental_column = incremental_column
+        self.since = since
+        self.overlap = overlap
+        self.defer_indexes = defer_indexes
+        self.binary_encoding = binary_encoding
+        self.passthrough = passthrough
+        self.index_statements: List[str] = []
+        self.high_water_mark: Any = None
+        self.row_filter: Optional[Tuple[str, List[Any]]] = None
+        self.sql_statements: List[Union[str, bytes]] = []
+        self.sink: Optional[SqlSink] = None
+        self.keep_statements = False
+        self.source_table: Optional[str] = None
+        self.target_table: Optional[str] = None
+        self.create_sql: Optional[str] = None
+    
+    def emit(self, statement: Union[str, bytes]):
+        """输出一条语句：写到sink，未指定sink或需要保留语句(用于execute_on_target)时收集到内存"""
+        if self.sink is not None:
+            self.sink.write(statement)
+        if self.sink is None or self.keep_statements:
+            self.sql_statements.append(statement)
     
     def get_create_table_statement(self, table_name: str) -> Optional[str]:
         """获取完整的创建表SQL语句"""
@@ -100,22 +344,105 @@ class TableExporter:
             logging.error(f"获取表结构失败: {e}")
             return None
     
-    def get_table_data(self, table_name: str) -> List[Tuple]:
-        """获取表中的所有数据"""
+    def select_rows_sql(self, table_name: str) -> Tuple[str, Optional[List[Any]]]:
+        """读取表数据的查询，增量导出时带上变更列的范围条件"""
+        if self.row_filter is None:
+            return f"SELECT * FROM `{table_name}`", None
+        return f"SELECT * FROM `{table_name}` WHERE {self.row_filter[0]}", self.row_filter[1]
+    
+    def prepare_incremental(self, table_name: str) -> bool:
+        """增量导出：读取变更列当前的最大值作为新的高水位，只导出 [since - overlap, 高水位] 范围内的行
+        
+        上界保证本次导出的范围与记录的高水位一致。变更列的值在事务中写入、提交较晚时，
+        可能在上次读取高水位之后才提交却小于高水位，因此下界从since再向前回退overlap
+        (日期时间列为秒，数值列为数值)重新读取一段；重复导出的行由 ON DUPLICATE KEY UPDATE
+        保证结果不变。变更列为NULL的行和源表中删除的行不会同步。
+        """
+        column = f"`{self.incremental_column}`"
         try:
             with self.source_db.connection.cursor() as cursor:
-                cursor.execute(f"SELECT * FROM `{table_name}`")
-                return cursor.fetchall()
+                cursor.execute(f"SELECT MAX({column}) FROM `{table_name}`")
+                self.high_water_mark = cursor.fetchone()[0]
         except pymysql.Error as e:
-            logging.error(f"获取表数据失败: {e}")
-            return []
+            logging.error(f"读取增量列 {self.incremental_column} 的最大值失败: {e}")
+            return False
+        
+        if self.high_water_mark is None:
+            # 表中没有数据，高水位保持不变
+            self.high_water_mark = self.since
+            self.row_filter = ("1 = 0", [])
+        elif self.since is None:
+            self.row_filter = (f"{column} <= %s", [self.high_water_mark])
+        else:
+            lower, args = "%s", [self.since]
+            if self.overlap > 0:
+                if isinstance(self.high_water_mark, (datetime, date)):
+                    lower, args = "%s - INTERVAL %s SECOND", [self.since, self.overlap]
+                elif isinstance(self.high_water_mark, (int, float, Decimal)):
+                    lower, args = "%s - %s", [self.since, self.overlap]
+                else:
+                    logging.warning(f"增量列 {self.incremental_column} 不是日期时间或数值类型，起点不向前回退")
+            self.row_filter = (f"{column} >= {lower} AND {column} <= %s", args + [self.high_water_mark])
+        logging.info(f"增量导出: {self.incremental_column} 从 {self.since if self.since is not None else '(全部)'} "
+                     f"(回退 {self.overlap}) 到 {self.high_water_mark}")
+        return True
+    
+    def upsert_clause(self, column_names: List[str]) -> str:
+        """增量导出时INSERT语句末尾的 ON DUPLICATE KEY UPDATE 子句，全量导出时为空"""
+        if not self.incremental_column:
+            return ""
+        updates = ', '.join(f"`{col}` = VALUES(`{col}`)" for col in column_names)
+        return f" ON DUPLICATE KEY UPDATE {updates}"
+    
+    def get_table_data(self, table_name: str, raw: bool = False) -> List[Tuple]:
+        """获取表中的所有数据，raw为True时数值和日期时间保留服务端文本
+        
+        读取出错时异常向上传递：返回空列表会让导出被当作成功，增量同步随之记录新的高水位，
+        没有读到的行以后再也不会导出。
+        """
+        with self.source_db.connection.cursor(RawTextCursor if raw else pymysql.cursors.Cursor) as cursor:
+            cursor.execute(*self.select_rows_sql(table_name))
+            return cursor.fetchall()
+    
+    def iter_table_data(self, table_name: str, raw: bool = False) -> Iterator[Tuple]:
+        """按主键/唯一键分块读取表中的数据，表没有可用的键时退回整表读取，raw含义同get_table_data
+        
+        读取出错(如读到一半连接断开)时异常向上传递，调用方据此判定导出失败，
+        不会把只读到一部分的表当作完整的数据。
+        """
+        chunker = TableChunker.load(self.source_db, table_name, self.chunk_size)
+        if chunker is None:
+            logging.info(f"表 {table_name} 没有可用于分块的主键/唯一键，整表读取")
+            yield from self.get_table_data(table_name, raw)
+            return
+        
+        chunker.condition = self.row_filter
+        logging.info(f"按键 ({', '.join(chunker.key_columns)}) 分块读取，每块 {self.chunk_size} 行")
+        columns = [col['COLUMN_NAME'] for col in self.get_table_columns(table_name)]
+        yield from chunker.iter_rows(self.source_db, columns, RawTextCursor if raw else pymysql.cursors.Cursor)
+    
+    def stream_table_data(self, table_name: str, fetch_size: int = 0, raw: bool = False) -> Iterator[Tuple]:
+        """用服务端游标流式读取表中的数据，不把整表载入内存，每次取fetch_size(默认FORMAT_BATCH_SIZE)行，
+        raw含义同get_table_data"""
+        with self.source_db.connection.cursor(RawTextSSCursor if raw else pymysql.cursors.SSCursor) as cursor:
+            cursor.execute(*self.select_rows_sql(table_name))
+            while True:
+                rows = cursor.fetchmany(fetch_size or self.FORMAT_BATCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+    
+    def has_lob_columns(self, table_name: str) -> bool:
+        """表中是否有BLOB/TEXT/JSON列"""
+        return any((col['DATA_TYPE'] or '').lower() in ValueFormatter.LOB_TYPES
+                   for col in self.get_table_columns(table_name))
     
     def get_table_columns(self, table_name: str) -> List[Dict[str, Any]]:
         """获取表的列信息"""
         try:
             with self.source_db.connection.cursor(pymysql.cursors.DictCursor) as cursor:
                 cursor.execute(
-                    "SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT, "
+                    "SELECT COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, "
                     "CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE "
                     "FROM information_schema.columns "
                     "WHERE table_schema = %s AND table_name = %s "
@@ -127,45 +454,173 @@ class TableExporter:
             logging.error(f"获取列信息失败: {e}")
             return []
     
-    def generate_insert_statements(self, table_name: str, target_table_name: str, data: List[Tuple]) -> List[str]:
+    def generate_insert_statements(self, table_name: str, target_table_name: str,
+                                   data: List[Tuple]) -> List[Union[str, bytes]]:
         """生成INSERT语句"""
-        if not data:
-            return []
+        return list(self.iter_insert_statements(table_name, target_table_name, data))
+    
+    def iter_insert_statements(self, table_name: str, target_table_name: str, data: Iterable[Tuple],
+                               stats: Optional[Dict[str, int]] = None) -> Iterator[Union[str, bytes]]:
+        """生成INSERT语句
+        
+        默认生成多行INSERT，按字节数而不是固定行数分批，保证每条语句不超过
+        max_packet(目标库的max_allowed_packet)；单行本身超过上限时单独成句。
+        extended_insert为False时每行一条INSERT。增量导出时语句带 ON DUPLICATE KEY UPDATE，
+        在目标表中更新已存在的行。stats['rows']返回已生成的行数。
+        带有大字段值的行各自成句，由encode_insert直接编码成bytearray返回。
+        """
+        if stats is None:
+            stats = {}
+        stats['rows'] = 0
         
         columns = self.get_table_columns(table_name)
         if not columns:
-            return []
+            return
         
         column_names = [col['COLUMN_NAME'] for col in columns]
         column_list = ', '.join([f"`{col}`" for col in column_names])
+        formatter = ValueFormatter([col['DATA_TYPE'] for col in columns], self.binary_encoding)
+        insert_tail = self.upsert_clause(column_names) + ';'
+        limit = self.max_packet - self.PACKET_MARGIN
         
-        insert_statements = []
-        
-        for row in data:
-            values = []
-            for i, value in enumerate(row):
-                if value is None:
-                    values.append('NULL')
-                elif isinstance(value, str):
-                    escaped_value = value.replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n').replace('\r', '\\r')
-                    values.append(f"'{escaped_value}'")
-                elif isinstance(value, (int, float)):
-                    values.append(str(value))
-                else:
-                    values.append(f"'{str(value)}'")
-            
-            values_str = ', '.join(values)
-            insert_sql = f"INSERT INTO `{target_table_name}` ({column_list}) VALUES ({values_str});"
-            insert_statements.append(insert_sql)
+        if not self.extended_insert:
+            insert_head = f"INSERT INTO `{target_table_name}` ({column_list}) VALUES "
+            for batch in self.iter_batches(data, formatter=formatter):
+                for large, rows in formatter.iter_runs(batch):
+                    if large:
+                        for row in rows:
+                            yield self.encode_insert(insert_head, insert_tail, formatter, row, limit)
+                        continue
+                    for values in formatter.format_row_values(rows):
+                        yield insert_head + values + insert_tail
+                stats['rows'] += len(batch)
+            return
+        
+        insert_head = f"INSERT INTO `{target_table_name}` ({column_list}) VALUES\n"
+        head_size = len(insert_head.encode('utf-8')) + len(insert_tail.encode('utf-8'))
+        pending: List[str] = []
+        size = head_size
+        for batch in self.iter_batches(data, formatter=formatter):
+            for large, rows in formatter.iter_runs(batch):
+                if large:
+                    if pending:
+                        yield insert_head + ',\n'.join(pending) + insert_tail
+                        pending = []
+                        size = head_size
+                    for row in rows:
+                        yield self.encode_insert(insert_head, insert_tail, formatter, row, limit)
+                    continue
+                for values in formatter.format_row_values(rows):
+                    value_size = (len(values) if values.isascii() else len(values.encode('utf-8', 'surrogateescape'))) + 2
+                    if pending and size + value_size > limit:
+                        yield insert_head + ',\n'.join(pending) + insert_tail
+                        pending = []
+                        size = head_size
+                    if not pending and head_size + value_size > limit:
+                        logging.warning(f"单行数据 {value_size} 字节，超过语句大小上限 {limit} 字节")
+                    pending.append(values)
+                    size += value_size
+            stats['rows'] += len(batch)
+        if pending:
+            yield insert_head + ',\n'.join(pending) + insert_tail
+    
+    @staticmethod
+    def encode_insert(insert_head: str, insert_tail: str, formatter: ValueFormatter,
+                      row: Tuple, limit: int) -> bytearray:
+        """把带有大字段值的一行编码成一条单独的INSERT语句"""
+        statement = bytearray(insert_head.encode('utf-8'))
+        formatter.encode_row(row, statement)
+        statement += insert_tail.encode('utf-8')
+        if len(statement) > limit:
+            logging.warning(f"单行数据 {len(statement)} 字节，超过语句大小上限 {limit} 字节")
+        return statement
+    
+    def iter_batches(self, data: Iterable[Tuple], batch_size: int = 0,
+                     formatter: Optional[ValueFormatter] = None) -> Iterator[List[Tuple]]:
+        """将行按batch_size(默认FORMAT_BATCH_SIZE)分批；formatter有大字段列时，
+        每批同时按LOB_BATCH_BYTES限制大字段的总字节数"""
+        batch_size = batch_size or self.FORMAT_BATCH_SIZE
+        rows = iter(data)
+        if formatter is None or not formatter.lob_columns:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                yield batch
+            return
+        
+        batch, size = [], 0
+        for row in rows:
+            batch.append(row)
+            size += formatter.lob_size(row)
+            if len(batch) >= batch_size or size >= self.LOB_BATCH_BYTES:
+                yield batch
+                batch, size = [], 0
+        if batch:
+            yield batch
+    
+    def iter_pipelined(self, batches: Iterator[List[Tuple]]) -> Iterator[List[Tuple]]:
+        """在读线程中迭代batches，经深度为pipe_depth的有界队列交给调用方
+        
+        源库读取与调用方(写目标库)同时进行，内存中最多缓存pipe_depth批数据；
+        读线程的异常在调用方重新抛出，调用方提前退出时读线程随之停止。
+        """
+        batch_queue: queue.Queue = queue.Queue(maxsize=self.pipe_depth)
+        stop = threading.Event()
+        done = object()
+        errors: List[BaseException] = []
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batch_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def reader():
+            try:
+                for batch in batches:
+                    if not put(batch):
+                        break
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                batches.close()
+                put(done)
         
-        return insert_statements
+        thread = threading.Thread(target=reader, name='tab_exp-reader', daemon=True)
+        thread.start()
+        try:
+            while True:
+                batch = batch_queue.get()
+                if batch is done:
+                    break
+                yield batch
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            thread.join()
     
-    def export_table(self, source_table: str, target_table: str) -> bool:
-        """导出表结构和数据"""
+    def export_table(self, source_table: str, target_table: str,
+                     sink: Optional[SqlSink] = None, keep_statements: bool = False,
+                     include_data: bool = True) -> bool:
+        """导出表结构和数据
+        
+        指定sink时语句边生成边写出；keep_statements为True时同时保留在
+        self.sql_statements中，供execute_on_target使用。include_data为False时
+        只导出表结构(数据由bulk_load_data直接写入目标库)。
+        """
         logging.info(f"开始导出表: {source_table} -> {target_table}")
         
         # 清空之前的SQL语句
         self.sql_statements = []
+        self.sink = sink
+        self.keep_statements = keep_statements
+        self.source_table = source_table
+        self.target_table = target_table
         
         # 连接源数据库
         if not self.source_db.connect():
@@ -178,6 +633,9 @@ class TableExporter:
                 logging.error(f"源表 '{source_table}' 不存在")
                 return False
             
+            if self.incremental_column and not self.prepare_incremental(source_table):
+                return False
+            
             # 获取创建表语句
             create_sql = self.get_create_table_statement(source_table)
             if not create_sql:
@@ -189,41 +647,133 @@ class TableExporter:
                 create_sql = create_sql.replace(f"CREATE TABLE `{source_table}`", 
                                               f"CREATE TABLE `{target_table}`", 1)
             
-            self.sql_statements.append("-- 表结构导出")
-            self.sql_statements.append(f"DROP TABLE IF EXISTS `{target_table}`;")
-            self.sql_statements.append(create_sql + ";")
-            self.sql_statements.append("")
+            # 二级索引从建表语句中拆出，数据导入后再创建
+            self.index_statements = []
+            if self.defer_indexes:
+                create_sql, indexes = SecondaryIndexes.split(create_sql)
+                self.index_statements = SecondaryIndexes.alter_statements(target_table, indexes)
+            
+            # 增量导出不删除目标表，只在目标表不存在时创建
+            if self.incremental_column:
+                create_sql = create_sql.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1)
+            self.create_sql = create_sql
+            
+            self.emit("-- 表结构导出")
+            if not self.incremental_column:
+                self.emit(f"DROP TABLE IF EXISTS `{target_table}`;")
+            self.emit(create_sql + ";")
+            self.emit("")
+            
+            if not include_data:
+                return True
             
-            # 获取表数据
-            data = self.get_table_data(source_table)
+            # 获取表数据，启用分块时逐块读取；含BLOB/TEXT列的表用服务端游标每次取少量行，
+            # 避免整表的大字段同时留在内存中
+            if self.chunk_size:
+                data = self.iter_table_data(source_table, self.passthrough)
+            elif self.has_lob_columns(source_table):
+                data = self.stream_table_data(source_table, self.LOB_FETCH_ROWS, self.passthrough)
+            else:
+                data = self.get_table_data(source_table, self.passthrough)
+            
+            stats: Dict[str, int] = {}
+            has_data = False
+            for insert_sql in self.iter_insert_statements(source_table, target_table, data, stats):
+                if not has_data:
+                    self.emit("-- 数据导出")
+                    has_data = True
+                self.emit(insert_sql)
             
-            if data:
-                logging.info(f"找到 {len(data)} 行数据")
-                self.sql_statements.append("-- 数据导出")
-                insert_statements = self.generate_insert_statements(source_table, target_table, data)
-                self.sql_statements.extend(insert_statements)
+            if has_data:
+                logging.info(f"导出 {stats['rows']} 行数据")
             else:
                 logging.info("表中没有数据")
-                self.sql_statements.append("-- 表中没有数据")
+                self.emit("-- 表中没有数据")
+            
+            if self.index_statements:
+                self.emit("")
+                self.emit("-- 索引创建")
+                for statement in self.index_statements:
+                    self.emit(statement + ";")
             
             return True
+        
+        except pymysql.Error as e:
+            logging.error(f"获取表数据失败: {e}")
+            return False
+        finally:
+            self.source_db.close()
+    
+    def export_table_file(self, source_table: str, filename: str, data_format: str,
+                          compression: Optional[str] = None, threads: int = 2) -> bool:
+        """把源表的行直接写成TSV/CSV/JSON Lines/Parquet数据文件(不含表结构)
+        
+        列类型取自information_schema，行从服务端游标(启用分块时逐块)读出后按批交给
+        写出器，不生成INSERT语句，内存占用与表大小无关。
+        """
+        logging.info(f"开始导出表数据: {source_table} -> {filename} ({data_format})")
+        self.source_table = source_table
+        
+        if not self.source_db.connect():
+            logging.error("无法连接到源数据库")
+            return False
+        
+        try:
+            if not self.source_db.table_exists(source_table):
+                logging.error(f"源表 '{source_table}' 不存在")
+                return False
+            
+            if self.incremental_column and not self.prepare_incremental(source_table):
+                return False
+            
+            columns = self.get_table_columns(source_table)
+            if not columns:
+                logging.error(f"无法获取源表 '{source_table}' 的列信息")
+                return False
+            
+            if self.chunk_size:
+                data = self.iter_table_data(source_table)
+            else:
+                data = self.stream_table_data(source_table)
             
+            writer = open_row_writer(data_format, filename, columns, compression, threads)
+            try:
+                for batch in self.iter_batches(data):
+                    writer.write_rows(batch)
+            finally:
+                writer.close()
+            
+            logging.info(f"导出 {writer.rows} 行数据，文件大小 {writer.bytes_written} 字节")
+            return True
+        
+        except pymysql.Error as e:
+            logging.error(f"获取表数据失败: {e}")
+            return False
         finally:
             self.source_db.close()
     
+    def write_header(self, sink: SqlSink):
+        """写出SQL文件头"""
+        sink.write("-- MySQL 表完整导出文件")
+        sink.write("-- 包含表结构和数据")
+        sink.write("")
+        sink.write("SET FOREIGN_KEY_CHECKS=0;")
+        sink.write("SET sql_mode = 'NO_AUTO_VALUE_ON_ZERO';")
+        sink.write("")
+    
+    def write_footer(self, sink: SqlSink):
+        """写出SQL文件尾"""
+        sink.write("")
+        sink.write("SET FOREIGN_KEY_CHECKS=1;")
+    
     def save_sql_file(self, filename: str) -> bool:
         """保存SQL文件"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write("-- MySQL 表完整导出文件\n")
-                f.write("-- 包含表结构和数据\n\n")
-                f.write("SET FOREIGN_KEY_CHECKS=0;\n")
-                f.write("SET sql_mode = 'NO_AUTO_VALUE_ON_ZERO';\n\n")
-                
+            with open_file_sink(filename) as sink:
+                self.write_header(sink)
                 for statement in self.sql_statements:
-                    f.write(statement + '\n')
-                
-                f.write("\nSET FOREIGN_KEY_CHECKS=1;\n")
+                    sink.write(statement)
+                self.write_footer(sink)
             
             logging.info(f"SQL文件已保存: {filename}")
             return True
@@ -231,26 +781,112 @@ class TableExporter:
             logging.error(f"保存文件失败: {e}")
             return False
     
-    def execute_on_target(self, ask_if_exists: bool = True) -> bool:
-        """在目标数据库上执行SQL语句"""
+    def load_data_batch(self, cursor, formatter: TsvFormatter, column_names: List[str], rows: List[Tuple]):
+        """把一批行写入临时TSV文件，再用LOAD DATA LOCAL INFILE导入目标表
+        
+        LOCAL方式相当于IGNORE：主键冲突的行被跳过，类型转换和截断只产生警告而不报错。
+        因此核对影响的行数并检查警告，有行被跳过或改动时抛出DataError，不能当作成功。
+        REPLACE时被替换的行计为2，影响的行数不少于这批的行数即可。
+        """
+        replace = bool(self.incremental_column)
+        tsv_file = tempfile.NamedTemporaryFile('wb', prefix='tab_exp_', suffix='.tsv', delete=False)
+        try:
+            with tsv_file:
+                tsv_file.write(formatter.format_rows(rows).encode('utf-8'))
+            affected = cursor.execute(formatter.load_data_sql(tsv_file.name, self.target_table, column_names,
+                                                              replace=replace))
+        finally:
+            os.remove(tsv_file.name)
+        
+        warning_count = cursor.warning_count
+        if warning_count or affected < len(rows) or (not replace and affected != len(rows)):
+            cursor.execute("SHOW WARNINGS LIMIT 3")
+            warnings = '; '.join(f"{level} {code}: {message}" for level, code, message in cursor.fetchall())
+            raise pymysql.DataError(f"LOAD DATA 导入 {len(rows)} 行，影响 {affected} 行，"
+                                    f"{warning_count} 条警告{': ' + warnings if warnings else ''}")
+    
+    def bulk_load_data(self, cursor, load_mode: str = 'bulk') -> int:
+        """把源表的行直接写入目标表，返回写入的行数
+        
+        load_mode为'bulk'时用executemany：pymysql会把 INSERT ... VALUES (%s, ...)
+        改写成多行INSERT，单条语句不超过cursor.max_stmt_length，这里设为max_packet
+        减去预留字节，省去生成SQL文本和逐条执行的开销。为'loaddata'时每批行转成TSV
+        后用LOAD DATA LOCAL INFILE导入，完全跳过INSERT解析；目标库不允许时退回
+        executemany。pipe_depth大于0时源表在读线程中读取，与写入目标表重叠进行。
+        """
+        if not self.source_db.connect():
+            raise pymysql.OperationalError("无法连接到源数据库")
+        
+        try:
+            columns_info = self.get_table_columns(self.source_table)
+            columns = [col['COLUMN_NAME'] for col in columns_info]
+            if not columns:
+                raise pymysql.OperationalError(f"无法获取源表 '{self.source_table}' 的列信息")
+            
+            tsv_formatter = None
+            if load_mode == 'loaddata':
+                tsv_formatter = TsvFormatter([col['DATA_TYPE'] for col in columns_info])
+            
+            column_list = ', '.join([f"`{col}`" for col in columns])
+            placeholders = ', '.join(['%s'] * len(columns))
+            insert_sql = (f"INSERT INTO `{self.target_table}` ({column_list}) VALUES ({placeholders})"
+                          + self.upsert_clause(columns))
+            cursor.max_stmt_length = self.max_packet - self.PACKET_MARGIN
+            
+            # 含BLOB/TEXT列时每次少取行，每批按大字段的总字节数截断
+            value_formatter = ValueFormatter([col['DATA_TYPE'] for col in columns_info])
+            if self.chunk_size:
+                data = self.iter_table_data(self.source_table, self.passthrough)
+            else:
+                data = self.stream_table_data(self.source_table,
+                                              self.LOB_FETCH_ROWS if value_formatter.lob_columns else 0,
+                                              self.passthrough)
+            
+            batches = self.iter_batches(data, self.BULK_BATCH_SIZE, value_formatter)
+            if self.pipe_depth:
+                logging.info(f"管道模式: 读写并行，队列深度 {self.pipe_depth} 批")
+                batches = self.iter_pipelined(batches)
+            
+            rows = 0
+            start_time = time.monotonic()
+            try:
+                for batch in batches:
+                    if tsv_formatter is not None:
+                        try:
+                            self.load_data_batch(cursor, tsv_formatter, columns, batch)
+                        except pymysql.Error as e:
+                            if rows or not e.args or e.args[0] not in self.LOCAL_INFILE_ERRORS:
+                                raise
+                            logging.warning(f"LOAD DATA LOCAL INFILE 不可用，改用批量INSERT: {e}")
+                            tsv_formatter = None
+                    if tsv_formatter is None:
+                        cursor.executemany(insert_sql, batch)
+                    rows += len(batch)
+                    logging.debug(f"已写入 {rows} 行")
+            finally:
+                batches.close()
+            logging.info(f"写入 {rows} 行，耗时 {time.monotonic() - start_time:.2f} 秒")
+            return rows
+        finally:
+            self.source_db.close()
+    
+    def execute_on_target(self, ask_if_exists: bool = True, load_mode: str = 'sql') -> bool:
+        """在目标数据库上执行SQL语句
+        
+        load_mode为'sql'时执行self.sql_statements中的语句；为'bulk'或'loaddata'时
+        只执行建表语句，数据由bulk_load_data从源表直接批量写入目标表。
+        """
         if not self.target_db.connect():
             logging.error("无法连接到目标数据库")
             return False
         
         try:
             # 检查目标表是否存在
-            target_table_name = None
-            for stmt in self.sql_statements:
-                if stmt.strip().startswith("CREATE TABLE"):
-                    # 提取表名
-                    start = stmt.find("`") + 1
-                    end = stmt.find("`", start)
-                    if start > 0 and end > start:
-                        target_table_name = stmt[start:end]
-                        break
-            
+            create_table = True
+            target_table_name = self.target_table
             if target_table_name and self.target_db.table_exists(target_table_name):
-                if ask_if_exists:
+                # 增量导出本来就是向已有的目标表追加/更新，建表语句带IF NOT EXISTS
+                if ask_if_exists and not self.incremental_column:
                     print(f"\n⚠️  目标表 '{target_table_name}' 已存在！")
                     print("请选择处理方式:")
                     print("1. 删除现有表并重新创建")
@@ -262,12 +898,15 @@ class TableExporter:
                         if choice == '1':
                             break
                         elif choice == '2':
-                            # 过滤掉DROP和CREATE语句
+                            # 过滤掉DROP和CREATE语句，已有的表也不再补建索引
+                            create_table = False
                             filtered_statements = []
                             for stmt in self.sql_statements:
-                                stmt_upper = stmt.strip().upper()
+                                # 含大字段的INSERT语句是bytes，不需要检查
+                                stmt_upper = stmt.strip().upper() if isinstance(stmt, str) else ""
                                 if not (stmt_upper.startswith("DROP TABLE") or 
-                                       stmt_upper.startswith("CREATE TABLE")):
+                                       stmt_upper.startswith("CREATE TABLE") or
+                                       stmt_upper.startswith("ALTER TABLE")):
                                     filtered_statements.append(stmt)
                             self.sql_statements = filtered_statements
                             break
@@ -277,11 +916,29 @@ class TableExporter:
                         else:
                             print("无效选择，请重新输入")
             
+            if load_mode in ('bulk', 'loaddata'):
+                with self.target_db.connection.cursor() as cursor:
+                    if create_table:
+                        if not self.incremental_column:
+                            cursor.execute(f"DROP TABLE IF EXISTS `{target_table_name}`")
+                        cursor.execute(self.create_sql)
+                    rows = self.bulk_load_data(cursor, load_mode)
+                    self.target_db.connection.commit()
+                    if create_table and self.index_statements:
+                        start_time = time.monotonic()
+                        for statement in self.index_statements:
+                            cursor.execute(statement)
+                        logging.info(f"创建延后的索引，耗时 {time.monotonic() - start_time:.2f} 秒")
+                
+                logging.info(f"批量写入 {rows} 行数据，目标数据库导入成功")
+                return True
+            
             # 执行SQL语句
             with self.target_db.connection.cursor() as cursor:
                 for statement in self.sql_statements:
-                    stmt = statement.strip()
-                    if stmt and not stmt.startswith('--'):
+                    # 含大字段的INSERT语句是已编码的bytes，原样交给PyMySQL执行
+                    stmt = statement.strip() if isinstance(statement, str) else statement
+                    if stmt and not (isinstance(stmt, str) and stmt.startswith('--')):
                         try:
                             cursor.execute(stmt)
                         except pymysql.Error as e:
@@ -292,7 +949,7 @@ class TableExporter:
             
             logging.info("目标数据库导入成功")
             return True
-            
+        
         except pymysql.Error as e:
             logging.error(f"目标数据库操作失败: {e}")
             return False
@@ -300,6 +957,65 @@ class TableExporter:
             self.target_db.close()
 
 
+class SyncState:
+    """增量同步的高水位记录，按"源表 -> 目标表"对保存在JSON文件中"""
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.pairs: Dict[str, Dict[str, Any]] = {}
+    
+    @staticmethod
+    def pair_key(source_db: DatabaseConnector, source_table: str,
+                 target_db: Optional[DatabaseConnector], target_table: str, output: Optional[str]) -> str:
+        """源表/目标表对的标识，不写入目标库时以输出文件代替目标库"""
+        source = f"{source_db.host}:{source_db.port}/{source_db.database}.{source_table}"
+        if target_db is not None:
+            target = f"{target_db.host}:{target_db.port}/{target_db.database}.{target_table}"
+        else:
+            target = f"file:{output}"
+        return f"{source} -> {target}"
+    
+    def load(self) -> bool:
+        """读取状态文件，文件不存在时视为没有记录"""
+        if not os.path.exists(self.filename):
+            return True
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                self.pairs = json.load(f)
+            return True
+        except (IOError, ValueError) as e:
+            logging.error(f"读取增量同步状态失败: {e}")
+            return False
+    
+    def get(self, key: str, column: str) -> Any:
+        """上次同步记录的高水位，记录的变更列与本次不同时返回None"""
+        entry = self.pairs.get(key)
+        if entry and entry.get('column') == column:
+            return entry.get('high_water_mark')
+        return None
+    
+    def update(self, key: str, column: str, value: Any):
+        if value is not None and not isinstance(value, (int, float)):
+            value = str(value)
+        self.pairs[key] = {
+            'column': column,
+            'high_water_mark': value,
+            'synced_at': datetime.now().isoformat(timespec='seconds')
+        }
+    
+    def save(self) -> bool:
+        """先写临时文件再替换，避免中断时损坏已有记录"""
+        temp_filename = self.filename + '.tmp'
+        try:
+            with open(temp_filename, 'w', encoding='utf-8') as f:
+                json.dump(self.pairs, f, ensure_ascii=False, indent=2)
+            os.replace(temp_filename, self.filename)
+            return True
+        except IOError as e:
+            logging.error(f"保存增量同步状态失败: {e}")
+            return False
+
+
 def parse_connection_string(conn_str: str) -> Dict[str, Any]:
     """解析连接字符串格式: user:password@host:port/database"""
     try:
@@ -348,7 +1064,7 @@ def main():
   %(prog)s --source-host localhost --source-port 3306 --source-user root --source-password 123456 \\
            --source-db mydb --source-table users --target-host 192.168.1.100 --target-port 3306 \\
            --target-user admin --target-password secret --target-db newdb --target-table new_users
-
+  
   %(prog)s --source root:123456@localhost:3306/mydb --source-table users \\
            --target admin:secret@192.168.1.100:3306/newdb --target-table new_users --output users.sql
 
@@ -377,13 +1093,87 @@ def main():
     target_group.add_argument('--target-table', type=str, help='目标表名 (默认与源表名相同)')
     
     # 其他选项
-    parser.add_argument('--output', '-o', type=str, help='输出SQL文件路径')
+    parser.add_argument('--output', '-o', type=str, help='输出SQL文件路径 ("-" 表示标准输出)')
+    parser.add_argument('--data-format', choices=['sql', 'tsv', 'csv', 'jsonl', 'parquet'], default='sql',
+                        help='输出文件的格式，sql以外的格式只包含表数据 (默认: sql)')
+    parser.add_argument('--compress', choices=['gzip', 'zstd', 'none'],
+                        help='输出压缩格式 (默认: 按输出文件扩展名判断，.gz为gzip，.zst为zstd)')
+    parser.add_argument('--compress-threads', type=int, default=2, help='并行压缩的线程数 (默认: 2)')
     parser.add_argument('--execute', '-e', action='store_true', help='直接在目标数据库执行')
+    parser.add_argument('--chunk-size', type=int, default=0,
+                        help='按主键/唯一键分块读取源表，每块的行数 (默认: 0，不分块)')
+    parser.add_argument('--max-packet', type=int,
+                        help='单条INSERT语句的最大字节数 (默认: 目标库的max_allowed_packet，无目标库时1MB)')
+    parser.add_argument('--skip-extended-insert', action='store_true', help='每行生成一条INSERT语句')
+    parser.add_argument('--load-mode', choices=['bulk', 'loaddata', 'sql'],
+                        help='--execute 的导入方式: sql 逐条执行生成的SQL语句，bulk 从源表直接批量写入目标表，'
+                             'loaddata 用LOAD DATA LOCAL INFILE导入(不可用时退回bulk)，bulk和loaddata不能与 --output 同用 '
+                             '(默认: sql，使用 --pipe 时为 bulk)')
+    parser.add_argument('--pipe', action='store_true',
+                        help='管道模式: 读线程流式读取源表，写线程同时写入目标表 (隐含 --execute，不能与 --load-mode sql 同用)')
+    parser.add_argument('--pipe-depth', type=int, default=TableExporter.DEFAULT_PIPE_DEPTH,
+                        help=f'管道模式下读写线程之间缓存的批数，每批 {TableExporter.BULK_BATCH_SIZE} 行 '
+                             f'(默认: {TableExporter.DEFAULT_PIPE_DEPTH})')
+    parser.add_argument('--incremental-column', type=str,
+                        help='增量同步的变更列(如 updated_at 或自增主键)，只导出该列不小于 --since 的行，'
+                             '以 INSERT ... ON DUPLICATE KEY UPDATE 写入目标表')
+    parser.add_argument('--since', type=str,
+                        help='增量同步的起点 (默认: 状态文件中记录的上次同步高水位，没有记录时导出全部行)')
+    parser.add_argument('--overlap', type=int, default=TableExporter.DEFAULT_OVERLAP,
+                        help='增量同步时起点向前回退的量，重新读取提交较晚的事务写入的行：日期时间列为秒数，'
+                             f'数值列为数值，0为不回退 (默认: {TableExporter.DEFAULT_OVERLAP})')
+    parser.add_argument('--state-file', type=str, default='tab_exp_state.json',
+                        help='记录各源表/目标表对增量同步高水位的文件 (默认: tab_exp_state.json)')
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help='建表语句中去掉二级索引，导入数据后用一条ALTER TABLE批量创建')
+    parser.add_argument('--binary-encoding', choices=ValueFormatter.BINARY_ENCODINGS, default='hex',
+                        help="SQL中二进制值的写法: hex 为 0x...，binary 为 _binary'...' (按原始字节转义，体积最小)，"
+                             "base64 为 FROM_BASE64('...') (默认: hex)")
+    parser.add_argument('--passthrough', action='store_true',
+                        help='DECIMAL、浮点数和日期时间列保留服务端返回的文本，生成INSERT或批量写入时不再经过Python类型转换')
     parser.add_argument('--force', '-f', action='store_true', help='强制执行，不询问用户确认')
     parser.add_argument('--verbose', '-v', action='store_true', help='详细输出')
     
     args = parser.parse_args()
     
+    if args.chunk_size < 0:
+        parser.error("--chunk-size 不能为负数")
+    if args.max_packet is not None and args.max_packet <= TableExporter.PACKET_MARGIN:
+        parser.error(f"--max-packet 必须大于 {TableExporter.PACKET_MARGIN}")
+    if args.since is not None and not args.incremental_column:
+        parser.error("--since 需要与 --incremental-column 一起使用")
+    if args.overlap < 0:
+        parser.error("--overlap 不能为负数")
+    if args.defer_indexes and args.incremental_column:
+        parser.error("--defer-indexes 不能与 --incremental-column 一起使用，增量同步的目标表已经有索引")
+    if args.pipe_depth < 1:
+        parser.error("--pipe-depth 必须大于0")
+    if args.data_format != 'sql':
+        if not args.output or args.execute or args.pipe:
+            parser.error("--data-format 需要与 --output 一起使用，且不能与 --execute、--pipe 同用")
+        if args.data_format == 'parquet' and args.output == '-':
+            parser.error("Parquet文件不能输出到标准输出")
+        if args.data_format == 'parquet' and pyarrow is None:
+            parser.error("Parquet输出需要安装pyarrow: pip install pyarrow")
+        if args.passthrough:
+            parser.error(f"--passthrough 只用于生成INSERT语句或写入目标库，不能与 --data-format {args.data_format} 同用")
+    if args.compress and not args.output:
+        parser.error("--compress 需要与 --output 一起使用")
+    compression = args.compress or (CompressedFileSink.detect(args.output) if args.output else None) or 'none'
+    if compression == 'zstd' and zstandard is None:
+        parser.error("zstd压缩需要安装zstandard: pip install zstandard")
+    if args.compress_threads < 1:
+        parser.error("--compress-threads 至少为1")
+    if args.pipe:
+        if args.load_mode == 'sql':
+            parser.error("--pipe 不能与 --load-mode sql 一起使用")
+        args.execute = True
+    if args.load_mode is None:
+        args.load_mode = 'bulk' if args.pipe else 'sql'
+    if args.execute and args.output and args.load_mode != 'sql':
+        # 文件和目标表分别读取源表，源表负载加倍，两次读取之间的变更也会让两者不一致
+        parser.error(f"--load-mode {args.load_mode} 不能与 --output 一起使用，同时输出文件时请使用 --load-mode sql")
+    
     # 设置日志级别
     log_level = logging.DEBUG if args.verbose else logging.INFO
     logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -422,58 +1212,124 @@ def main():
         # 确定目标表名
         target_table = args.target_table or args.source_table
         
-        print("🔄 数据库表导出工具启动...")
-        print(f"源数据库: {source_config['user']}@{source_config['host']}:{source_config['port']}/{source_config['database']}")
-        print(f"源表: {args.source_table}")
+        # 输出到标准输出时，提示信息改写到标准错误，避免混入SQL
+        console = sys.stderr if args.output == '-' else sys.stdout
+        
+        print("🔄 数据库表导出工具启动...", file=console)
+        print(f"源数据库: {source_config['user']}@{source_config['host']}:{source_config['port']}/{source_config['database']}", file=console)
+        print(f"源表: {args.source_table}", file=console)
         
         if args.execute:
-            print(f"目标数据库: {target_config['user']}@{target_config['host']}:{target_config['port']}/{target_config['database']}")
-            print(f"目标表: {target_table}")
+            print(f"目标数据库: {target_config['user']}@{target_config['host']}:{target_config['port']}/{target_config['database']}", file=console)
+            print(f"目标表: {target_table}", file=console)
         
         # 创建数据库连接器
         source_db = DatabaseConnector(**source_config)
-        target_db = DatabaseConnector(**target_config) if target_config else None
+        target_db = None
+        if target_config:
+            target_db = DatabaseConnector(**target_config, local_infile=args.load_mode == 'loaddata')
         
         # 测试源数据库连接
-        print("\n🔍 测试数据库连接...")
+        print("\n🔍 测试数据库连接...", file=console)
         if not source_db.test_connection():
-            print("❌ 源数据库连接失败")
+            print("❌ 源数据库连接失败", file=console)
             return 1
-        print("✅ 源数据库连接成功")
+        print("✅ 源数据库连接成功", file=console)
         
         # 测试目标数据库连接
         if target_db:
             if not target_db.test_connection():
-                print("❌ 目标数据库连接失败")
+                print("❌ 目标数据库连接失败", file=console)
                 return 1
-            print("✅ 目标数据库连接成功")
+            print("✅ 目标数据库连接成功", file=console)
         
-        # 创建导出器并执行导出
-        exporter = TableExporter(source_db, target_db)
+        # 创建导出器并执行导出，指定输出文件时语句边生成边写入
+        # 多行INSERT的大小上限，优先使用命令行参数，其次读取目标库的max_allowed_packet
+        max_packet = args.max_packet
+        if max_packet is None and target_db and target_db.connect():
+            max_packet = target_db.get_max_allowed_packet()
+            target_db.close()
+        if max_packet is None:
+            max_packet = TableExporter.DEFAULT_MAX_PACKET
+        logging.debug(f"单条INSERT语句上限: {max_packet} 字节")
         
-        if not exporter.export_table(args.source_table, target_table):
-            print("❌ 表导出失败")
-            return 1
+        # 增量同步: 起点取命令行参数，其次取状态文件中记录的上次高水位
+        sync_state = None
+        sync_key = None
+        since = args.since
+        if args.incremental_column:
+            sync_state = SyncState(args.state_file)
+            if not sync_state.load():
+                return 1
+            sync_key = SyncState.pair_key(source_db, args.source_table, target_db, target_table, args.output)
+            if since is None:
+                since = sync_state.get(sync_key, args.incremental_column)
         
-        print("✅ 表导出成功")
+        exporter = TableExporter(source_db, target_db, chunk_size=args.chunk_size,
+                                 extended_insert=not args.skip_extended_insert,
+                                 max_packet=max_packet,
+                                 pipe_depth=args.pipe_depth if args.pipe else 0,
+                                 incremental_column=args.incremental_column, since=since,
+                                 overlap=args.overlap,
+                                 defer_indexes=args.defer_indexes,
+                                 binary_encoding=args.binary_encoding,
+                                 passthrough=args.passthrough)
         
-        # 保存到文件
-        if args.output:
-            if not exporter.save_sql_file(args.output):
-                print("❌ 保存SQL文件失败")
+        if args.data_format != 'sql':
+            # 只导出表数据，Parquet未指定 --compress 时使用snappy列压缩
+            file_compression = args.compress if args.data_format == 'parquet' else compression
+            if not exporter.export_table_file(args.source_table, args.output, args.data_format,
+                                              file_compression, args.compress_threads):
+                print("❌ 表导出失败", file=console)
                 return 1
-            print(f"📁 SQL文件已保存到: {args.output}")
-        
-        # 直接执行到目标数据库
-        if args.execute:
-            if not exporter.execute_on_target(ask_if_exists=not args.force):
-                print("❌ 目标数据库导入失败")
+            print("✅ 表导出成功", file=console)
+            print(f"📁 数据文件已保存到: {args.output}", file=console)
+        else:
+            # bulk/loaddata模式下数据直接从源表写入目标表，不需要保留生成的SQL语句
+            bulk_load = args.execute and args.load_mode != 'sql'
+            
+            sink = None
+            try:
+                if args.output:
+                    sink = open_file_sink(args.output, compression, args.compress_threads)
+                    exporter.write_header(sink)
+                
+                if not exporter.export_table(args.source_table, target_table,
+                                             sink=sink, keep_statements=args.execute and not bulk_load,
+                                             include_data=not bulk_load):
+                    print("❌ 表导出失败", file=console)
+                    return 1
+                
+                if sink:
+                    exporter.write_footer(sink)
+            except IOError as e:
+                logging.error(f"保存文件失败: {e}")
+                print("❌ 保存SQL文件失败", file=console)
                 return 1
-            print("✅ 目标数据库导入成功")
+            finally:
+                if sink:
+                    sink.close()
+            
+            print("✅ 表导出成功", file=console)
+            if args.output:
+                print(f"📁 SQL文件已保存到: {args.output}", file=console)
+            
+            # 直接执行到目标数据库
+            if args.execute:
+                if not exporter.execute_on_target(ask_if_exists=not args.force, load_mode=args.load_mode):
+                    print("❌ 目标数据库导入失败", file=console)
+                    return 1
+                print("✅ 目标数据库导入成功", file=console)
         
-        print("\n🎉 所有操作完成！")
-        return 0
+        # 导出和导入都成功后才记录新的高水位
+        if sync_state is not None:
+            sync_state.update(sync_key, args.incremental_column, exporter.high_water_mark)
+            if sync_state.save():
+                print(f"📌 增量同步高水位: {args.incremental_column} = {exporter.high_water_mark}", file=console)
         
+        print("\n🎉 所有操作完成！", file=console)
+        return 0
+    
     except Exception as e:
         logging.error(f"程序执行失败: {e}")
         return 1